@@ -1,13 +1,42 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Union
 from dataclasses import dataclass
 from datetime import datetime, time
 import warnings
-import random
 
 from .ntsl_parser import NTSLStrategy
 from .technical_indicators import TechnicalIndicators
+from .indicator_cache import IndicatorCache, CachedIndicators
+from .fast_kernel import FastBarKernel
+from .spread_model import SpreadModel, UniformSpreadModel
+from .intrabar import IntrabarIndex, bar_duration
+from .metrics import equity_metrics, trade_metrics
+from .trade_log import TradeLog, DIRECTIONS
+from .events import (EventSink, NullEventSink, ConsoleEventSink,
+                     EVENT_ENTRY, EVENT_EXIT, EVENT_BLOCK, EVENT_DAILY_RESET)
+
+# Modos de execução do loop barra a barra
+ENGINE_MODES = ('standard', 'fast', 'compiled')
+
+# Tipo de média das Bollinger: inteiro do NTSL -> MAType do TA-Lib
+# (0: SMA, 1: EMA, 2: WMA, 3: DEMA, 4: TEMA, 5: TRIMA, 6: KAMA, 7: MAMA, 8: T3).
+# Para SMMA e LWMA, que não têm um MAType direto no TA-Lib, usamos SMA e WMA como fallback.
+NTSL_TO_TALIB_MATYPE = {0: 0, 1: 1, 2: 0, 3: 2}  # 0: SMA, 1: EMA, 2: SMMA, 3: LWMA
+
+# Estado inicial dos controles diários da estratégia (strategy_state)
+INITIAL_STRATEGY_STATE = {
+    'ultimoDia': None,
+    'tradesHoje': 0,
+    'lossConsecutivo': 0,
+    'resultadoDiario': 0.0,
+    'posicaoAberta': False,
+    'bloqueadoMeta': False,
+    'bloqueadoLossConsec': False,
+    'primeiraBarraDefinida': False,
+    'maximaPrimeiraBarra': 0.0,
+    'minimaPrimeiraBarra': 999999.0
+}
 
 @dataclass
 class Trade:
@@ -22,11 +51,12 @@ class Trade:
     status: str  # 'OPEN', 'CLOSED', 'STOPPED'
     stop_loss: Optional[float] = None
     take_profit: Optional[float] = None
+    exit_reason: Optional[str] = None  # 'TAKE_PROFIT', 'STOP_LOSS', 'END_OF_DATA', ...
 
 @dataclass
 class BacktestResult:
     """Resultado completo do backtest"""
-    trades: List[Trade]
+    trades: TradeLog  # Colunar; indexar/iterar devolve Trade, to_frame() sem cópia
     equity_curve: pd.Series
     metrics: Dict[str, float]
     strategy_name: str
@@ -35,52 +65,172 @@ class BacktestResult:
     period: str
     total_bars: int
 
+def rebuild_equity_curve(trades: Union[TradeLog, List[Trade]], close: np.ndarray, index: pd.DatetimeIndex,
+                         open_trade: Optional[Trade] = None, points_per_tick: float = 1.0) -> np.ndarray:
+    """
+    Reconstrói a curva de equity barra a barra a partir dos trades.
+    Equivalente ao cálculo feito dentro do loop: resultado realizado acumulado
+    até a barra de saída de cada trade, mais o resultado não realizado (convertido
+    em dinheiro por points_per_tick, sem custos) das barras em que o trade estava aberto.
+
+    Args:
+        trades: Trades fechados, na ordem de execução (TradeLog ou lista de Trade)
+        close: Preços de fechamento de cada barra
+        index: Índice temporal das barras (ordenado)
+        open_trade: Trade ainda aberto ao final dos dados, se houver
+        points_per_tick: Input pontosPorTick da estratégia (mesma unidade do 'result' dos trades)
+    """
+    n = len(close)
+    log = trades if isinstance(trades, TradeLog) else TradeLog.from_trades(trades)
+    log = log.select(~np.isnan(log.column('result')))
+    n_closed = len(log)
+    if open_trade is not None:
+        log.append(open_trade)
+
+    if len(log) == 0:
+        return np.zeros(n, dtype=np.float64)
+
+    entry_bars = index.searchsorted(log.times('entry_time'))
+    exit_bars = np.full(len(log), n, dtype=np.int64)
+    if n_closed:
+        exit_bars[:n_closed] = index.searchsorted(log.times('exit_time')[:n_closed])
+
+    # Resultado realizado: degrau na barra de saída de cada trade
+    results = log.column('result')[:n_closed]
+    realized = np.bincount(exit_bars[:n_closed], weights=results, minlength=n)[:n].astype(np.float64)
+    realized = np.cumsum(realized)
+
+    # Resultado não realizado: barras [entrada, saída) de cada trade
+    lengths = np.maximum(exit_bars - entry_bars, 0)
+    owner = np.repeat(np.arange(len(log)), lengths)
+    bars = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + np.repeat(entry_bars, lengths)
+
+    entry_price = log.column('entry_price')[owner]
+    quantity = log.column('quantity').astype(np.float64)[owner]
+    is_long = (log.column('direction') == DIRECTIONS.index('LONG'))[owner]
+    unrealized = np.where(is_long, (close[bars] - entry_price) * quantity, (entry_price - close[bars]) * quantity)
+    unrealized *= points_per_tick
+
+    equity = realized.copy()
+    equity[bars] += unrealized
+    return equity
+
 class BacktestEngine:
     """
     Engine principal para execução de backtest de estratégias NTSL
     Baseado na documentação em docs/ e exemplos do catalog.md
     """
     
-    def __init__(self):
+    def __init__(self, verbosity: int = 1, event_sink: Optional[EventSink] = None,
+                 indicator_cache: Optional[IndicatorCache] = None,
+                 indicators: Optional[TechnicalIndicators] = None,
+                 spread_model: Optional[SpreadModel] = None):
+        """
+        Args:
+            verbosity: 0 = silencioso, 1 = resumo da execução e trades,
+                       2 = também diagnóstico dos dados, bloqueios e viradas de dia
+            event_sink: Destino dos eventos de entrada/saída/bloqueio/virada de dia.
+                        Padrão: console (verbosity >= 1) ou descarte (verbosity 0)
+            indicator_cache: Cache de indicadores compartilhado entre execuções
+                             (ex: varreduras de parâmetros)
+            indicators: Fachada de indicadores já configurada (ex: WindowedIndicators
+                        no walk-forward); tem precedência sobre indicator_cache
+            spread_model: Modelo do spread simulado no filtro de entrada.
+                          Padrão: uniforme sem semente (não reproduzível)
+        """
         self.data: pd.DataFrame = None
         self.strategy: NTSLStrategy = None
-        self.trades: List[Trade] = []
+        self.asset = ''
+        self.trades = TradeLog()
         self.current_position = 0
         self.current_trade: Optional[Trade] = None
-        self.equity = []
+        self.equity = np.empty(0, dtype=np.float64)
+        self.realized_pnl = 0.0
         self.daily_results = {}
-        self.indicators = TechnicalIndicators()
+        if indicators is None:
+            indicators = CachedIndicators(indicator_cache) if indicator_cache is not None else TechnicalIndicators()
+        self.indicators = indicators
+        self.spread_model = spread_model or UniformSpreadModel()
         
         # Estado da estratégia baseado em padrões do catálogo
-        self.strategy_state = {
-            'ultimoDia': None,
-            'tradesHoje': 0,
-            'lossConsecutivo': 0,
-            'resultadoDiario': 0.0,
-            'posicaoAberta': False,
-            'bloqueadoMeta': False,
-            'bloqueadoLossConsec': False,
-            'primeiraBarraDefinida': False,
-            'maximaPrimeiraBarra': 0.0,
-            'minimaPrimeiraBarra': 999999.0
-        }
-        
-    def run_backtest(self, strategy: NTSLStrategy, data: pd.DataFrame, asset: str, timeframe: str) -> BacktestResult:
-        """Executa backtest completo"""
+        self.strategy_state = dict(INITIAL_STRATEGY_STATE)
+        self.configure_output(verbosity, event_sink)
+
+    def configure_output(self, verbosity: int = 1, event_sink: Optional[EventSink] = None):
+        """Define o nível de verbosidade e o destino dos eventos do engine"""
+        self.verbosity = verbosity
+        if event_sink is None:
+            event_sink = ConsoleEventSink(verbosity) if verbosity >= 1 else NullEventSink()
+        self.events = event_sink
+        self.emit_events = event_sink.enabled
+        
+    def run_backtest(self, strategy: NTSLStrategy, data: pd.DataFrame, asset: str, timeframe: str,
+                     mode: str = 'standard', rebuild_equity: bool = False,
+                     intrabar_data: Optional[pd.DataFrame] = None) -> BacktestResult:
+        """
+        Executa backtest completo
+
+        Args:
+            mode: 'standard' (loop sobre linhas do DataFrame), 'fast' (kernel sobre
+                  arrays NumPy, mesmo resultado) ou 'compiled' (executa o próprio código
+                  NTSL da estratégia, ver ntsl_compiler)
+            rebuild_equity: Se True, o equity não é calculado barra a barra; a curva é
+                            reconstruída ao final, de forma vetorizada, a partir dos trades
+            intrabar_data: Barras de 1 minuto que compõem os dados reamostrados. Se
+                           informadas, stop e alvo são executados no preço do nível
+                           tocado primeiro dentro da barra (em vez do fechamento)
+        """
+        if mode not in ENGINE_MODES:
+            raise ValueError(f"Modo de execução não suportado: {mode}. Disponíveis: {ENGINE_MODES}")
+        if mode == 'compiled' and intrabar_data is not None:
+            raise ValueError("Modo 'compiled' não suporta dados intrabarra")
+
         self.strategy = strategy
+        self.asset = asset
+        if isinstance(self.indicators, CachedIndicators):
+            # Impressão digital calculada sobre o DataFrame original (memorizada por objeto)
+            self.indicators.prepare(data)
         self.data = data.copy()
-        self._prepare_data()
+        self.intrabar = None
+        self.compiled_program = None  # Programa NTSL do último run no modo 'compiled'
+        if intrabar_data is not None:
+            self.intrabar = IntrabarIndex(intrabar_data, self.data.index,
+                                          bar_duration(self.data.index, timeframe))
+        if mode == 'compiled':
+            # Indicadores e sinais vêm do código NTSL; aqui só a validação das colunas
+            self._check_columns()
+        else:
+            self._prepare_data()
         self._initialize_strategy_variables()
         
-        print(f"Iniciando backtest da estratégia: {strategy.name}")
-        print(f"Ativo: {asset} | Tempo Gráfico: {timeframe}")
-        print(f"Período: {data.index[0].date()} a {data.index[-1].date()}")
-        print(f"Total de barras: {len(data)}")
+        if self.verbosity >= 1:
+            print(f"Iniciando backtest da estratégia: {strategy.name}")
+            print(f"Ativo: {asset} | Tempo Gráfico: {timeframe}")
+            print(f"Período: {data.index[0].date()} a {data.index[-1].date()}")
+            print(f"Total de barras: {len(data)}")
         
         # Executar barra por barra
-        for i in range(len(self.data)):
-            self.current_bar = i
-            self._execute_bar(i)
+        self.track_equity = not rebuild_equity
+        if mode == 'fast':
+            FastBarKernel(self).run()
+        elif mode == 'compiled':
+            # Import tardio: permite executar 'python -m backtest.ntsl_compiler'
+            from .ntsl_compiler import CompiledKernel
+            kernel = CompiledKernel(self)
+            kernel.run()
+            self.compiled_program = kernel.program
+        else:
+            for i in range(len(self.data)):
+                self.current_bar = i
+                self._execute_bar(i)
+
+        if rebuild_equity:
+            # Reconstruir antes do fechamento forçado (END_OF_DATA), que no loop
+            # aparece apenas como resultado não realizado da última barra
+            self.equity = rebuild_equity_curve(
+                self.trades, self.data['close'].to_numpy(dtype=np.float64), self.data.index,
+                open_trade=self.current_trade if self.current_position != 0 else None,
+                points_per_tick=float(strategy.inputs.get('pontosPorTick', 1.0)))
         
         # Fechar posição aberta ao final
         if self.current_position != 0:
@@ -100,13 +250,16 @@ class BacktestEngine:
             total_bars=len(data)
         )
     
-    def _prepare_data(self):
-        """Prepara dados com indicadores baseados na documentação NTSL"""
-        # Garantir colunas OHLCV
+    def _check_columns(self):
+        """Garante as colunas OHLCV"""
         required_cols = ['open', 'high', 'low', 'close', 'volume']
         for col in required_cols:
             if col not in self.data.columns:
                 raise ValueError(f"Coluna obrigatória '{col}' não encontrada nos dados")
+
+    def _prepare_data(self):
+        """Prepara dados com indicadores baseados na documentação NTSL"""
+        self._check_columns()
         
         # Calcular indicadores baseados nos parâmetros da estratégia
         # Médias Móveis (conforme docs/funcoes_constantes_NTSL.md)
@@ -127,12 +280,8 @@ class BacktestEngine:
             desvio = float(self.strategy.inputs.get('bb_desvio', 2.0))
             tipo_media_int = int(self.strategy.inputs.get('bb_tipoMedia', 0))
 
-            # Mapear o inteiro do NTSL para o tipo de média
             # Mapear o inteiro do NTSL para o tipo de média do TA-Lib
-            # 0: SMA, 1: EMA, 2: WMA, 3: DEMA, 4: TEMA, 5: TRIMA, 6: KAMA, 7: MAMA, 8: T3
-            # Para SMMA e LWMA, que não têm um MAType direto no TA-Lib, usaremos SMA (0) como fallback.
-            ta_matype_map = {0: 0, 1: 1, 2: 0, 3: 2} # 0: SMA, 1: EMA, 2: SMMA(fallback to SMA), 3: LWMA(fallback to WMA)
-            ta_matype = ta_matype_map.get(tipo_media_int, 0) # Padrão é SMA (0)
+            ta_matype = NTSL_TO_TALIB_MATYPE.get(tipo_media_int, 0) # Padrão é SMA (0)
 
             bb_upper, bb_middle, bb_lower = self.indicators.bollinger_bands(
                 self.data['close'], periodo, desvio, ma_type=ta_matype)
@@ -146,9 +295,10 @@ class BacktestEngine:
             self.data['atr'] = self.indicators.atr(self.data, periodo)
 
         # --- Comparação de Indicadores (para alinhamento com CSV) ---
-        print("Verificando dtypes antes da comparação:")
-        print(self.data.info())
-        print("Realizando comparação de indicadores com os valores do CSV...")
+        if self.verbosity >= 2:
+            print("Verificando dtypes antes da comparação:")
+            print(self.data.info())
+            print("Realizando comparação de indicadores com os valores do CSV...")
 
         # Para os indicadores de Primeira Barra, eles são calculados barra a barra
         # e armazenados no strategy_state. Para compará-los, precisaríamos de uma
@@ -161,61 +311,84 @@ class BacktestEngine:
             if col in self.data.columns and col not in self.data.columns:
                 self.data[col] = self.data[col] # Apenas para garantir que não sejam descartadas
 
+        # Sinais vetorizados das estratégias internas (calculados uma única vez)
+        self._precompute_signals()
+        self._precompute_spread_filter()
+
+    def _precompute_signals(self):
+        """
+        Pré-calcula os sinais Larry Williams e Bollinger para todas as barras.
+        Os sinais são armazenados como arrays int8 indexados pela barra, evitando
+        o acesso a self.data.iloc e pd.isna dentro do loop principal.
+        """
+        n = len(self.data)
+        close = self.data['close'].to_numpy(dtype=np.float64)
+        high = self.data['high'].to_numpy(dtype=np.float64)
+        low = self.data['low'].to_numpy(dtype=np.float64)
+
+        # --- Larry Williams (STP0003) ---
+        self.signal_lw = np.zeros(n, dtype=np.int8)
+        lw_cols = ['media_tendencia', 'media_sinal_low', 'media_sinal_high']
+        if all(col in self.data.columns for col in lw_cols):
+            tendencia = self.data['media_tendencia'].to_numpy(dtype=np.float64)
+            media_sinal_low = self.data['media_sinal_low'].to_numpy(dtype=np.float64)
+            media_sinal_high = self.data['media_sinal_high'].to_numpy(dtype=np.float64)
+
+            # Comparações com NaN resultam em False, mas o filtro explícito
+            # espelha o pd.isna da versão barra a barra
+            valido = ~(np.isnan(tendencia) | np.isnan(media_sinal_low) | np.isnan(media_sinal_high))
+            valido[:20] = False  # Precisa de dados suficientes
+
+            compra = valido & (close > tendencia) & (low < media_sinal_low)
+            venda = valido & ~compra & (close < tendencia) & (high > media_sinal_high)
+            self.signal_lw[compra] = 1
+            self.signal_lw[venda] = -1
+
+        # --- Bollinger Breakout ---
+        self.signal_bb = np.zeros(n, dtype=np.int8)
+        if 'bb_upper' in self.data.columns and 'bb_lower' in self.data.columns:
+            bb_upper = self.data['bb_upper'].to_numpy(dtype=np.float64)
+            bb_lower = self.data['bb_lower'].to_numpy(dtype=np.float64)
+
+            valido = ~(np.isnan(bb_upper) | np.isnan(bb_lower))
+            compra = valido & (close > bb_upper)
+            venda = valido & ~compra & (close < bb_lower)
+            self.signal_bb[compra] = 1
+            self.signal_bb[venda] = -1
+
+    def _precompute_spread_filter(self):
+        """
+        Sorteia o spread de todas as barras de uma vez (modelo de spread) e guarda
+        a máscara de entradas permitidas pelo filtro_spreadMaximoTicks.
+        """
+        filtro_spread_max_ticks = self.strategy.inputs.get('filtro_spreadMaximoTicks', 5)
+        self.spread_ok = self.spread_model.entry_mask(self.data, filtro_spread_max_ticks)
+
     def _initialize_strategy_variables(self):
         """Inicializa variáveis de estado da estratégia"""
         self.strategy_vars = self.strategy.variables.copy()
-        self.strategy_vars.update({
-            'ultimoDia': None,
-            'tradesHoje': 0,
-            'lossConsecutivo': 0,
-            'resultadoDiario': 0.0,
-            'posicaoAberta': False,
-            'bloqueadoMeta': False,
-            'bloqueadoLossConsec': False,
-            'primeiraBarraDefinida': False,
-            'maximaPrimeiraBarra': 0.0,
-            'minimaPrimeiraBarra': 999999.0
-        })
+        self.strategy_vars.update(INITIAL_STRATEGY_STATE)
+        # Cada execução parte do estado inicial (o engine pode ser reutilizado)
+        self.strategy_state = dict(INITIAL_STRATEGY_STATE)
         
         self.current_position = 0
-        self.trades = []
-        self.equity = []
+        self.trades = TradeLog()
+        # Buffer de equity pré-alocado (uma posição por barra) e PnL realizado acumulado
+        self.equity = np.zeros(len(self.data), dtype=np.float64)
+        self.realized_pnl = 0.0
+        self.track_equity = True
         self.current_trade = None
     
     def _calculate_larry_williams_signal(self, bar_idx: int) -> int:
         """
         Implementa Setup Larry Williams conforme STP0003 do catálogo
         Baseado no exemplo: STP0003_Trade_e_Acoes_Setup_Larry_Williams_Classico
+
+        Compra: Close > tendencia E Low < media_sinal_low
+        Venda: Close < tendencia E High > media_sinal_high
+        O sinal é pré-calculado em _precompute_signals.
         """
-        if bar_idx < 20:  # Precisa de dados suficientes
-            return 0
-            
-        try:
-            current_data = self.data.iloc[bar_idx]
-            
-            # Conforme STP0003: usa média da tendência e médias dos sinais
-            tendencia = current_data.get('media_tendencia')
-            media_sinal_low = current_data.get('media_sinal_low')  
-            media_sinal_high = current_data.get('media_sinal_high')
-            
-            if pd.isna(tendencia) or pd.isna(media_sinal_low) or pd.isna(media_sinal_high):
-                return 0
-                
-            close = current_data['close']
-            low = current_data['low']
-            high = current_data['high']
-            
-            # Sinal de compra: Close > tendencia E Low < media_sinal_low
-            if close > tendencia and low < media_sinal_low:
-                return 1
-            # Sinal de venda: Close < tendencia E High > media_sinal_high  
-            elif close < tendencia and high > media_sinal_high:
-                return -1
-            else:
-                return 0
-                
-        except (KeyError, IndexError):
-            return 0
+        return int(self.signal_lw[bar_idx])
     
     def _calculate_primeira_barra_signal(self, bar_idx: int) -> int:
         """
@@ -269,26 +442,10 @@ class BacktestEngine:
     def _calculate_bollinger_signal(self, bar_idx: int) -> int:
         """
         Implementa Bollinger Breakout conforme BollingerBreakout do catálogo
+        Rompimento das bandas: Close > bb_upper compra, Close < bb_lower vende.
+        O sinal é pré-calculado em _precompute_signals.
         """
-        try:
-            current_data = self.data.iloc[bar_idx]
-            close = current_data['close']
-            bb_upper = current_data.get('bb_upper')
-            bb_lower = current_data.get('bb_lower')
-            
-            if pd.isna(bb_upper) or pd.isna(bb_lower):
-                return 0
-            
-            # Rompimento das bandas (estratégia de breakout)
-            if close > bb_upper:
-                return 1
-            elif close < bb_lower:
-                return -1
-            else:
-                return 0
-                
-        except (KeyError, IndexError):
-            return 0
+        return int(self.signal_bb[bar_idx])
     
     def _execute_bar(self, bar_idx: int):
         """Executa a lógica da estratégia para uma barra, garantindo que o equity seja sempre registrado."""
@@ -322,8 +479,8 @@ class BacktestEngine:
             self._check_entry_conditions(bar_idx, current_data)
 
         # 4. Calcular e registrar o equity no final da barra
-        current_equity = self._calculate_current_equity(current_data)
-        self.equity.append(current_equity)
+        if self.track_equity:
+            self.equity[bar_idx] = self._calculate_current_equity(current_data)
     
     def _update_daily_controls(self, current_data):
         """Atualiza controles diários de risco"""
@@ -334,22 +491,32 @@ class BacktestEngine:
             self.strategy_state['tradesHoje'] = 0
             self.strategy_state['resultadoDiario'] = 0.0
             self.strategy_state['bloqueadoMeta'] = False
+            if self.emit_events:
+                self.events.emit(EVENT_DAILY_RESET, {'time': current_data.name, 'date': current_date})
             
         # Verificar limites diários
         lucro_max = self.strategy.risk_params.get('lucroMaximoDiario', 0)
         risco_max = self.strategy.risk_params.get('riscoMaximoDiario', 0)
+        bloqueado_antes = self.strategy_state['bloqueadoMeta']
         
         if lucro_max > 0 and self.strategy_state['resultadoDiario'] >= lucro_max:
             self.strategy_state['bloqueadoMeta'] = True
             
         if risco_max > 0 and self.strategy_state['resultadoDiario'] <= -risco_max:
             self.strategy_state['bloqueadoMeta'] = True
+
+        if self.emit_events and self.strategy_state['bloqueadoMeta'] and not bloqueado_antes:
+            self.events.emit(EVENT_BLOCK, {'time': current_data.name, 'reason': 'META_DIARIA',
+                                           'daily_result': self.strategy_state['resultadoDiario']})
     
     def _check_entry_conditions(self, bar_idx: int, current_data):
         """Verifica condições de entrada baseadas no orquestrador moderado"""
         # Atualizar estado de bloqueio por loss consecutivo
         max_loss_consec = self.strategy.risk_params.get('maxLossConsecutivo', 999)
         if self.strategy_state['lossConsecutivo'] >= max_loss_consec:
+            if self.emit_events and not self.strategy_state['bloqueadoLossConsec']:
+                self.events.emit(EVENT_BLOCK, {'time': current_data.name, 'reason': 'LOSS_CONSECUTIVO',
+                                               'loss_streak': self.strategy_state['lossConsecutivo']})
             self.strategy_state['bloqueadoLossConsec'] = True
 
         # Verificar bloqueios
@@ -377,15 +544,8 @@ class BacktestEngine:
             if not (time_inicio <= hora_atual < time_fim):
                 return # Fora da janela horária
 
-            # Implementar filtro de spread (conforme NTSL)
-            filtro_spread_max_ticks = self.strategy.inputs.get('filtro_spreadMaximoTicks', 5)
-
-            # Simular spread em ticks. Para que o filtro tenha efeito, o spread simulado
-            # precisa ocasionalmente exceder o filtro_spreadMaximoTicks.
-            # Usaremos um valor aleatório para simular a variabilidade do spread.
-            simulated_spread_in_ticks = random.uniform(0, filtro_spread_max_ticks + 2) # Varia entre 0 e filtro_spread_max_ticks + 2
-
-            if simulated_spread_in_ticks > filtro_spread_max_ticks:
+            # Filtro de spread (conforme NTSL): spread simulado pré-calculado por barra
+            if not self.spread_ok[bar_idx]:
                 return # Spread muito alto, não entra
             
         # Calcular sinais das estratégias internas  
@@ -485,7 +645,12 @@ class BacktestEngine:
         self.strategy_state['posicaoAberta'] = True
         self.strategy_state['tradesHoje'] += 1
         
-        print(f"Posição {direction} aberta em {current_data.name}: {entry_price:.2f}")
+        if self.emit_events:
+            self.events.emit(EVENT_ENTRY, {
+                'time': current_data.name, 'direction': direction, 'price': entry_price,
+                'quantity': abs(quantity), 'stop_loss': self.current_trade.stop_loss,
+                'take_profit': self.current_trade.take_profit, 'entry_type': entry_type
+            })
     
     def _check_exit_conditions(self, bar_idx: int, current_data):
         """Verifica todas as condições de saída: Stop, Gain, Breakeven, Trailing."""
@@ -495,6 +660,7 @@ class BacktestEngine:
         trade = self.current_trade
         atr = current_data.get('atr', 0)
         if atr == 0: return # Evitar divisão por zero ou stops inválidos
+        stop_at_open = trade.stop_loss
 
         # --- Lógica de Break Even ---
         if self.strategy.inputs.get('usarBreakEven', False) and trade.stop_loss < trade.entry_price:
@@ -520,27 +686,32 @@ class BacktestEngine:
         # A lógica NTSL com `ClosePosition()` envia uma ordem a mercado quando a condição é satisfeita.
         # Para simular isso em um backtest barra-a-barra, a execução ocorre no fechamento da barra
         # em que o stop/gain foi violado.
-        close_price = current_data['close']
         high_price = current_data['high']
         low_price = current_data['low']
 
+        # Com as barras de 1 minuto vale o stop da abertura da barra: break even e trailing
+        # usam a máxima e o fechamento da barra inteira e só passam a valer na próxima
+        stop_loss = stop_at_open if self.intrabar is not None else trade.stop_loss
+
         if trade.direction == 'LONG':
-            # Se o gain foi atingido na barra, fechamos no 'close' (simulação pessimista)
-            if trade.take_profit and high_price >= trade.take_profit:
-                self._close_position(bar_idx, "TAKE_PROFIT") # Preço será o 'close' da barra
-                return
-            # Se o stop foi atingido na barra, fechamos no 'close'
-            if trade.stop_loss and low_price <= trade.stop_loss:
-                self._close_position(bar_idx, "STOP_LOSS") # Preço será o 'close' da barra
-        
-        elif trade.direction == 'SHORT':
-            # Se o gain foi atingido na barra, fechamos no 'close'
-            if trade.take_profit and low_price <= trade.take_profit:
-                self._close_position(bar_idx, "TAKE_PROFIT") # Preço será o 'close' da barra
+            hit_gain = bool(trade.take_profit) and high_price >= trade.take_profit
+            hit_stop = bool(stop_loss) and low_price <= stop_loss
+        else:
+            hit_gain = bool(trade.take_profit) and low_price <= trade.take_profit
+            hit_stop = bool(stop_loss) and high_price >= stop_loss
+        if not (hit_gain or hit_stop):
+            return
+        trade.stop_loss = stop_loss  # Trade encerrado nesta barra: o stop ajustado não chegou a existir
+
+        # Com as barras de 1 minuto, o nível tocado primeiro é executado no próprio preço
+        if self.intrabar is not None:
+            touch = self.intrabar.first_touch(bar_idx, trade.direction, stop_loss, trade.take_profit)
+            if touch is not None:
+                self._close_position(bar_idx, touch[0], price=touch[1])
                 return
-            # Se o stop foi atingido na barra, fechamos no 'close'
-            if trade.stop_loss and high_price >= trade.stop_loss:
-                self._close_position(bar_idx, "STOP_LOSS") # Preço será o 'close' da barra
+
+        # Sem dados intrabarra, o gain tem prioridade e a execução é no 'close' da barra
+        self._close_position(bar_idx, "TAKE_PROFIT" if hit_gain else "STOP_LOSS")
     
     def _close_position(self, bar_idx: int, reason: str, price: Optional[float] = None):
         """Fecha posição atual, usando um preço específico se fornecido."""
@@ -565,13 +736,16 @@ class BacktestEngine:
         custo_operacao = float(self.strategy.inputs.get('custoPorContrato', 0.0))
         result -= custo_operacao
         
-        # Atualizar trade
-        self.current_trade.exit_time = current_data.name
-        self.current_trade.exit_price = exit_price
-        self.current_trade.result = result
-        self.current_trade.status = 'CLOSED'
+        # Atualizar trade e registrá-lo no log colunar
+        trade = self.current_trade
+        trade.exit_time = current_data.name
+        trade.exit_price = exit_price
+        trade.result = result
+        trade.status = 'CLOSED'
+        trade.exit_reason = reason
         
-        self.trades.append(self.current_trade)
+        self.trades.append(trade)
+        self.realized_pnl += result
         
         # Atualizar controles
         self.strategy_state['resultadoDiario'] += result
@@ -584,11 +758,15 @@ class BacktestEngine:
         self.strategy_state['posicaoAberta'] = False
         self.current_trade = None
         
-        print(f"Posição fechada em {current_data.name}: {exit_price} (Resultado: {result:.2f})")
+        if self.emit_events:
+            self.events.emit(EVENT_EXIT, {
+                'time': current_data.name, 'direction': trade.direction, 'price': exit_price,
+                'result': result, 'reason': reason
+            })
     
     def _calculate_current_equity(self, current_data) -> float:
-        """Calcula equity atual"""
-        equity = sum(trade.result for trade in self.trades if trade.result is not None)
+        """Calcula equity atual (PnL realizado acumulado + resultado da posição aberta, em dinheiro)"""
+        equity = self.realized_pnl
         
         # Adicionar resultado da posição aberta se houver
         if self.current_position != 0 and self.current_trade:
@@ -596,51 +774,17 @@ class BacktestEngine:
                 unrealized = (current_data['close'] - self.current_trade.entry_price) * self.current_trade.quantity
             else:
                 unrealized = (self.current_trade.entry_price - current_data['close']) * self.current_trade.quantity
-            equity += unrealized
+            # Mesma conversão de pontos do resultado realizado (ver _close_position)
+            equity += unrealized * float(self.strategy.inputs.get('pontosPorTick', 1.0))
             
         return equity
     
     def _calculate_metrics(self) -> Dict[str, float]:
-        """Calcula métricas de performance"""
-        if not self.trades:
-            return {}
-            
-        results = [t.result for t in self.trades if t.result is not None]
-        
-        if not results:
-            return {}
-            
-        winning_trades = [r for r in results if r > 0]
-        losing_trades = [r for r in results if r < 0]
-        
-        total_trades = len(results)
-        winning_count = len(winning_trades)
-        losing_count = len(losing_trades)
-        
-        gross_profit = sum(winning_trades) if winning_trades else 0
-        gross_loss = abs(sum(losing_trades)) if losing_trades else 0
-        
+        """Calcula métricas de performance (trades fechados + curva de equity, ver metrics.py)"""
         # O resultado líquido já tem os custos deduzidos de cada trade
-        net_profit = sum(results)
-        
-        # Calcular custos totais
+        results = self.trades.results
         custo_por_operacao = float(self.strategy.inputs.get('custoPorContrato', 0))
-        total_costs = custo_por_operacao * total_trades
-
-        win_rate = (winning_count / total_trades * 100) if total_trades > 0 else 0
-        profit_factor = (gross_profit / gross_loss) if gross_loss > 0 else float('inf') if gross_profit > 0 else 0
-        
-        return {
-            'net_profit': net_profit,
-            'gross_profit': gross_profit, 
-            'gross_loss': -gross_loss, # Mantido negativo para exibição
-            'total_costs': total_costs,
-            'profit_factor': profit_factor,
-            'total_trades': total_trades,
-            'winning_trades': winning_count,
-            'losing_trades': losing_count,
-            'win_rate': win_rate,
-            'avg_trade': net_profit / total_trades if total_trades > 0 else 0,
-            'avg_winner': sum(winning_trades) / len(winning_trades) if winning_trades else 0,
-            'avg_loser': sum(losing_trades) / len(losing_trades) if losing_trades else 0
-        }
\ No newline at end of file
+        metrics = trade_metrics(results, custo_por_operacao)
+        if metrics:
+            metrics.update(equity_metrics(self.equity, self.data.index, metrics['net_profit']))
+        return metrics
\ No newline at end of file
@@ -0,0 +1,277 @@
+"""
+Backtest em lote de todo o catálogo de automações.
+
+Descobre as estratégias em estrategias/automations e
+estrategias/exemplos/editaveis/automations, parseia cada arquivo uma única vez,
+carrega cada conjunto de dados uma única vez (compartilhado com os workers via
+memória compartilhada) e distribui os pares (estratégia, dados) em um pool de
+processos. Falhas de parse, de compilação ou de execução de uma estratégia são
+registradas no ranking e não interrompem o lote.
+
+O modo padrão é 'compiled': cada automação roda o próprio código NTSL (ver
+ntsl_compiler). Os modos 'standard' e 'fast' executam a lógica do orquestrador
+moderado embutida no engine, usando da automação apenas os inputs; servem para
+comparar variações do orquestrador, não automações diferentes. A coluna 'mode'
+do ranking indica como cada linha foi executada.
+
+Uso:
+    python -m backtest.catalog_batch --data backtest/dados/WINFUT_1min.csv,5 \\
+        --output resultados/catalogo/ranking.csv
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from .ntsl_parser import NTSLParser, NTSLStrategy
+from .backtest_engine import ENGINE_MODES, BacktestEngine
+from .indicator_cache import IndicatorCache
+from .spread_model import SWEEP_SEED, UniformSpreadModel
+from .ntsl_compiler import NTSLCompileError
+from .data_provider import DataProvider
+from .dataset_cache import DatasetCache
+from .optimizer import rank_results
+from .shared_data import SharedDataFrame, SharedFrameDescriptor, attach_shared_frame
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+
+# Diretórios de automações do catálogo (relativos à raiz do projeto)
+CATALOG_ROOTS = ('estrategias/automations', 'estrategias/exemplos/editaveis/automations')
+
+
+def discover_strategies(roots: Sequence[str] = CATALOG_ROOTS, base_dir: Path = BASE_DIR,
+                        pattern: str = '*.txt') -> List[Path]:
+    """Lista (recursivamente e em ordem) os arquivos NTSL das pastas de automações"""
+    files = []
+    for root in roots:
+        root_path = Path(root) if Path(root).is_absolute() else base_dir / root
+        if root_path.is_dir():
+            files.extend(sorted(root_path.rglob(pattern)))
+    return files
+
+
+def parse_data_spec(spec: str) -> Tuple[str, str]:
+    """Converte 'dados.csv[,tempo_grafico]' em (caminho, '5min')"""
+    path, _, timeframe = spec.partition(',')
+    timeframe = timeframe.strip() or '1min'
+    if timeframe.isdigit():
+        timeframe = f"{timeframe}min"
+    return path.strip(), timeframe
+
+
+# --- Estado do processo de trabalho (inicializado uma vez por processo) ---
+_worker_context: Dict[str, Any] = {}
+
+
+def _set_context(datasets: Dict[str, pd.DataFrame], strategies: Dict[str, NTSLStrategy],
+                 mode: str, seed: Optional[int]):
+    """Define os dados e as estratégias usados pelas execuções deste processo"""
+    _worker_context.update(
+        datasets=datasets,
+        strategies=strategies,
+        mode=mode,
+        seed=seed,
+        indicator_cache=IndicatorCache()
+    )
+
+
+def _init_worker(descriptors: Dict[str, SharedFrameDescriptor], *args):
+    """Conecta o worker aos conjuntos de dados compartilhados"""
+    _set_context({name: attach_shared_frame(d) for name, d in descriptors.items()}, *args)
+
+
+def _run_pair(task: Tuple[str, str]) -> Dict[str, Any]:
+    """Executa uma estratégia sobre um conjunto de dados (no worker)"""
+    strategy_key, dataset_name = task
+    ctx = _worker_context
+    data = ctx['datasets'][dataset_name]
+    strategy = ctx['strategies'][strategy_key]
+
+    start = time.perf_counter()
+    try:
+        engine = BacktestEngine(verbosity=0, indicator_cache=ctx['indicator_cache'],
+                                spread_model=UniformSpreadModel(ctx['seed']))
+        result = engine.run_backtest(strategy, data, dataset_name.split('@')[0],
+                                     dataset_name.split('@')[-1], mode=ctx['mode'], rebuild_equity=True)
+        row = {'status': 'ok', 'error': None}
+        row.update(result.metrics)
+    except NTSLCompileError as e:
+        row = {'status': 'compile_error', 'error': str(e)}
+    except Exception as e:
+        row = {'status': 'run_error', 'error': f"{type(e).__name__}: {e}"}
+    row['mode'] = ctx['mode']
+    row['run_s'] = time.perf_counter() - start
+    return row
+
+
+class CatalogBatchRunner:
+    """
+    Executa todas as automações do catálogo sobre um ou mais conjuntos de dados.
+    """
+
+    def __init__(self, data_specs: Sequence[Tuple[str, str]], mode: str = 'compiled',
+                 workers: Optional[int] = None, seed: Optional[int] = SWEEP_SEED,
+                 start_date: Optional[str] = None, end_date: Optional[str] = None):
+        """
+        Args:
+            data_specs: [(caminho_csv, tempo_grafico)] - cada um é carregado uma única vez
+            mode: Modo do engine; só 'compiled' executa o código de cada automação
+                  ('standard' e 'fast' rodam o orquestrador embutido no engine)
+            workers: Número de processos (padrão: todos os núcleos)
+            seed: Semente do modelo de spread (padrão: SWEEP_SEED, a mesma em todas as execuções;
+                  None sorteia um spread diferente a cada execução)
+            start_date / end_date: Filtro de período (YYYY-MM-DD)
+        """
+        if not data_specs:
+            raise ValueError("Informe ao menos um conjunto de dados")
+        self.data_specs = list(data_specs)
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed
+        self.start_date = start_date
+        self.end_date = end_date
+
+    def load_datasets(self) -> Dict[str, pd.DataFrame]:
+        """Carrega cada conjunto de dados uma única vez ('ativo@tempo_grafico' -> DataFrame)"""
+        # Períodos lêem só os pregões pedidos; o índice de pregões fica em disco entre execuções
+        provider = DataProvider(verbose=False, index_cache=DatasetCache())
+        datasets = {}
+        for path, timeframe in self.data_specs:
+            data = provider.get_data(symbol=path, start_date=self.start_date or '', end_date=self.end_date or '',
+                                     source='local_csv', target_interval=timeframe)
+            if self.start_date and self.end_date:
+                data = data[(data.index >= pd.to_datetime(self.start_date)) &
+                            (data.index <= pd.to_datetime(self.end_date))]
+            if data is None or data.empty:
+                raise ValueError(f"Nenhum dado carregado de {path}")
+            datasets[f"{Path(path).stem.split('_')[0]}@{timeframe}"] = data
+        return datasets
+
+    def run(self, strategy_paths: Sequence[Path], rank_by: str = 'net_profit') -> pd.DataFrame:
+        """
+        Parseia as estratégias, executa todos os pares e devolve o ranking consolidado.
+        """
+        parser = NTSLParser()
+        strategies: Dict[str, NTSLStrategy] = {}
+        parse_info: Dict[str, Dict[str, Any]] = {}
+        for path in strategy_paths:
+            key = str(path)
+            start = time.perf_counter()
+            try:
+                strategies[key] = parser.parse_file(key)
+                error = None
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            parse_info[key] = {'parse_s': time.perf_counter() - start, 'error': error}
+
+        datasets = self.load_datasets()
+        tasks = [(key, name) for key in strategies for name in datasets]
+        initargs = (strategies, self.mode, self.seed)
+
+        if self.workers <= 1 or len(tasks) <= 1:
+            _set_context(datasets, *initargs)
+            outcomes = [_run_pair(task) for task in tasks]
+            _worker_context.clear()
+        else:
+            chunksize = max(1, len(tasks) // (self.workers * 8))
+            with ExitStack() as stack:
+                shared = {name: stack.enter_context(SharedDataFrame(data)) for name, data in datasets.items()}
+                descriptors = {name: s.descriptor for name, s in shared.items()}
+                executor = stack.enter_context(ProcessPoolExecutor(
+                    max_workers=self.workers, initializer=_init_worker, initargs=(descriptors, *initargs)))
+                outcomes = list(executor.map(_run_pair, tasks, chunksize=chunksize))
+
+        rows = []
+        for (key, dataset_name), outcome in zip(tasks, outcomes):
+            rows.append({**self._describe(key, dataset_name, parse_info[key]), **outcome})
+        for key, info in parse_info.items():
+            if info['error'] is not None:
+                rows.append({**self._describe(key, None, info), 'status': 'parse_error', 'error': info['error']})
+
+        return rank_results(pd.DataFrame(rows), rank_by)
+
+    @staticmethod
+    def _describe(key: str, dataset_name: Optional[str], info: Dict[str, Any]) -> Dict[str, Any]:
+        path = Path(key)
+        try:
+            relative = path.relative_to(BASE_DIR)
+        except ValueError:
+            relative = path
+        return {
+            'strategy': path.stem,
+            'path': relative.as_posix(),
+            'dataset': dataset_name,
+            'parse_s': info['parse_s']
+        }
+
+
+def save_leaderboard(leaderboard: pd.DataFrame, output: str):
+    """Salva o ranking em CSV ou Parquet (pela extensão do arquivo)"""
+    output_path = Path(output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if output_path.suffix.lower() == '.parquet':
+        leaderboard.to_parquet(output_path, index=False)
+    else:
+        leaderboard.to_csv(output_path, index=False)
+
+
+def main():
+    """Função principal (CLI)"""
+    parser = argparse.ArgumentParser(description='Backtest em lote de todas as automações do catálogo')
+    parser.add_argument('--data', '-d', action='append', required=True,
+                        help='Conjunto de dados: arquivo.csv[,tempo_grafico] (repetível)')
+    parser.add_argument('--root', action='append', help='Pasta de automações (padrão: pastas do catálogo)')
+    parser.add_argument('--pattern', default='*.txt', help='Filtro de nome dos arquivos (ex: *orquestrador*)')
+    parser.add_argument('--start-date', help='Data início (YYYY-MM-DD)')
+    parser.add_argument('--end-date', help='Data fim (YYYY-MM-DD)')
+    parser.add_argument('--workers', '-w', type=int, help='Número de processos (padrão: todos os núcleos)')
+    parser.add_argument('--mode', '-m', choices=ENGINE_MODES, default='compiled',
+                        help="Modo do engine (standard e fast rodam o orquestrador embutido, não o código de cada automação)")
+    parser.add_argument('--rank-by', default='net_profit', help='Métrica para ordenação')
+    parser.add_argument('--seed', type=int, default=SWEEP_SEED,
+                        help='Semente do modelo de spread (padrão: %(default)s)')
+    parser.add_argument('--top', type=int, default=20, help='Quantidade de linhas exibidas')
+    parser.add_argument('--output', '-o', help='Arquivo do ranking (.csv ou .parquet)')
+
+    args = parser.parse_args()
+
+    strategy_paths = discover_strategies(args.root or CATALOG_ROOTS, pattern=args.pattern)
+    runner = CatalogBatchRunner([parse_data_spec(spec) for spec in args.data], mode=args.mode,
+                                workers=args.workers, seed=args.seed,
+                                start_date=args.start_date, end_date=args.end_date)
+
+    print(f"Catálogo: {len(strategy_paths)} automações x {len(runner.data_specs)} conjuntos de dados "
+          f"em {runner.workers} processos (modo {runner.mode})")
+    if runner.mode != 'compiled':
+        print("AVISO: neste modo todas as automações rodam o orquestrador embutido no engine (só os inputs variam)")
+    start = time.perf_counter()
+    leaderboard = runner.run(strategy_paths, rank_by=args.rank_by)
+    print(f"Concluído em {time.perf_counter() - start:.1f}s\n")
+
+    status = leaderboard['status'].value_counts()
+    print("  ".join(f"{name}: {count}" for name, count in status.items()) + "\n")
+
+    display_cols = ['rank', 'strategy', 'dataset'] + [
+        c for c in ['net_profit', 'profit_factor', 'win_rate', 'total_trades', 'run_s'] if c in leaderboard.columns]
+    with pd.option_context('display.width', 200, 'display.max_columns', 50):
+        print(leaderboard[leaderboard['status'] == 'ok'][display_cols].head(args.top).to_string(index=False))
+
+    failures = leaderboard[leaderboard['status'] != 'ok']
+    if not failures.empty:
+        print(f"\n{len(failures)} falhas:")
+        for row in failures.itertuples():
+            print(f"  {row.path} [{row.status}]: {row.error}")
+
+    if args.output:
+        save_leaderboard(leaderboard, args.output)
+        print(f"\nRanking salvo em: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
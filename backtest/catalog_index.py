@@ -0,0 +1,464 @@
+"""
+Índice do catálogo de estratégias NTSL (estrategias/ + docs/catalog.md).
+
+Para cada arquivo em estrategias/ o índice guarda os inputs com valores padrão,
+as variáveis declaradas, as funções do usuário, as funções/séries NTSL usadas
+(tudo o que o código usa sem declarar) e o tipo: automação (envia ordens) ou
+indicador. Os arquivos listados em docs/catalog.md recebem também o título, as
+tags e a descrição do catálogo.
+
+O índice fica em disco (JSON) e é atualizado de forma incremental: um arquivo
+com mesmo tamanho e mtime não é lido; com mtime alterado, só é reprocessado se
+o hash do conteúdo mudou. Consultas são feitas sobre conjuntos em memória.
+
+Uso:
+    python -m backtest.catalog_index --uses BollingerBands AvgTrueRange --type automation
+    python -m backtest.catalog_index --input periodo --tag '#day-trade'
+    python -m backtest.catalog_index --show estrategias/automations/orquestrador_moderado_1.txt
+    python -m backtest.catalog_index --stats
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+from .ntsl_ast import (AND_WORDS, FALSE_WORDS, NOT_WORDS, OR_WORDS, RESERVED, SECTION_WORDS, TO_WORDS,
+                       TRUE_WORDS, NTSLSyntaxError, ParseCache, read_source, tokenize)
+from .ntsl_parser import NTSLParser
+
+
+BASE_DIR = Path(__file__).parent.parent.resolve()
+DEFAULT_INDEX_PATH = Path(__file__).parent / ".cache" / "catalog" / "index.json"
+DEFAULT_ROOTS = ('estrategias',)
+DEFAULT_CATALOG = 'docs/catalog.md'
+INDEX_FORMAT_VERSION = 1
+
+FILE_KINDS = ('automation', 'indicator')
+
+# Funções que enviam ordens: o arquivo que usa alguma delas é uma automação
+ORDER_WORDS = {
+    'buyatmarket', 'sellshortatmarket', 'buytocoveratmarket', 'selltocoveratmarket',
+    'closeposition', 'reverseposition', 'buystop', 'buylimit', 'sellshortstop',
+    'sellshortlimit', 'buytocoverstop', 'buytocoverlimit', 'selltocoverstop', 'selltocoverlimit',
+}
+
+# Nomes que não são funções/séries NTSL: palavras-chave, tipos e o retorno de função
+NOT_BUILTIN = (RESERVED | SECTION_WORDS | TRUE_WORDS | FALSE_WORDS | AND_WORDS | set(OR_WORDS)
+               | NOT_WORDS | TO_WORDS | {'integer', 'float', 'real', 'boolean', 'string', 'result', 'exit'})
+
+_NAME_RE = re.compile(r'[^\W\d]\w*')
+_CATALOG_ENTRY_RE = re.compile(r'^- \*\*\[([^\]]+)\]\(([^)]+)\)\*\*(.*)$')
+_TAG_RE = re.compile(r'`(#[\w-]+)`')
+
+
+class CatalogIndex:
+    """Índice persistente e incremental dos arquivos NTSL do catálogo"""
+
+    def __init__(self, index_path: Optional[str] = None, roots: Sequence[str] = DEFAULT_ROOTS,
+                 catalog: Optional[str] = DEFAULT_CATALOG, base_dir: Path = BASE_DIR,
+                 parse_cache: Optional[ParseCache] = None):
+        """
+        Args:
+            index_path: Arquivo JSON do índice (padrão: backtest/.cache/catalog/index.json)
+            roots: Diretórios varridos (relativos a base_dir)
+            catalog: docs/catalog.md (relativo a base_dir); None para não usar o catálogo
+            base_dir: Raiz do projeto; os caminhos no índice são relativos a ela
+            parse_cache: Cache de ASTs usado ao reprocessar arquivos alterados
+        """
+        self.index_path = Path(index_path) if index_path else DEFAULT_INDEX_PATH
+        self.roots = tuple(roots)
+        self.catalog = catalog
+        self.base_dir = Path(base_dir)
+        self.parser = NTSLParser(cache=parse_cache)
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self.catalog_state: Optional[Dict[str, Any]] = None
+        self._lookup: Optional[Dict[str, Dict[str, Set[str]]]] = None
+        self._load()
+
+    # ------------------------------------------------------------
+    # Persistência e atualização incremental
+    # ------------------------------------------------------------
+
+    def _load(self):
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        if stored.get('version') != INDEX_FORMAT_VERSION or stored.get('roots') != list(self.roots):
+            return
+        self.records = stored['records']
+        self.catalog_state = stored.get('catalog')
+
+    def save(self):
+        """Gravação atômica (arquivo temporário + os.replace)"""
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_name(f"{self.index_path.name}.tmp-{os.getpid()}")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_FORMAT_VERSION, 'roots': list(self.roots),
+                       'catalog': self.catalog_state, 'records': self.records},
+                      f, ensure_ascii=False, default=str)
+        os.replace(tmp, self.index_path)
+
+    def update(self, full: bool = False) -> Dict[str, int]:
+        """
+        Sincroniza o índice com os arquivos em disco e grava se algo mudou.
+
+        Args:
+            full: Se True, reprocessa todos os arquivos
+
+        Returns:
+            Contagem de arquivos novos, alterados, inalterados e removidos
+        """
+        stats = {'new': 0, 'changed': 0, 'unchanged': 0, 'removed': 0}
+        dirty = False
+        seen = set()
+        for path in self._files():
+            key = path.relative_to(self.base_dir).as_posix()
+            seen.add(key)
+            stat = path.stat()
+            record = None if full else self.records.get(key)
+            if record is not None and record['mtime_ns'] == stat.st_mtime_ns and record['size'] == stat.st_size:
+                stats['unchanged'] += 1
+                continue
+
+            with open(path, 'rb') as f:
+                raw = f.read()
+            digest = hashlib.sha1(raw).hexdigest()
+            if record is not None and record['sha1'] == digest:
+                # Só o mtime mudou (checkout, cópia): conteúdo já indexado
+                stats['unchanged'] += 1
+            else:
+                stats['changed' if key in self.records else 'new'] += 1
+                record = self._describe(key, raw)
+                record['catalog'] = None
+                record['sha1'] = digest
+            record['mtime_ns'] = stat.st_mtime_ns
+            record['size'] = stat.st_size
+            self.records[key] = record
+            dirty = True
+
+        for key in set(self.records) - seen:
+            del self.records[key]
+            stats['removed'] += 1
+            dirty = True
+
+        if self._update_catalog(force=full or stats['new'] + stats['changed'] > 0) or dirty:
+            self._lookup = None
+            self.save()
+        return stats
+
+    def _files(self) -> List[Path]:
+        files = []
+        for root in self.roots:
+            root_path = self.base_dir / root
+            if root_path.is_dir():
+                files.extend(path for path in sorted(root_path.rglob('*')) if path.is_file())
+        return files
+
+    def _update_catalog(self, force: bool) -> bool:
+        """Reaplica título/tags/descrição de docs/catalog.md se ele mudou (ou se force)"""
+        path = self.base_dir / self.catalog if self.catalog else None
+        if path is None or not path.is_file():
+            changed = self.catalog_state is not None
+            self.catalog_state = None
+            if changed:
+                for record in self.records.values():
+                    record['catalog'] = None
+            return changed
+
+        stat = path.stat()
+        state = self.catalog_state or {}
+        if not force and state.get('mtime_ns') == stat.st_mtime_ns and state.get('size') == stat.st_size:
+            return False
+        with open(path, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha1(raw).hexdigest()
+        if not force and state.get('sha1') == digest:
+            self.catalog_state = dict(state, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            return True
+
+        entries = parse_catalog(raw.decode('utf-8', 'replace'))
+        for key, record in self.records.items():
+            record['catalog'] = entries.get(key)
+        self.catalog_state = {
+            'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha1': digest,
+            'missing': sorted(key for key in entries
+                              if key not in self.records and any(key.startswith(f"{root}/") for root in self.roots)),
+        }
+        return True
+
+    # ------------------------------------------------------------
+    # Extração
+    # ------------------------------------------------------------
+
+    def _describe(self, key: str, raw: bytes) -> Dict[str, Any]:
+        """Inputs, variáveis, funções, funções NTSL usadas e tipo de um arquivo"""
+        record = {
+            'path': key,
+            'category': Path(key).parent.name,
+            'kind': None,
+            'parsed': False,
+            'error': None,
+            'inputs': {},
+            'variables': {},
+            'functions': [],
+            'builtins': [],
+        }
+        if b'\0' in raw[:4096]:
+            record['error'] = "arquivo binário"
+            return record
+
+        source = read_source(str(self.base_dir / key))
+        strategy = self.parser.parse_content(source)
+        program = strategy.program
+        record['parsed'] = program is not None
+        record['inputs'] = strategy.inputs
+
+        declared = {name.lower() for name in strategy.inputs}
+        if program is not None:
+            variables = {name: decl.type_name for decl in program.variables for name in decl.names}
+            functions = [function.name for function in program.functions]
+            declared.update(decl.name.lower() for decl in program.constants)
+            for function in program.functions:
+                declared.update(name.lower() for decl in function.params + function.variables for name in decl.names)
+        else:
+            variables = {name: None for name in strategy.variables}
+            functions = list(strategy.functions)
+            record['error'] = "fora da gramática (seções extraídas por regex)"
+        declared.update(name.lower() for name in variables)
+        declared.update(name.lower() for name in functions)
+        record['variables'] = variables
+        record['functions'] = functions
+
+        # Funções/séries NTSL: nomes usados e não declarados (grafia da primeira ocorrência)
+        builtins = {}
+        for name in _names(source, self.parser):
+            lowered = name.lower()
+            if lowered not in declared and lowered not in NOT_BUILTIN and lowered not in builtins:
+                builtins[lowered] = name
+        record['builtins'] = sorted(builtins.values(), key=str.lower)
+        record['kind'] = 'automation' if ORDER_WORDS & builtins.keys() else 'indicator'
+        return record
+
+    # ------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------
+
+    def _sets(self) -> Dict[str, Dict[str, Set[str]]]:
+        """Índices invertidos (nome em minúsculas -> caminhos), montados na primeira consulta"""
+        if self._lookup is None:
+            lookup = {field: {} for field in ('builtins', 'inputs', 'functions', 'variables', 'tags', 'kind')}
+            for key, record in self.records.items():
+                catalog = record.get('catalog') or {}
+                values = {
+                    'builtins': record['builtins'],
+                    'inputs': record['inputs'],
+                    'functions': record['functions'],
+                    'variables': record['variables'],
+                    'tags': catalog.get('tags', []),
+                    'kind': [record['kind']] if record['kind'] else [],
+                }
+                for field, names in values.items():
+                    for name in names:
+                        lookup[field].setdefault(name.lower(), set()).add(key)
+            self._lookup = lookup
+        return self._lookup
+
+    def query(self, uses: Iterable[str] = (), kind: Optional[str] = None, inputs: Iterable[str] = (),
+              functions: Iterable[str] = (), variables: Iterable[str] = (), tags: Iterable[str] = (),
+              name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Arquivos que atendem a todos os critérios (nomes sem diferenciar maiúsculas).
+
+        Args:
+            uses: Funções/séries NTSL usadas (ex.: ['BollingerBands', 'AvgTrueRange'])
+            kind: 'automation' ou 'indicator'
+            inputs: Nomes de inputs declarados
+            functions: Nomes de funções do usuário
+            variables: Nomes de variáveis declaradas
+            tags: Tags do catálogo (com ou sem '#')
+            name: Trecho do caminho ou do título no catálogo
+
+        Returns:
+            Registros em ordem de caminho
+        """
+        if kind is not None and kind not in FILE_KINDS:
+            raise ValueError(f"Tipo de arquivo inválido: {kind}. Disponíveis: {FILE_KINDS}")
+        lookup = self._sets()
+        criteria = [('builtins', uses), ('inputs', inputs), ('functions', functions),
+                    ('variables', variables), ('kind', [kind] if kind else []),
+                    ('tags', [tag if tag.startswith('#') else f"#{tag}" for tag in tags])]
+
+        selected = None
+        for field, names in criteria:
+            for value in names:
+                matches = lookup[field].get(value.lower(), set())
+                selected = set(matches) if selected is None else selected & matches
+        keys = self.records.keys() if selected is None else selected
+
+        if name:
+            needle = name.lower()
+            keys = [key for key in keys
+                    if needle in key.lower() or needle in ((self.records[key].get('catalog') or {}).get('title') or '').lower()]
+        return [self.records[key] for key in sorted(keys)]
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        """Registro de um arquivo (caminho relativo à raiz do projeto ou absoluto)"""
+        candidate = Path(path)
+        if candidate.is_absolute():
+            try:
+                path = candidate.resolve().relative_to(self.base_dir.resolve()).as_posix()
+            except ValueError:
+                return None
+        return self.records.get(Path(path).as_posix())
+
+    def usage(self, kind: Optional[str] = None) -> List[tuple]:
+        """Funções/séries NTSL por número de arquivos que as usam (mais usadas primeiro)"""
+        counts = {}
+        for record in self.records.values():
+            if kind is None or record['kind'] == kind:
+                for name in record['builtins']:
+                    key = name.lower()
+                    spelling, count = counts.get(key, (name, 0))
+                    counts[key] = (spelling, count + 1)
+        return sorted(counts.values(), key=lambda item: (-item[1], item[0].lower()))
+
+
+def _names(source: str, parser: NTSLParser) -> List[str]:
+    """Identificadores do código, sem comentários e textos"""
+    try:
+        return [token.text for token in tokenize(source) if token.kind == 'name']
+    except NTSLSyntaxError:
+        return _NAME_RE.findall(re.sub(r'"[^"\n]*"|\'[^\'\n]*\'', ' ', parser._remove_comments(source)))
+
+
+def parse_catalog(text: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Entradas de docs/catalog.md por caminho do arquivo.
+
+    Cada entrada é '- **[Título](caminho)** `#tag` ...' seguida das linhas de
+    descrição (indentadas). Um arquivo citado mais de uma vez acumula as tags; a
+    seção é a do título '###' em que a entrada aparece com descrição.
+    """
+    entries = {}
+    section = None
+    current = None  # Entrada cuja descrição está sendo lida
+    for line in text.splitlines():
+        match = _CATALOG_ENTRY_RE.match(line)
+        if match:
+            title, link, rest = match.groups()
+            key = Path(link.strip().replace('estratégias/', 'estrategias/')).as_posix()
+            entry = entries.setdefault(key, {'title': title, 'tags': [], 'description': '', 'section': None})
+            entry['tags'].extend(tag for tag in dict.fromkeys(_TAG_RE.findall(rest)) if tag not in entry['tags'])
+            current = entry if not entry['description'] else None
+            if current is not None:
+                current['section'] = section
+        elif line.startswith('### '):
+            section = line[4:].strip()
+            current = None
+        elif current is not None and line.startswith(' ') and line.strip():
+            current['description'] = f"{current['description']}\n{line.strip()}".lstrip('\n')
+        else:
+            current = None
+    return entries
+
+
+# ================================================================
+# CLI
+# ================================================================
+
+def _print_record(record: Dict[str, Any], verbose: bool = False):
+    catalog = record.get('catalog') or {}
+    tags = ' '.join(catalog.get('tags', []))
+    kind = {'automation': 'automação', 'indicator': 'indicador'}.get(record['kind'], '-')
+    print(f"{record['path']}  [{kind}]{'  ' + tags if tags else ''}")
+    if not verbose:
+        return
+    if catalog.get('title'):
+        print(f"   Catálogo: {catalog['title']}" + (f" ({catalog['section']})" if catalog.get('section') else ''))
+    if catalog.get('description'):
+        for line in catalog['description'].splitlines():
+            print(f"      {line}")
+    if record['error']:
+        print(f"   Observação: {record['error']}")
+    inputs = ', '.join(f"{name}={value!r}" for name, value in record['inputs'].items())
+    print(f"   Inputs: {inputs or '-'}")
+    variables = ', '.join(f"{name}: {type_name}" if type_name else name for name, type_name in record['variables'].items())
+    print(f"   Variáveis: {variables or '-'}")
+    print(f"   Funções: {', '.join(record['functions']) or '-'}")
+    print(f"   Funções NTSL: {', '.join(record['builtins']) or '-'}")
+
+
+def main():
+    """CLI: atualiza o índice e consulta o catálogo"""
+    parser = argparse.ArgumentParser(description='Índice do catálogo de estratégias NTSL')
+    parser.add_argument('--uses', nargs='+', default=[], metavar='NOME',
+                        help='Funções/séries NTSL usadas (todas), ex.: BollingerBands AvgTrueRange')
+    parser.add_argument('--type', choices=FILE_KINDS, help='Tipo do arquivo')
+    parser.add_argument('--input', nargs='+', default=[], metavar='NOME', help='Inputs declarados')
+    parser.add_argument('--function', nargs='+', default=[], metavar='NOME', help='Funções do usuário')
+    parser.add_argument('--var', nargs='+', default=[], metavar='NOME', help='Variáveis declaradas')
+    parser.add_argument('--tag', nargs='+', default=[], metavar='TAG', help='Tags do catálogo (ex.: day-trade)')
+    parser.add_argument('--name', help='Trecho do caminho ou do título no catálogo')
+    parser.add_argument('--show', nargs='+', metavar='ARQUIVO', help='Mostra o registro completo dos arquivos')
+    parser.add_argument('--details', action='store_true', help='Mostra o registro completo de cada resultado')
+    parser.add_argument('--json', action='store_true', help='Resultados em JSON')
+    parser.add_argument('--stats', action='store_true', help='Resumo do índice e funções NTSL mais usadas')
+    parser.add_argument('--rebuild', action='store_true', help='Reprocessa todos os arquivos')
+    parser.add_argument('--index', help='Arquivo do índice (padrão: backtest/.cache/catalog/index.json)')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = CatalogIndex(args.index)
+    update = index.update(full=args.rebuild)
+    elapsed = time.perf_counter() - started
+    if update['new'] + update['changed'] + update['removed'] > 0 or args.rebuild or args.stats:
+        print(f"Índice: {len(index.records)} arquivo(s); {update['new']} novo(s), {update['changed']} alterado(s), "
+              f"{update['removed']} removido(s) em {elapsed * 1000:.0f} ms")
+
+    if args.show:
+        for path in args.show:
+            record = index.get(path)
+            if record is None:
+                print(f"{path}: não está no índice")
+            elif args.json:
+                print(json.dumps(record, ensure_ascii=False, indent=2, default=str))
+            else:
+                _print_record(record, verbose=True)
+        return
+
+    if args.stats:
+        records = list(index.records.values())
+        for kind, label in (('automation', 'Automações'), ('indicator', 'Indicadores')):
+            print(f"   {label}: {sum(record['kind'] == kind for record in records)}")
+        print(f"   Fora da gramática: {sum(not record['parsed'] and record['kind'] is not None for record in records)}")
+        print(f"   Binários: {sum(record['kind'] is None for record in records)}")
+        print(f"   No catálogo: {sum(record.get('catalog') is not None for record in records)}")
+        missing = (index.catalog_state or {}).get('missing', [])
+        if missing:
+            print(f"   Links do catálogo sem arquivo: {len(missing)}")
+        print("\nFunções NTSL mais usadas pelas automações:")
+        for name, count in index.usage('automation')[:20]:
+            print(f"   {name}: {count} arquivo(s)")
+        return
+
+    started = time.perf_counter()
+    results = index.query(uses=args.uses, kind=args.type, inputs=args.input, functions=args.function,
+                          variables=args.var, tags=args.tag, name=args.name)
+    elapsed = time.perf_counter() - started
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2, default=str))
+        return
+    for record in results:
+        _print_record(record, verbose=args.details)
+    print(f"\n{len(results)} arquivo(s) em {elapsed * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,16 +13,30 @@ from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Optional 
 from .ntsl_parser import NTSLParser
-from .backtest_engine import BacktestEngine
+from .backtest_engine import ENGINE_MODES, BacktestEngine
 from .data_provider import DataProvider
+from .dataset_cache import DatasetCache
+from .yahoo_cache import YahooCache
+from .metrics import daily_pnl, weekday_pnl
+from .ntsl_ast import ParseCache
+from .events import EventSink, JsonlEventSink, ConsoleEventSink, TeeEventSink
+from .spread_model import SpreadModel, SPREAD_MODELS, create_spread_model
 
 class ConsoleRunner:
     """Runner principal para execução via console"""
     
-    def __init__(self):
-        self.parser = NTSLParser()
+    def __init__(self, use_cache: bool = True, offline: bool = False):
+        """
+        Args:
+            use_cache: Reaproveita o cache colunar dos CSVs já lidos (ver dataset_cache),
+                       as ASTs das estratégias já parseadas (ver ntsl_ast) e os downloads
+                       do Yahoo Finance (ver yahoo_cache)
+            offline: Dados do Yahoo Finance só do cache, sem acessar a rede
+        """
+        self.parser = NTSLParser(cache=ParseCache() if use_cache else None)
         self.engine = BacktestEngine()
-        self.data_provider = DataProvider()
+        self.data_provider = DataProvider(cache=DatasetCache() if use_cache else None,
+                                          yahoo_cache=YahooCache(offline=offline) if use_cache or offline else None)
         # Definir diretórios base do projeto
         self.base_dir = Path(__file__).parent.parent.resolve()
         self.strategies_dir = self.base_dir / "estrategias"
@@ -81,34 +95,77 @@ class ConsoleRunner:
             traceback.print_exc()
     
     def run_batch(self, strategy_path: str, data_path: str, start_date: str = None, 
-                  end_date: str = None, output_dir: str = None, timeframe: Optional[str] = None):
-        """Executa backtest em modo batch (não-interativo)"""
+                  end_date: str = None, output_dir: str = None, timeframe: Optional[str] = None,
+                  mode: str = 'standard', verbosity: int = 1, event_sink: Optional[EventSink] = None,
+                  spread_model: Optional[SpreadModel] = None, intrabar: bool = False, source: str = 'local_csv'):
+        """
+        Executa backtest em modo batch (não-interativo)
+
+        Args:
+            verbosity: 0 = silencioso, 1 = resumo e trades, 2 = diagnóstico completo
+            event_sink: Destino opcional dos eventos do engine (ex: JsonlEventSink)
+            spread_model: Modelo de spread do filtro de entrada (padrão: uniforme sem semente)
+            intrabar: Executa stop e alvo no preço do nível, usando as barras de 1 minuto
+                      do CSV para decidir qual foi tocado primeiro
+            source: 'local_csv' (data_path é o CSV) ou 'yahoo' (data_path é o símbolo,
+                    start_date e end_date obrigatórios)
+        """
+        self.engine.configure_output(verbosity, event_sink)
+        if spread_model is not None:
+            self.engine.spread_model = spread_model
+        self.data_provider.verbose = verbosity >= 1
         
         try:
-            print(f"MODO BATCH - Executando {strategy_path}")
-            asset_name = Path(data_path).stem.split('_')[0]
+            if verbosity >= 1:
+                print(f"MODO BATCH - Executando {strategy_path}")
             timeframe_str = f"{timeframe}min" if timeframe else "1min"
 
             # Carregar estratégia
             strategy = self.parser.parse_file(strategy_path)
             
-            # Carregar e reamostrar dados
-            data = self.data_provider.get_data(
-                symbol=data_path, 
-                start_date=start_date or '',
-                end_date=end_date or '',
-                source='local_csv',
-                target_interval=timeframe_str
-            )
-            
-            # Filtrar período se especificado
-            if start_date and end_date:
-                start = pd.to_datetime(start_date)
-                end = pd.to_datetime(end_date)
-                data = data[(data.index >= start) & (data.index <= end)]
+            if source == 'yahoo':
+                if not (start_date and end_date):
+                    raise ValueError("Dados do Yahoo Finance exigem --start-date e --end-date")
+                asset_name = data_path
+                # Barras já no tempo gráfico e no período [start_date, end_date) pedidos
+                data = self.data_provider.get_data(data_path, start_date, end_date,
+                                                   interval=f"{timeframe or 1}m", source='yahoo')
+                intrabar_data = None
+                if intrabar:
+                    intrabar_data = self.data_provider.get_data(data_path, start_date, end_date,
+                                                                interval='1m', source='yahoo')
+            else:
+                asset_name = Path(data_path).stem.split('_')[0]
+
+                # Carregar e reamostrar dados
+                data = self.data_provider.get_data(
+                    symbol=data_path, 
+                    start_date=start_date or '',
+                    end_date=end_date or '',
+                    source='local_csv',
+                    target_interval=timeframe_str
+                )
+                
+                # Barras de 1 minuto para a execução intrabarra
+                intrabar_data = None
+                if intrabar:
+                    intrabar_data = self.data_provider.get_data(
+                        symbol=data_path,
+                        start_date=start_date or '',
+                        end_date=end_date or '',
+                        source='local_csv',
+                        target_interval='1min'
+                    )
+                
+                # Filtrar período se especificado
+                if start_date and end_date:
+                    start = pd.to_datetime(start_date)
+                    end = pd.to_datetime(end_date)
+                    data = data[(data.index >= start) & (data.index <= end)]
             
             # Executar backtest
-            result = self.engine.run_backtest(strategy, data, asset=asset_name, timeframe=timeframe_str)
+            result = self.engine.run_backtest(strategy, data, asset=asset_name, timeframe=timeframe_str, mode=mode,
+                                              intrabar_data=intrabar_data)
             
             # Exportar resultados
             if output_dir and result:
@@ -126,7 +183,7 @@ class ConsoleRunner:
                 # self._export_trades_csv(result, filename_base, csv_dir)
                 # self._export_equity_chart(result, filename_base, charts_dir)
 
-            if result:
+            if result and verbosity >= 1:
                 self._display_results(result)
             
             return result
@@ -136,7 +193,12 @@ class ConsoleRunner:
             import traceback
             traceback.print_exc()
             return None
-    
+        finally:
+            if event_sink is not None:
+                event_sink.close()
+                # Não deixar o engine apontando para um destino já fechado
+                self.engine.configure_output(verbosity, None)
+
     def _get_strategy_path(self) -> str:
         """Solicita caminho da estratégia com seleção interativa"""
         print(f"\nSELEÇÃO DE ESTRATÉGIA NTSL")
@@ -429,6 +491,20 @@ class ConsoleRunner:
         print(f"   Operações Perdedoras: {m['losing_trades']}")
         print(f"   Média por Trade: R$ {m['avg_trade']:.2f}")
         print(f"   Média Ganho / Média Perda: {abs(m['avg_winner']/m['avg_loser']) if m['avg_loser'] != 0 else 'inf':.2f}")
+        print(f"   Expectativa por Trade: R$ {m['expectancy']:.2f}")
+        print(f"   Maior Sequência: {m['max_consecutive_wins']} ganhos / {m['max_consecutive_losses']} perdas")
+
+        # --- Risco (curva de equity) ---
+        print(f"\n>> Risco")
+        print(f"   Drawdown Máximo: R$ {m['max_drawdown']:.2f} "
+              f"({m['max_drawdown_bars']} barras, {m['max_drawdown_days']:.1f} dias)")
+        print(f"   Fator de Recuperação: {m['recovery_factor']:.2f}")
+        print(f"   Sharpe / Sortino (diário, anualizado): {m['sharpe_ratio']:.2f} / {m['sortino_ratio']:.2f}")
+        print(f"   Pregões: {m['positive_days']} positivos / {m['negative_days']} negativos de {m['trading_days']} "
+              f"(melhor R$ {m['best_day']:.2f}, pior R$ {m['worst_day']:.2f})")
+        print(f"   Resultado por Dia da Semana:")
+        for weekday, row in weekday_pnl(result.equity_curve).iterrows():
+            print(f"      {weekday}: R$ {row['pnl']:.2f} (média R$ {row['avg_pnl']:.2f} em {int(row['days'])} pregões)")
         
         # --- Lista de Trades ---
         if len(result.trades) > 0:
@@ -502,8 +578,12 @@ class ConsoleRunner:
                 
                 # Trades
                 if result.trades:
-                    trades_df = pd.DataFrame([t.__dict__ for t in result.trades])
+                    trades_df = result.trades.to_frame()
                     trades_df.to_excel(writer, sheet_name='Trades', index=False)
+
+                # Resultado por pregão e por dia da semana
+                daily_pnl(result.equity_curve).to_frame().to_excel(writer, sheet_name='Por Dia', index_label='data')
+                weekday_pnl(result.equity_curve).to_excel(writer, sheet_name='Dia da Semana')
             
             print(f"Relatório Excel salvo em: {filepath.relative_to(self.base_dir)}")
             
@@ -514,7 +594,7 @@ class ConsoleRunner:
         """Exporta lista de trades em CSV"""
         try:
             filepath = output_dir / f"{filename_base}.csv"
-            trades_df = pd.DataFrame([t.__dict__ for t in result.trades])
+            trades_df = result.trades.to_frame()
             trades_df.to_csv(filepath, index=False, date_format='%Y-%m-%d %H:%M:%S')
             print(f"Trades CSV salvos em: {filepath.relative_to(self.base_dir)}")
             
@@ -546,26 +626,54 @@ def main():
     """Função principal"""
     parser = argparse.ArgumentParser(description='Sistema de Backtest NTSL')
     parser.add_argument('--strategy', '-s', help='Caminho da estratégia NTSL')
-    parser.add_argument('--data', '-d', help='Caminho do arquivo CSV')
+    parser.add_argument('--data', '-d', help='Caminho do arquivo CSV (ou símbolo, com --source yahoo)')
+    parser.add_argument('--source', choices=['local_csv', 'yahoo'], default='local_csv',
+                        help='Fonte dos dados: CSV local ou Yahoo Finance (barras guardadas em backtest/.cache/yahoo)')
     parser.add_argument('--start-date', help='Data início (YYYY-MM-DD)')
     parser.add_argument('--end-date', help='Data fim (YYYY-MM-DD)')
     parser.add_argument('--output', '-o', help='Diretório de saída')
     parser.add_argument('--timeframe', '-t', help='Tempo gráfico em minutos (ex: 5, 15)')
     parser.add_argument('--batch', action='store_true', help='Modo batch (não-interativo)')
+    parser.add_argument('--mode', '-m', choices=ENGINE_MODES, default='standard',
+                        help='Modo do engine: standard (DataFrame), fast (arrays NumPy) ou compiled (código NTSL)')
+    parser.add_argument('--verbosity', '-v', type=int, choices=[0, 1, 2], default=1,
+                        help='0 = silencioso, 1 = resumo e trades, 2 = diagnóstico completo')
+    parser.add_argument('--events', help='Arquivo JSONL para gravar os eventos do engine')
+    parser.add_argument('--spread', choices=SPREAD_MODELS, default='uniform',
+                        help='Modelo de spread: uniform (sorteado), fixed (--spread-ticks) ou column (coluna Spread do CSV)')
+    parser.add_argument('--spread-ticks', type=float, default=1.0, help='Spread do modelo fixed, em ticks')
+    parser.add_argument('--seed', type=int, help='Semente do modelo de spread (execuções reproduzíveis)')
+    parser.add_argument('--intrabar', action='store_true',
+                        help='Executa stop/alvo no preço do nível tocado primeiro (usa as barras de 1 minuto)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Não usa os caches em disco (CSV colunar, AST das estratégias e Yahoo, em backtest/.cache)')
+    parser.add_argument('--offline', action='store_true',
+                        help='Com --source yahoo, usa só as barras já baixadas (erro se faltar algum trecho)')
     
     args = parser.parse_args()
     
-    runner = ConsoleRunner()
+    runner = ConsoleRunner(use_cache=not args.no_cache, offline=args.offline)
     
     if args.batch and args.strategy and args.data:
         # Modo batch
+        event_sink = None
+        if args.events:
+            event_sink = JsonlEventSink(args.events)
+            if args.verbosity >= 1:
+                event_sink = TeeEventSink(ConsoleEventSink(args.verbosity), event_sink)
         result = runner.run_batch(
             args.strategy, 
             args.data, 
             args.start_date, 
             args.end_date, 
             args.output,
-            args.timeframe
+            args.timeframe,
+            args.mode,
+            args.verbosity,
+            event_sink,
+            create_spread_model(args.spread, seed=args.seed, ticks=args.spread_ticks),
+            args.intrabar,
+            args.source
         )
     else:
         # Modo interativo
@@ -0,0 +1,154 @@
+"""
+Índice de pregões por deslocamento de bytes para os CSVs exportados do Profit.
+
+Um backtest de 3 meses sobre um arquivo de 5 anos não precisa parsear os 5 anos:
+o CsvDayIndex localiza, com uma varredura vetorizada dos bytes do arquivo (sem
+parse de texto), o trecho de cada pregão. Uma consulta por período devolve só o
+cabeçalho e as linhas dos pregões pedidos, que são então lidos normalmente.
+
+A varredura exige o layout regular do Profit: mesmo número de campos em todas as
+linhas, sem aspas, e a data no formato dd/mm/aaaa. Arquivos fora disso não são
+indexados (build() retorna None) e são lidos por inteiro.
+
+O índice pode ser gravado em disco (save/load) junto com a assinatura do CSV de
+origem (ver dataset_cache.source_signature): se o arquivo mudar, ele é refeito.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+NEWLINE = ord('\n')
+SEPARATOR = ord(';')
+QUOTE = ord('"')
+DATE_WIDTH = 10  # dd/mm/aaaa
+
+
+class CsvDayIndex:
+    """Trechos [início, fim) em bytes de cada bloco contínuo de linhas do mesmo pregão"""
+
+    def __init__(self, header_end: int, days: np.ndarray, starts: np.ndarray, ends: np.ndarray):
+        """
+        Args:
+            header_end: Posição do primeiro byte após a linha de cabeçalho
+            days: Data de cada bloco (datetime64[D]), na ordem do arquivo
+            starts, ends: Deslocamentos em bytes de cada bloco
+        """
+        self.header_end = header_end
+        self.days = days
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def build(cls, file_path: str, date_column: int) -> Optional['CsvDayIndex']:
+        """
+        Varre o arquivo e monta o índice.
+
+        Args:
+            file_path: CSV separado por ';'
+            date_column: Posição (0-based) da coluna de data no cabeçalho
+
+        Returns:
+            CsvDayIndex, ou None se o layout não for regular
+        """
+        buffer = np.fromfile(file_path, dtype=np.uint8)
+        if len(buffer) == 0 or (buffer == QUOTE).any():
+            return None
+        if buffer[-1] != NEWLINE:
+            buffer = np.r_[buffer, np.uint8(NEWLINE)]
+
+        line_ends = np.flatnonzero(buffer == NEWLINE)
+        header_end = int(line_ends[0]) + 1
+        line_starts = line_ends[:-1] + 1
+        line_ends = line_ends[1:]
+        if len(line_starts) == 0:
+            return None
+
+        # Separadores por linha: todas as linhas precisam ter a mesma contagem do cabeçalho
+        separators = np.flatnonzero(buffer == SEPARATOR)
+        header_fields = int(np.searchsorted(separators, header_end)) + 1
+        first_separator = np.searchsorted(separators, line_starts)
+        counts = np.diff(np.r_[first_separator, len(separators)])
+        if date_column >= header_fields or (counts != header_fields - 1).any():
+            return None
+
+        if date_column == 0:
+            date_starts = line_starts
+        else:
+            date_starts = separators[first_separator + date_column - 1] + 1
+        if (date_starts + DATE_WIDTH > line_ends).any():
+            return None
+        dates = buffer[date_starts[:, None] + np.arange(DATE_WIDTH)]
+        if (dates[:, 2] != ord('/')).any() or (dates[:, 5] != ord('/')).any():
+            return None
+        dates = np.ascontiguousarray(dates).view(f"S{DATE_WIDTH}").ravel()
+
+        # Blocos contínuos do mesmo pregão (o arquivo pode estar em ordem crescente ou decrescente)
+        block_starts = np.flatnonzero(np.r_[True, dates[1:] != dates[:-1]])
+        block_ends = np.r_[block_starts[1:], len(dates)] - 1
+        try:
+            days = pd.to_datetime(pd.Series(dates[block_starts]).str.decode('latin-1'),
+                                  format='%d/%m/%Y').to_numpy().astype('datetime64[D]')
+        except ValueError:
+            return None
+
+        starts = line_starts[block_starts]
+        ends = np.minimum(line_ends[block_ends] + 1, len(buffer))
+        return cls(header_end, days, starts.astype(np.int64), ends.astype(np.int64))
+
+    def save(self, path: Path, signature: Dict):
+        """Grava o índice (.npz) com a assinatura do CSV indexado (substitui o anterior de forma atômica)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.stem}.tmp-{os.getpid()}.npz")
+        np.savez(tmp, header_end=np.int64(self.header_end), days=self.days, starts=self.starts, ends=self.ends,
+                 source=np.array(json.dumps(signature, sort_keys=True)))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path, signature: Dict) -> Optional['CsvDayIndex']:
+        """Índice gravado por save(); None se não existe ou foi feito de outra versão do CSV"""
+        try:
+            with np.load(path, allow_pickle=False) as saved:
+                if str(saved['source']) != json.dumps(signature, sort_keys=True):
+                    return None
+                return cls(int(saved['header_end']), saved['days'], saved['starts'], saved['ends'])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def read_range(self, file_path: str, start: pd.Timestamp, end: pd.Timestamp) -> Optional[bytes]:
+        """
+        Cabeçalho + linhas dos pregões que podem ter barras em [start, end].
+
+        Returns:
+            Conteúdo CSV reduzido, ou None se o período cobre o arquivo inteiro
+        """
+        first_day = np.datetime64(start.floor('D').date(), 'D')
+        last_day = np.datetime64(end.date(), 'D')
+        selected = np.flatnonzero((self.days >= first_day) & (self.days <= last_day))
+        if len(selected) == len(self.days):
+            return None
+
+        # Blocos vizinhos no arquivo viram uma única leitura
+        ranges = []
+        for block in selected:
+            if ranges and ranges[-1][1] == self.starts[block]:
+                ranges[-1][1] = self.ends[block]
+            else:
+                ranges.append([self.starts[block], self.ends[block]])
+
+        chunks = []
+        with open(file_path, 'rb') as f:
+            chunks.append(f.read(self.header_end))
+            for begin, finish in ranges:
+                f.seek(begin)
+                chunks.append(f.read(finish - begin))
+        content = b''.join(chunks)
+        if not content.endswith(b'\n'):
+            content += b'\n'
+        return content
@@ -1,16 +1,139 @@
-import yfinance as yf
+import numpy as np
 import pandas as pd
-from typing import Optional, List
+import csv
+import io
+from typing import TYPE_CHECKING, Dict, Optional, List, Tuple, Union
 from datetime import datetime, timedelta
 import warnings
 
+from .csv_index import CsvDayIndex
+from .dataset_cache import source_signature
+from .timeframe_store import PYRAMID_MINUTES, TimeframePyramid, aggregation_map, interval_minutes
+
+from .yahoo_cache import YahooCache, yfinance_history, yfinance_info
+
+if TYPE_CHECKING:  # import só para anotação: evita carregar o módulo ao rodar 'python -m backtest.dataset_cache'
+    from .dataset_cache import DatasetCache
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pa_compute
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow é opcional (csv_engine='pyarrow')
+    pa = None
+
+
+# Mapeamento robusto de nomes de coluna dos CSVs exportados
+# Lista de possíveis nomes para cada coluna padrão (case-insensitive e com/sem acentos)
+CSV_COLUMN_CANDIDATES = {
+    'data': ['data', 'date'], # Explicitamente mapear 'Data' para 'data'
+    'hora': ['hora', 'time'], # Explicitamente mapear 'Hora' para 'hora'
+    'open': ['abertura', 'open'],
+    'high': ['maxima', 'máxima', 'm_xima', 'high', 'm\x87ximo', 'm\xe1ximo', 'm\x81ximo', 'maximo'],
+    'low': ['minima', 'mínima', 'm_nima', 'low', 'm\x92nimo', 'm\xednimo', 'minimo'],
+    'close': ['fechamento', 'close'],
+    'volume': ['volume', 'vol'],
+    'quantity': ['quantidade', 'quantity', 'qtd'], # Adicionado para mapear 'Quantidade'
+    'spread': ['spread'], # Spread em ticks (usado pelo ColumnSpreadModel)
+    # Colunas de referência de estratégias (se existirem no CSV)
+    'sma_20_close_csv': ['orquestrador_moderado_1_visual [0.50 0.40 0.30 0.30 20 3 900 915 20 2.00 0 verdadeiro verdadeiro verdadeiro]'],
+    'bb_upper_csv': ['orquestrador_moderado_1_visual [0.50 0.40 0.30 0.30 20 3 900 915 20 2.00 0 verdadeiro verdadeiro verdadeiro].1'],
+    'bb_lower_csv': ['orquestrador_moderado_1_visual [0.50 0.40 0.30 0.30 20 3 900 915 20 2.00 0 verdadeiro verdadeiro verdadeiro].2'],
+    'first_bar_max_csv': ['orquestrador_moderado_1_visual [0.50 0.40 0.30 0.30 20 3 900 915 20 2.00 0 verdadeiro verdadeiro verdadeiro].3'],
+    'first_bar_min_csv': ['orquestrador_moderador_1_visual [0.50 0.40 0.30 0.30 20 3 900 915 20 2.00 0 verdadeiro verdadeiro verdadeiro].4']
+}
+
+
+def csv_rename_map(columns: List[str]) -> Dict[str, str]:
+    """Dicionário de renomeação das colunas do CSV para os nomes padrão"""
+    rename_map = {}
+    for current_col in columns:
+        normalized_current_col = current_col.lower()
+        for standard_name, candidates in CSV_COLUMN_CANDIDATES.items():
+            # Usar 'in' para verificar se a coluna atual (normalizada ou original) está nos candidatos
+            if normalized_current_col in [c.lower() for c in candidates] or current_col in candidates:
+                rename_map[current_col] = standard_name
+                break
+    return rename_map
+
+
+# Motores de leitura do CSV local:
+#   'auto'    - o mesmo que 'c' (o mais rápido medido em 1 núcleo)
+#   'c'       - parser C do pandas, datas parseadas com formato fixo
+#   'pyarrow' - leitura multi-thread do pyarrow (opcional), ganha com vários núcleos
+#   'legacy'  - leitura original (inferência de datas por linha)
+# Os motores rápidos produzem exatamente o mesmo DataFrame do 'legacy'; qualquer
+# formato que eles não reconheçam cai automaticamente na leitura original.
+CSV_ENGINES = ('auto', 'pyarrow', 'c', 'legacy')
+CSV_DATE_FORMAT = '%d/%m/%Y'
+CSV_TIME_FORMAT = '%H:%M:%S'
+# Textos lidos como nulo pelo pandas (read_csv padrão), usados no motor pyarrow
+CSV_NA_VALUES = (
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+)
+
+
+def sniff_csv_header(source: Union[str, bytes]) -> Tuple[str, List[str]]:
+    """
+    Detecta a codificação e as colunas a partir da primeira linha do arquivo.
+
+    Segue a mesma regra da leitura original (utf-8, com latin-1 como alternativa):
+    se o cabeçalho já não é utf-8 válido, o arquivo inteiro também não é.
+
+    Args:
+        source: Caminho do CSV ou o próprio conteúdo (ver CsvDayIndex.read_range)
+    """
+    if isinstance(source, bytes):
+        first_line = source.split(b'\n', 1)[0]
+    else:
+        with open(source, 'rb') as f:
+            first_line = f.readline()
+    try:
+        header = first_line.decode('utf-8-sig')
+        encoding = 'utf-8'
+    except UnicodeDecodeError:
+        header = first_line.decode('latin-1')
+        encoding = 'latin-1'
+    columns = next(csv.reader([header.rstrip('\r\n')], delimiter=';'), [])
+    return encoding, columns
+
+
+def _csv_source(source: Union[str, bytes]):
+    """Caminho do CSV, ou um BytesIO novo sobre o conteúdo (cada tentativa de leitura começa do início)"""
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+
 class DataProvider:
     """
     Provedor de dados históricos para backtest
     """
     
-    def __init__(self):
+    def __init__(self, verbose: bool = True, csv_engine: str = 'auto', cache: Optional['DatasetCache'] = None,
+                 yahoo_cache: Optional[YahooCache] = None, index_cache: Optional['DatasetCache'] = None):
+        """
+        Args:
+            verbose: Se False, suprime as mensagens informativas de carregamento
+            csv_engine: Motor de leitura dos CSVs locais (ver CSV_ENGINES)
+            cache: Cache colunar dos CSVs já lidos (None = sempre ler o CSV)
+            yahoo_cache: Cache dos downloads do Yahoo Finance (None = sempre buscar na rede)
+            index_cache: Onde gravar os índices de pregões da leitura por período
+                (padrão: o próprio cache; None nos dois = índice só em memória)
+        """
+        if csv_engine not in CSV_ENGINES:
+            raise ValueError(f"Motor de CSV inválido: {csv_engine}. Opções: {', '.join(CSV_ENGINES)}")
+        if csv_engine == 'pyarrow' and pa is None:
+            raise ValueError("Motor 'pyarrow' solicitado, mas o pyarrow não está instalado")
         self.supported_sources = ['yahoo', 'local_csv']
+        self.verbose = verbose
+        self.csv_engine = csv_engine
+        self.cache = cache
+        self.yahoo_cache = yahoo_cache
+        self.index_cache = index_cache if index_cache is not None else cache
+        # Pirâmides de tempos gráficos e índices de pregões já construídos:
+        # caminho -> (assinatura do CSV, objeto)
+        self._pyramids = {}
+        self._day_indexes = {}
     
     def get_data(self, 
                  symbol: str, 
@@ -93,8 +216,7 @@ class DataProvider:
     def validate_symbol(self, symbol: str) -> bool:
         """Valida se símbolo existe e tem dados disponíveis"""
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
+            info = self._symbol_info(symbol)
             return 'regularMarketPrice' in info or 'previousClose' in info
         except:
             return False
@@ -102,8 +224,7 @@ class DataProvider:
     def get_symbol_info(self, symbol: str) -> dict:
         """Obtém informações básicas do símbolo"""
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
+            info = self._symbol_info(symbol)
             
             return {
                 'name': info.get('longName', symbol),
@@ -116,6 +237,12 @@ class DataProvider:
         except:
             return {'name': symbol, 'currency': 'USD', 'exchange': 'N/A'}
     
+    def _symbol_info(self, symbol: str) -> dict:
+        """Dicionário info do yfinance, pelo cache quando configurado"""
+        if self.yahoo_cache is not None:
+            return self.yahoo_cache.info(symbol)
+        return yfinance_info(symbol)
+
     def _get_yahoo_data(self, symbol: str, start_date: str, end_date: str, interval: str) -> pd.DataFrame:
         """Obtém dados do Yahoo Finance com tratamento para ativos brasileiros"""
         
@@ -130,15 +257,10 @@ class DataProvider:
             raise ValueError(f"Intervalo não suportado: {interval}. Disponíveis: {list(interval_map.keys())}")
         
         try:
-            ticker = yf.Ticker(symbol)
-            data = ticker.history(
-                start=start_date,
-                end=end_date,
-                interval=interval_map[interval],
-                auto_adjust=True,
-                prepost=False,
-                actions=False  # Não incluir dividendos/splits para simplificar
-            )
+            if self.yahoo_cache is not None:
+                data = self.yahoo_cache.history(symbol, start_date, end_date, interval_map[interval])
+            else:
+                data = yfinance_history(symbol, start_date, end_date, interval_map[interval])
             
             if data.empty:
                 raise ValueError(f"Nenhum dado encontrado para {symbol} no período {start_date} a {end_date}")
@@ -159,8 +281,9 @@ class DataProvider:
             if len(data) == 0:
                 raise ValueError(f"Todos os dados contêm valores NaN para {symbol}")
             
-            print(f"Dados obtidos: {len(data)} barras de {symbol} ({start_date} a {end_date})")
-            print(f"   Intervalo: {interval} | Período: {data.index[0]} até {data.index[-1]}")
+            if self.verbose:
+                print(f"Dados obtidos: {len(data)} barras de {symbol} ({start_date} a {end_date})")
+                print(f"   Intervalo: {interval} | Período: {data.index[0]} até {data.index[-1]}")
             
             return data[required_cols]
             
@@ -168,80 +291,245 @@ class DataProvider:
             print(f"Erro ao obter dados do Yahoo Finance: {str(e)}")
             raise ValueError(f"Erro ao obter dados do Yahoo Finance para {symbol}: {str(e)}")
     
+    def _get_pyramid(self, file_path: str, base: pd.DataFrame) -> Optional[TimeframePyramid]:
+        """Pirâmide de tempos gráficos do CSV: da memória, do cache em disco ou construída agora"""
+        signature = source_signature(file_path)
+        cached = self._pyramids.get(file_path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        if not TimeframePyramid.supports(base):
+            return None
+
+        pyramid = None
+        if self.cache is not None:
+            levels = {m: self.cache.load(file_path, variant=f"tf_{m}") for m in PYRAMID_MINUTES}
+            if all(level is not None for level in levels.values()):
+                pyramid = TimeframePyramid(levels)
+        if pyramid is None:
+            pyramid = TimeframePyramid.build(base)
+            if self.cache is not None:
+                for minutes, level in pyramid.levels.items():
+                    self.cache.store(file_path, level, variant=f"tf_{minutes}")
+        self._pyramids[file_path] = (signature, pyramid)
+        return pyramid
+
+    def _load_day_index(self, file_path: str, signature: Dict) -> Optional[CsvDayIndex]:
+        """Índice de pregões do CSV: do disco (index_cache) ou construído agora"""
+        index_path = self.index_cache.day_index_path(file_path) if self.index_cache is not None else None
+        if index_path is not None:
+            day_index = CsvDayIndex.load(index_path, signature)
+            if day_index is not None:
+                return day_index
+
+        _, columns = sniff_csv_header(file_path)
+        rename_map = csv_rename_map(columns)
+        standard = [rename_map.get(col) for col in columns]
+        day_index = CsvDayIndex.build(file_path, standard.index('data')) if 'data' in standard else None
+        if day_index is not None and index_path is not None:
+            day_index.save(index_path, signature)
+        return day_index
+
+    def _read_local_csv_range(self, file_path: str, start: pd.Timestamp, end: pd.Timestamp) -> Optional[pd.DataFrame]:
+        """
+        Lê apenas os pregões que podem ter barras em [start, end] (ver CsvDayIndex).
+
+        Os tipos das colunas são inferidos só das linhas lidas. Retorna None se o
+        arquivo não pode ser indexado ou o período cobre o arquivo inteiro.
+        """
+        signature = source_signature(file_path)
+        cached = self._day_indexes.get(file_path)
+        if cached is not None and cached[0] == signature:
+            day_index = cached[1]
+        else:
+            day_index = self._load_day_index(file_path, signature)
+            self._day_indexes[file_path] = (signature, day_index)
+
+        if day_index is None:
+            return None
+        content = day_index.read_range(file_path, start, end)
+        if content is None:
+            return None
+        return self._parse_local_csv(content)
+
+    def _read_local_csv(self, file_path: str) -> pd.DataFrame:
+        """
+        Lê o CSV exportado do Profit com colunas renomeadas e índice 'datetime'.
+
+        Colunas não mapeadas são mantidas (participam do dropna, como na leitura original).
+        """
+        if self.cache is not None:
+            data = self.cache.load(file_path)
+            if data is not None:
+                if self.verbose:
+                    print(f"Dados carregados do cache: {self.cache.entry_dir(file_path)}")
+                return data
+            data = self._parse_local_csv(file_path)
+            # Colunas padrão não numéricas indicam um CSV fora do formato: não vão para o cache
+            if all(data[col].dtype.kind in 'biuf' for col in data.columns if col in CSV_COLUMN_CANDIDATES):
+                self.cache.store(file_path, data)
+            return data
+        return self._parse_local_csv(file_path)
+
+    def _parse_local_csv(self, file_path: Union[str, bytes]) -> pd.DataFrame:
+        """Parse do CSV pelo motor configurado, com a leitura original como alternativa"""
+        engine = self.csv_engine
+        if engine == 'auto':
+            engine = 'c'
+
+        data = None
+        if engine != 'legacy':
+            encoding, columns = sniff_csv_header(file_path)
+            rename_map = csv_rename_map(columns)
+            targets = list(rename_map.values())
+            # Casos fora do formato padrão ficam com a leitura original
+            supported = (len(set(columns)) == len(columns)
+                         and len(set(targets)) == len(targets)
+                         and 'data' in targets and 'hora' in targets)
+            if supported:
+                try:
+                    if engine == 'pyarrow':
+                        data = self._read_csv_pyarrow(file_path, encoding, columns, rename_map)
+                    else:
+                        data = self._read_csv_c(file_path, encoding, columns, rename_map)
+                except (ValueError, TypeError, UnicodeDecodeError):
+                    data = None
+            if data is not None and self.verbose:
+                print("Colunas originais do CSV:", columns)
+                print("Colunas após renomeação:", [rename_map.get(c, c) for c in columns])
+
+        if data is None:
+            data = self._read_csv_legacy(file_path)
+        # Mesma resolução do índice em todos os motores (e versões do pandas)
+        data.index = data.index.as_unit('ns')
+        return data
+
+    def _read_csv_pyarrow(self, file_path: Union[str, bytes], encoding: str, columns: List[str],
+                          rename_map: Dict[str, str]) -> Optional[pd.DataFrame]:
+        """Leitura pelo pyarrow: tudo como texto, números e datas convertidos no Arrow"""
+        convert_options = pa_csv.ConvertOptions(
+            column_types={col: pa.string() for col in columns},
+            null_values=list(CSV_NA_VALUES),
+            strings_can_be_null=True
+        )
+        parse_options = pa_csv.ParseOptions(delimiter=';')
+        try:
+            table = pa_csv.read_csv(_csv_source(file_path), read_options=pa_csv.ReadOptions(encoding=encoding),
+                                    parse_options=parse_options, convert_options=convert_options)
+        except pa.ArrowInvalid:
+            if encoding != 'utf-8':
+                return None
+            # utf-8 inválido no corpo do arquivo: mesma alternativa da leitura original
+            table = pa_csv.read_csv(_csv_source(file_path), read_options=pa_csv.ReadOptions(encoding='latin-1'),
+                                    parse_options=parse_options, convert_options=convert_options)
+        if table.column_names != columns:
+            return None
+
+        inverse = {standard: col for col, standard in rename_map.items()}
+        dates, times = table[inverse['data']], table[inverse['hora']]
+        if dates.null_count or times.null_count:
+            return None
+        try:
+            stamps = pa_compute.strptime(
+                pa_compute.binary_join_element_wise(dates, times, ' '),
+                format=f"{CSV_DATE_FORMAT} {CSV_TIME_FORMAT}", unit='ns'
+            )
+            values = {}
+            for col in columns:
+                name = rename_map.get(col, col)
+                if name in ('data', 'hora'):
+                    continue
+                values[name] = _arrow_to_numeric(table[col]) if col in rename_map else table[col].to_pandas()
+        except pa.ArrowInvalid:
+            return None
+
+        data = pd.DataFrame(values)
+        data.index = pd.DatetimeIndex(stamps.to_numpy(), name='datetime')
+        return data
+
+    def _read_csv_c(self, file_path: Union[str, bytes], encoding: str, columns: List[str],
+                    rename_map: Dict[str, str]) -> Optional[pd.DataFrame]:
+        """Leitura pelo parser C do pandas com datas em formato fixo"""
+        inverse = {standard: col for col, standard in rename_map.items()}
+        read_kwargs = dict(sep=';', decimal=',', thousands='.',
+                           dtype={inverse['data']: str, inverse['hora']: str})
+        try:
+            data = pd.read_csv(_csv_source(file_path), encoding=encoding, **read_kwargs)
+        except UnicodeDecodeError:
+            data = pd.read_csv(_csv_source(file_path), encoding='latin-1', **read_kwargs)
+        if data.columns.tolist() != columns:
+            return None
+        data.rename(columns=rename_map, inplace=True)
+        if data['data'].isna().any() or data['hora'].isna().any():
+            return None
+
+        index = _combine_date_time(data['data'], data['hora'])
+        data.drop(columns=['data', 'hora'], inplace=True)
+        data.index = index
+        return data
+
+    def _read_csv_legacy(self, file_path: Union[str, bytes]) -> pd.DataFrame:
+        """Leitura original: pandas com inferência do formato de data"""
+        # Não parsear datas ou definir índice aqui, faremos isso após a leitura
+        try:
+            data = pd.read_csv(
+                _csv_source(file_path),
+                sep=';',
+                encoding='utf-8',
+                decimal=',',
+                thousands='.'
+            )
+        except UnicodeDecodeError:
+            # Tentar latin-1 se utf-8 falhar
+            data = pd.read_csv(
+                _csv_source(file_path),
+                sep=';',
+                encoding='latin-1',
+                decimal=',',
+                thousands='.'
+            )
+
+        # Renomear para os nomes padrão (CSV_COLUMN_CANDIDATES)
+        rename_map = csv_rename_map(data.columns)
+
+        # Adicionar mais prints para depuração
+        if self.verbose:
+            print("Colunas originais do CSV:", data.columns.tolist())
+        data.rename(columns=rename_map, inplace=True)
+        if self.verbose:
+            print("Colunas após renomeação:", data.columns.tolist())
+
+        # Combinar 'Data' e 'Hora' para criar o índice de datetime
+        if 'data' in data.columns and 'hora' in data.columns:
+            data['datetime'] = pd.to_datetime(data['data'] + ' ' + data['hora'], dayfirst=True)
+            data.set_index('datetime', inplace=True)
+            data.drop(columns=['data', 'hora'], inplace=True)
+        elif 'data' in data.columns:
+            data['datetime'] = pd.to_datetime(data['data'], dayfirst=True)
+            data.set_index('datetime', inplace=True)
+            data.drop(columns=['data'], inplace=True)
+        else:
+            raise ValueError("Colunas 'Data' e/ou 'Hora' não encontradas para criar o índice de tempo.")
+        return data
+
     def _get_local_csv_data(self, file_path: str, start_date: Optional[str], end_date: Optional[str], target_interval: Optional[str] = None) -> pd.DataFrame:
         """Carrega dados de arquivo CSV local e realiza reamostragem."""
         
         try:
-            # Carregar dados do CSV com formato específico
-            # Não parsear datas ou definir índice aqui, faremos isso após a leitura
-            try:
-                data = pd.read_csv(
-                    file_path,
-                    sep=';',
-                    encoding='utf-8',
-                    decimal=',',
-                    thousands='.'
-                )
-            except UnicodeDecodeError:
-                # Tentar latin-1 se utf-8 falhar
-                data = pd.read_csv(
-                    file_path,
-                    sep=';',
-                    encoding='latin-1',
-                    decimal=',',
-                    thousands='.'
-                )
-            
-            # Mapeamento robusto de nomes de coluna
-            # Lista de possíveis nomes para cada coluna padrão (case-insensitive e com/sem acentos)
-            col_candidates = {
-                'data': ['data', 'date'], # Explicitamente mapear 'Data' para 'data'
-                'hora': ['hora', 'time'], # Explicitamente mapear 'Hora' para 'hora'
-                'open': ['abertura', 'open'],
-                'high': ['maxima', 'máxima', 'm_xima', 'high', 'm\x87ximo', 'm\xe1ximo', 'm\x81ximo', 'maximo'],
-                'low': ['minima', 'mínima', 'm_nima', 'low', 'm\x92nimo', 'm\xednimo', 'minimo'],
-                'close': ['fechamento', 'close'],
-                'volume': ['volume', 'vol'],
-                'quantity': ['quantidade', 'quantity', 'qtd'], # Adicionado para mapear 'Quantidade'
-                # Colunas de referência de estratégias (se existirem no CSV)
-                'sma_20_close_csv': ['orquestrador_moderado_1_visual [0.50 0.40 0.30 0.30 20 3 900 915 20 2.00 0 verdadeiro verdadeiro verdadeiro]'],
-                'bb_upper_csv': ['orquestrador_moderado_1_visual [0.50 0.40 0.30 0.30 20 3 900 915 20 2.00 0 verdadeiro verdadeiro verdadeiro].1'],
-                'bb_lower_csv': ['orquestrador_moderado_1_visual [0.50 0.40 0.30 0.30 20 3 900 915 20 2.00 0 verdadeiro verdadeiro verdadeiro].2'],
-                'first_bar_max_csv': ['orquestrador_moderado_1_visual [0.50 0.40 0.30 0.30 20 3 900 915 20 2.00 0 verdadeiro verdadeiro verdadeiro].3'],
-                'first_bar_min_csv': ['orquestrador_moderador_1_visual [0.50 0.40 0.30 0.30 20 3 900 915 20 2.00 0 verdadeiro verdadeiro verdadeiro].4']
-            }
-            
-            # Criar um dicionário de renomeação dinamicamente
-            rename_map = {}
-            for current_col in data.columns:
-                normalized_current_col = current_col.lower()
-                for standard_name, candidates in col_candidates.items():
-                    # Usar 'in' para verificar se a coluna atual (normalizada ou original) está nos candidatos
-                    if normalized_current_col in [c.lower() for c in candidates] or current_col in candidates:
-                        rename_map[current_col] = standard_name
-                        break
-            
-            # Adicionar mais prints para depuração
-            print("Colunas originais do CSV:", data.columns.tolist())
-            data.rename(columns=rename_map, inplace=True)
-            print("Colunas após renomeação:", data.columns.tolist())
+            start = end = None
+            if start_date and end_date:
+                start = pd.to_datetime(start_date)
+                end = pd.to_datetime(end_date)
 
-            # Combinar 'Data' e 'Hora' para criar o índice de datetime
-            if 'data' in data.columns and 'hora' in data.columns:
-                data['datetime'] = pd.to_datetime(data['data'] + ' ' + data['hora'], dayfirst=True)
-                data.set_index('datetime', inplace=True)
-                data.drop(columns=['data', 'hora'], inplace=True)
-            elif 'data' in data.columns:
-                data['datetime'] = pd.to_datetime(data['data'], dayfirst=True)
-                data.set_index('datetime', inplace=True)
-                data.drop(columns=['data'], inplace=True)
-            else:
-                raise ValueError("Colunas 'Data' e/ou 'Hora' não encontradas para criar o índice de tempo.")
+            # Sem cache em disco, um período lê do CSV só os pregões necessários
+            ranged = None
+            if start is not None and self.cache is None:
+                ranged = self._read_local_csv_range(file_path, start, end)
+            data = ranged if ranged is not None else self._read_local_csv(file_path)
 
             # Verificar se as colunas de referência foram carregadas
             ref_cols = ['sma_20_close_csv', 'bb_upper_csv', 'bb_lower_csv']
             for col in ref_cols:
-                if col not in data.columns:
+                if self.verbose and col not in data.columns:
                     print(f"AVISO: Coluna de referência '{col}' não encontrada no CSV.")
             
             # Adicionar coluna de volume se não existir, antes da reamostragem
@@ -249,27 +537,26 @@ class DataProvider:
                 data['volume'] = 100
 
             # Filtrar por período se especificado
-            if start_date and end_date:
-                start = pd.to_datetime(start_date)
-                end = pd.to_datetime(end_date)
-                data = data[(data.index >= start) & (data.index <= end)]
+            base = data
+            if start is not None:
+                data = _filter_period(data, start, end)
 
             # Reamostragem para o tempo gráfico alvo
             if target_interval and target_interval != "1min":
-                print(f"Reamostrando dados para {target_interval}...")
-                ohlc_dict = {
-                    'open': 'first',
-                    'high': 'max',
-                    'low': 'min',
-                    'close': 'last',
-                    'volume': 'sum'
-                }
-                # Preservar colunas de referência, pegando o último valor da janela
-                ref_cols = ['sma_20_close_csv', 'bb_upper_csv', 'bb_lower_csv', 'first_bar_max_csv', 'first_bar_min_csv']
-                for col in ref_cols:
-                    if col in data.columns:
-                        ohlc_dict[col] = 'last'
-                data = data.resample(target_interval).agg(ohlc_dict)
+                if self.verbose:
+                    print(f"Reamostrando dados para {target_interval}...")
+                # Tempos gráficos da pirâmide saem prontos; os demais (ou filtros que
+                # cortam uma barra no meio) passam pelo resample
+                minutes = interval_minutes(target_interval)
+                resampled = None
+                if minutes in PYRAMID_MINUTES and ranged is None:
+                    pyramid = self._get_pyramid(file_path, base)
+                    if pyramid is not None:
+                        resampled = pyramid.get(minutes, base.index, start, end)
+                if resampled is None:
+                    # Preservar colunas de referência e spread, pegando o último valor da janela
+                    resampled = data.resample(target_interval).agg(aggregation_map(data.columns))
+                data = resampled
             
             # Verificar colunas obrigatórias
             required_cols = ['open', 'high', 'low', 'close']
@@ -286,20 +573,70 @@ class DataProvider:
             if len(data) == 0:
                 raise ValueError("Nenhum dado válido encontrado após limpeza")
             
-            print(f"   Período final: {data.index.min()} até {data.index.max()}")
+            if self.verbose:
+                print(f"   Período final: {data.index.min()} até {data.index.max()}")
             # Incluir colunas de referência e 'quantity' se existirem
             final_cols = required_cols + ['volume']
             if 'quantity' in data.columns: # Adicionar 'quantity' se estiver presente
                 final_cols.append('quantity')
+            if 'spread' in data.columns:
+                final_cols.append('spread')
             ref_cols = ['sma_20_close_csv', 'bb_upper_csv', 'bb_lower_csv', 'first_bar_max_csv', 'first_bar_min_csv']
             for col in ref_cols:
                 if col in data.columns:
                     final_cols.append(col)
 
-            print(f"   Colunas Finais: {final_cols}")
+            if self.verbose:
+                print(f"   Colunas Finais: {final_cols}")
             
             return data[final_cols]
             
         except Exception as e:
             print(f"Erro ao carregar ou reamostrar CSV: {str(e)}")
             raise ValueError(f"Erro no processamento do CSV: {str(e)}")
+
+
+def _arrow_to_numeric(column) -> np.ndarray:
+    """
+    Converte uma coluna de texto do Arrow como o pandas faria com decimal=',' e thousands='.'.
+
+    Inteiros sem nulos ficam int64; com nulos ou casas decimais, float64.
+    Levanta ArrowInvalid se a coluna não for numérica.
+    """
+    digits = pa_compute.replace_substring(column, '.', '')
+    try:
+        values = pa_compute.cast(digits, pa.int64())
+    except pa.ArrowInvalid:
+        values = pa_compute.cast(pa_compute.replace_substring(digits, ',', '.'), pa.float64())
+    if values.null_count:
+        values = pa_compute.cast(values, pa.float64())
+    return values.to_numpy()
+
+
+def _filter_period(data: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+    """
+    Linhas com start <= índice <= end.
+
+    Com índice ordenado o recorte é uma fatia por searchsorted: dados em cache
+    (memory-map) fora do período nem chegam a ser lidos do disco.
+    """
+    index = data.index
+    if index.is_monotonic_increasing:
+        return data.iloc[index.searchsorted(start, side='left'):index.searchsorted(end, side='right')]
+    return data[(index >= start) & (index <= end)]
+
+
+def _combine_date_time(dates: pd.Series, times: pd.Series) -> pd.DatetimeIndex:
+    """
+    Monta o índice a partir das colunas de data e hora em formato fixo.
+
+    Um arquivo de 1 minuto repete cada data centenas de vezes e cada horário uma vez
+    por pregão: apenas os valores distintos são parseados.
+    """
+    date_codes, date_values = pd.factorize(dates)
+    time_codes, time_values = pd.factorize(times)
+    days = pd.to_datetime(date_values, format=CSV_DATE_FORMAT).to_numpy()
+    clock = pd.to_datetime(time_values, format=CSV_TIME_FORMAT).to_numpy()
+    offsets = clock - clock.astype('datetime64[D]')
+    stamps = days[date_codes] + offsets[time_codes].astype(f"timedelta64[{np.datetime_data(days.dtype)[0]}]")
+    return pd.DatetimeIndex(stamps, name='datetime')
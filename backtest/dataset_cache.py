@@ -0,0 +1,224 @@
+"""
+Cache em disco dos CSVs carregados pelo DataProvider.
+
+Cada CSV é lido uma única vez: o DataFrame normalizado (colunas renomeadas e
+índice 'datetime', antes de filtro e reamostragem) é gravado em formato colunar,
+um arquivo .npy por coluna. As cargas seguintes abrem esses arquivos por
+memory-map, sem parse de texto.
+
+Uma entrada fica válida enquanto o CSV de origem mantiver caminho, tamanho e
+data de modificação; qualquer mudança no arquivo força a reconstrução. Dados
+derivados do mesmo CSV (ex.: a pirâmide de tempos gráficos) são guardados como
+variantes dentro da entrada e seguem a mesma regra. O índice de pregões dos
+CSVs (ver csv_index) fica em day_index/, também validado pela assinatura do CSV.
+
+Uso:
+    python -m backtest.dataset_cache --list
+    python -m backtest.dataset_cache --rebuild backtest/dados/*.csv
+    python -m backtest.dataset_cache --invalidate            # todas as entradas
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".cache" / "datasets"
+CACHE_FORMAT_VERSION = 1
+
+
+class DatasetCache:
+    """Cache colunar (NumPy .npy + memory-map) de DataFrames lidos de CSV"""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        Args:
+            cache_dir: Diretório das entradas (padrão: backtest/.cache/datasets)
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+
+    def entry_dir(self, source_path: str) -> Path:
+        """Diretório da entrada de um CSV (chave: caminho absoluto)"""
+        key = hashlib.sha1(str(Path(source_path).resolve()).encode('utf-8')).hexdigest()[:16]
+        return self.cache_dir / f"{Path(source_path).stem}-{key}"
+
+    def day_index_path(self, source_path: str) -> Path:
+        """Arquivo do índice de pregões do CSV (ver CsvDayIndex.save)"""
+        return self.cache_dir / "day_index" / f"{self.entry_dir(source_path).name}.npz"
+
+    def load(self, source_path: str, variant: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """Abre a entrada do CSV (ou uma variante) por memory-map; None se não existe ou está desatualizada"""
+        entry = self.entry_dir(source_path)
+        if variant is not None:
+            entry = entry / variant
+        meta = self._read_meta(entry)
+        if meta is None or meta['source'] != source_signature(source_path):
+            return None
+
+        try:
+            # mmap_mode='c': páginas lidas sob demanda; escritas ficam em memória, sem tocar o arquivo
+            columns = {}
+            for i, column in enumerate(meta['columns']):
+                values = np.asarray(np.load(entry / f"col_{i}.npy", mmap_mode='c'))
+                if column['kind'] == 'category':
+                    # Colunas de texto: códigos + categorias (-1 = ausente)
+                    values = pd.Categorical.from_codes(values, categories=column['categories'])
+                columns[column['name']] = values
+            index = np.asarray(np.load(entry / "index.npy", mmap_mode='c'))
+        except (OSError, ValueError):
+            return None
+
+        data = pd.DataFrame(columns, copy=False)
+        data.index = pd.DatetimeIndex(index, name=meta['index_name'])
+        return data
+
+    def store(self, source_path: str, data: pd.DataFrame, variant: Optional[str] = None):
+        """
+        Grava o DataFrame como a entrada do CSV (substitui a anterior de forma atômica).
+
+        Gravar a entrada principal descarta as variantes antigas; uma variante é
+        gravada dentro da entrada, ao lado dos dados principais.
+        """
+        entry = self.entry_dir(source_path)
+        if variant is not None:
+            entry = entry / variant
+        tmp = entry.with_name(f"{entry.name}.tmp-{os.getpid()}")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+
+        columns = []
+        for i, name in enumerate(data.columns):
+            series = data[name]
+            if series.dtype.kind in 'biuf':
+                np.save(tmp / f"col_{i}.npy", series.to_numpy())
+                columns.append({'name': name, 'kind': 'numeric'})
+            else:
+                codes, categories = pd.factorize(series)
+                np.save(tmp / f"col_{i}.npy", codes.astype(np.int32))
+                columns.append({'name': name, 'kind': 'category',
+                                'categories': [str(c) for c in categories]})
+        np.save(tmp / "index.npy", data.index.to_numpy())
+
+        meta = {
+            'version': CACHE_FORMAT_VERSION,
+            'source': source_signature(source_path),
+            'index_name': data.index.name,
+            'rows': len(data),
+            'columns': columns,
+        }
+        with open(tmp / "meta.json", 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp, entry)
+
+    def invalidate(self, source_path: Optional[str] = None) -> int:
+        """Remove a entrada de um CSV (ou todas, se source_path é None); retorna quantas removeu"""
+        if source_path is not None:
+            targets = [self.entry_dir(source_path)]
+            index = self.day_index_path(source_path)
+            if index.exists():
+                index.unlink()
+        elif self.cache_dir.exists():
+            targets = [p for p in self.cache_dir.iterdir() if p.is_dir() and p.name != "day_index"]
+            shutil.rmtree(self.cache_dir / "day_index", ignore_errors=True)
+        else:
+            targets = []
+
+        removed = 0
+        for entry in targets:
+            if entry.exists():
+                shutil.rmtree(entry)
+                removed += 1
+        return removed
+
+    def entries(self) -> List[Dict]:
+        """Metadados de todas as entradas, com indicação de validade"""
+        if not self.cache_dir.exists():
+            return []
+        result = []
+        for entry in sorted(self.cache_dir.iterdir()):
+            meta = self._read_meta(entry)
+            if meta is None:
+                continue
+            path = meta['source']['path']
+            meta['valid'] = os.path.exists(path) and meta['source'] == source_signature(path)
+            meta['size_on_disk'] = sum(f.stat().st_size for f in entry.rglob('*') if f.is_file())
+            result.append(meta)
+        return result
+
+    @staticmethod
+    def _read_meta(entry: Path) -> Optional[Dict]:
+        try:
+            with open(entry / "meta.json", encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('version') != CACHE_FORMAT_VERSION:
+            return None
+        return meta
+
+
+def source_signature(source_path: str) -> Dict:
+    """Identificação do CSV de origem: caminho absoluto, tamanho e data de modificação"""
+    stat = os.stat(source_path)
+    return {'path': str(Path(source_path).resolve()), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def main():
+    """CLI de manutenção do cache"""
+    parser = argparse.ArgumentParser(description='Cache colunar dos CSVs de dados')
+    parser.add_argument('files', nargs='*', help='CSVs alvo (padrão: todos)')
+    parser.add_argument('--cache-dir', help='Diretório do cache (padrão: backtest/.cache/datasets)')
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument('--list', action='store_true', help='Lista as entradas do cache')
+    action.add_argument('--invalidate', action='store_true', help='Remove as entradas dos CSVs (ou todas)')
+    action.add_argument('--rebuild', action='store_true', help='Reconstrói as entradas dos CSVs informados')
+    args = parser.parse_args()
+
+    cache = DatasetCache(args.cache_dir)
+
+    if args.list:
+        entries = cache.entries()
+        if not entries:
+            print("Cache vazio")
+        for meta in entries:
+            status = "ok" if meta['valid'] else "desatualizado"
+            print(f"{meta['source']['path']}: {meta['rows']} linhas, "
+                  f"{meta['size_on_disk'] / 1e6:.1f} MB ({status})")
+
+    elif args.invalidate:
+        if args.files:
+            removed = sum(cache.invalidate(path) for path in args.files)
+        else:
+            removed = cache.invalidate()
+        print(f"{removed} entrada(s) removida(s) de {cache.cache_dir}")
+
+    elif args.rebuild:
+        if not args.files:
+            parser.error("--rebuild requer os CSVs a reconstruir")
+        from .data_provider import DataProvider
+        provider = DataProvider(verbose=False, cache=cache)
+        for path in args.files:
+            cache.invalidate(path)
+            try:
+                provider.get_data(symbol=path, start_date='', end_date='',
+                                  source='local_csv', target_interval='1min')
+            except ValueError as e:
+                print(f"{path}: {e}")
+                continue
+            if cache.load(path) is None:
+                print(f"{path}: fora do formato padrão, não armazenado")
+            else:
+                print(f"{path}: gravado em {cache.entry_dir(path)}")
+
+
+if __name__ == "__main__":
+    main()
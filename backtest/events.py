@@ -0,0 +1,130 @@
+"""
+Eventos estruturados emitidos pelo BacktestEngine.
+
+Substitui os print() do loop principal por um destino plugável:
+- NullEventSink: descarta tudo (custo zero, o engine nem monta os eventos)
+- MemoryEventSink: acumula os eventos em memória
+- JsonlEventSink: grava os eventos em arquivo JSONL (com buffer)
+- ConsoleEventSink: imprime no console, como o engine fazia originalmente
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+import pandas as pd
+
+# Tipos de evento
+EVENT_ENTRY = 'entry'
+EVENT_EXIT = 'exit'
+EVENT_BLOCK = 'block'
+EVENT_DAILY_RESET = 'daily_reset'
+
+
+class EventSink:
+    """Interface base para destinos de eventos do engine"""
+
+    # Quando False, o engine não monta nem envia eventos
+    enabled = True
+
+    def emit(self, event: str, payload: Dict[str, Any]):
+        """Recebe um evento (tipo + dados)"""
+        raise NotImplementedError
+
+    def close(self):
+        """Libera recursos (arquivos, buffers)"""
+        pass
+
+
+class NullEventSink(EventSink):
+    """Descarta todos os eventos"""
+
+    enabled = False
+
+    def emit(self, event: str, payload: Dict[str, Any]):
+        pass
+
+
+class MemoryEventSink(EventSink):
+    """Acumula os eventos em memória para análise posterior"""
+
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+
+    def emit(self, event: str, payload: Dict[str, Any]):
+        payload['event'] = event
+        self.events.append(payload)
+
+    def clear(self):
+        """Remove os eventos acumulados"""
+        self.events.clear()
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Converte os eventos acumulados em DataFrame"""
+        return pd.DataFrame(self.events)
+
+
+class JsonlEventSink(EventSink):
+    """Grava os eventos em arquivo JSONL (um objeto JSON por linha)"""
+
+    def __init__(self, file_path: Union[str, Path], buffer_size: int = 1000):
+        self.file_path = Path(file_path)
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self.buffer_size = buffer_size
+        self._buffer: List[str] = []
+        self._file = open(self.file_path, 'a', encoding='utf-8')
+
+    def emit(self, event: str, payload: Dict[str, Any]):
+        payload['event'] = event
+        self._buffer.append(json.dumps(payload, default=str, ensure_ascii=False))
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Descarrega o buffer no arquivo"""
+        if self._buffer:
+            self._file.write('\n'.join(self._buffer) + '\n')
+            self._buffer.clear()
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+class ConsoleEventSink(EventSink):
+    """
+    Imprime os eventos no console.
+    verbosity 1: entradas e saídas; verbosity 2: também bloqueios e viradas de dia.
+    """
+
+    def __init__(self, verbosity: int = 1):
+        self.verbosity = verbosity
+
+    def emit(self, event: str, payload: Dict[str, Any]):
+        if event == EVENT_ENTRY:
+            print(f"Posição {payload['direction']} aberta em {payload['time']}: {payload['price']:.2f}")
+        elif event == EVENT_EXIT:
+            print(f"Posição fechada em {payload['time']}: {payload['price']} (Resultado: {payload['result']:.2f})")
+        elif self.verbosity >= 2:
+            if event == EVENT_BLOCK:
+                print(f"Entradas bloqueadas em {payload['time']}: {payload['reason']}")
+            elif event == EVENT_DAILY_RESET:
+                print(f"Novo dia de operação: {payload['date']}")
+
+
+class TeeEventSink(EventSink):
+    """Repassa cada evento para vários destinos"""
+
+    def __init__(self, *sinks: EventSink):
+        self.sinks = [sink for sink in sinks if sink.enabled]
+        self.enabled = bool(self.sinks)
+
+    def emit(self, event: str, payload: Dict[str, Any]):
+        for sink in self.sinks:
+            sink.emit(event, dict(payload))
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
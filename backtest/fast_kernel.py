@@ -0,0 +1,457 @@
+"""
+Kernel rápido (baseado em arrays) para o loop barra a barra do BacktestEngine.
+
+Reproduz exatamente a lógica do caminho padrão (_execute_bar, _check_exit_conditions,
+_open_position e _close_position), mas lê os dados de arrays NumPy contíguos
+e mantém o estado em objetos compactos com __slots__, eliminando o custo de
+self.data.iloc, Series.get e do dicionário strategy_state a cada barra.
+"""
+
+from datetime import date
+from typing import Optional
+
+import numpy as np
+
+from .ntsl_parser import NTSLStrategy
+from .events import EVENT_ENTRY, EVENT_EXIT, EVENT_BLOCK, EVENT_DAILY_RESET
+
+
+class FastConfig:
+    """Parâmetros da estratégia resolvidos uma única vez (strategy.inputs/risk_params)"""
+
+    __slots__ = (
+        'lucro_max', 'risco_max', 'max_loss_consec', 'max_trades',
+        'usar_janela', 'hora_inicio', 'hora_fim', 'hora_encerramento',
+        'pb_start_hour', 'pb_start_min', 'pb_end_hour', 'pb_end_min',
+        'peso_lw', 'peso_pb', 'peso_bb', 'score_minimo', 'quantity',
+        'fator_stop', 'fator_gain', 'usar_stop_loss', 'usar_stop_gain',
+        'usar_break_even', 'gatilho_be', 'usar_trailing', 'gatilho_ts', 'distancia_ts',
+        'pontos_por_tick', 'custo_operacao'
+    )
+
+    def __init__(self, strategy: NTSLStrategy):
+        inputs = strategy.inputs
+        risk = strategy.risk_params
+
+        self.lucro_max = risk.get('lucroMaximoDiario', 0)
+        self.risco_max = risk.get('riscoMaximoDiario', 0)
+        self.max_loss_consec = risk.get('maxLossConsecutivo', 999)
+        self.max_trades = risk.get('maxTradesPorDia', 999)
+
+        self.usar_janela = inputs.get('usarJanelaHoraria', True)
+        self.hora_inicio = inputs.get('horaInicioGlobal', 905)
+        self.hora_fim = inputs.get('horaFimGlobal', 1745)
+        self.hora_encerramento = inputs.get('horaEncerramento', 1750)
+
+        self.pb_start_hour, self.pb_start_min = divmod(inputs.get('pb_horaInicio', 900), 100)
+        self.pb_end_hour, self.pb_end_min = divmod(inputs.get('pb_horaFim', 915), 100)
+
+        self.peso_lw = float(inputs.get('peso_LarryWilliams', 0.4))
+        self.peso_pb = float(inputs.get('peso_PrimeiraBarra', 0.3))
+        self.peso_bb = float(inputs.get('peso_Bollinger', 0.3))
+        self.score_minimo = float(inputs.get('scoreMinimoEntrada', 0.5))
+
+        self.quantity = int(risk.get('contratosPorOperacao', 1))
+        self.fator_stop = risk.get('fatorAtrStop', 2.0)
+        self.fator_gain = risk.get('fatorAtrGain', 3.0)
+        self.usar_stop_loss = inputs.get('usarStopLoss', True)
+        self.usar_stop_gain = inputs.get('usarStopGain', True)
+
+        self.usar_break_even = inputs.get('usarBreakEven', False)
+        self.gatilho_be = inputs.get('gatilhoBreakevenAtr', 0.8)
+        self.usar_trailing = inputs.get('usarTrailingStop', False)
+        self.gatilho_ts = inputs.get('gatilhoTrailingAtr', 1.5)
+        self.distancia_ts = inputs.get('distanciaTrailingAtr', 1.2)
+
+        self.pontos_por_tick = float(inputs.get('pontosPorTick', 1.0))
+        self.custo_operacao = float(inputs.get('custoPorContrato', 0.0))
+
+
+class FastState:
+    """Estado compacto da estratégia (equivalente ao dicionário strategy_state)"""
+
+    __slots__ = (
+        'ultimo_dia', 'trades_hoje', 'loss_consecutivo', 'resultado_diario',
+        'posicao_aberta', 'bloqueado_meta', 'bloqueado_loss_consec',
+        'primeira_barra_definida', 'maxima_pb', 'minima_pb',
+        'position', 'trade', 'realized'
+    )
+
+    @classmethod
+    def initial(cls) -> 'FastState':
+        """Estado inicial (equivalente ao strategy_state de um engine novo)"""
+        state = cls()
+        state.ultimo_dia = -1
+        state.trades_hoje = 0
+        state.loss_consecutivo = 0
+        state.resultado_diario = 0.0
+        state.posicao_aberta = False
+        state.bloqueado_meta = False
+        state.bloqueado_loss_consec = False
+        state.primeira_barra_definida = False
+        state.maxima_pb = 0.0
+        state.minima_pb = 999999.0
+        state.position = 0
+        state.trade = None
+        state.realized = 0.0
+        return state
+
+    @classmethod
+    def from_engine(cls, engine) -> 'FastState':
+        """Cria o estado a partir do strategy_state atual do engine"""
+        st = engine.strategy_state
+        state = cls()
+        ultimo = st['ultimoDia']
+        state.ultimo_dia = ultimo.year * 10000 + ultimo.month * 100 + ultimo.day if ultimo is not None else -1
+        state.trades_hoje = st['tradesHoje']
+        state.loss_consecutivo = st['lossConsecutivo']
+        state.resultado_diario = st['resultadoDiario']
+        state.posicao_aberta = st['posicaoAberta']
+        state.bloqueado_meta = st['bloqueadoMeta']
+        state.bloqueado_loss_consec = st['bloqueadoLossConsec']
+        state.primeira_barra_definida = st['primeiraBarraDefinida']
+        state.maxima_pb = st['maximaPrimeiraBarra']
+        state.minima_pb = st['minimaPrimeiraBarra']
+        state.position = engine.current_position
+        state.trade = engine.current_trade
+        state.realized = engine.realized_pnl
+        return state
+
+    def write_back(self, engine):
+        """Devolve o estado ao engine (strategy_state, posição e trade atual)"""
+        st = engine.strategy_state
+        if self.ultimo_dia >= 0:
+            st['ultimoDia'] = date(self.ultimo_dia // 10000, self.ultimo_dia // 100 % 100, self.ultimo_dia % 100)
+        st['tradesHoje'] = self.trades_hoje
+        st['lossConsecutivo'] = self.loss_consecutivo
+        st['resultadoDiario'] = self.resultado_diario
+        st['posicaoAberta'] = self.posicao_aberta
+        st['bloqueadoMeta'] = self.bloqueado_meta
+        st['bloqueadoLossConsec'] = self.bloqueado_loss_consec
+        st['primeiraBarraDefinida'] = self.primeira_barra_definida
+        st['maximaPrimeiraBarra'] = self.maxima_pb
+        st['minimaPrimeiraBarra'] = self.minima_pb
+        engine.current_position = self.position
+        engine.current_trade = self.trade
+        engine.realized_pnl = self.realized
+
+
+class FastBarKernel:
+    """
+    Executa o loop barra a barra sobre arrays NumPy.
+    Os dados (OHLC, ATR, sinais pré-calculados e campos de tempo) são extraídos
+    do DataFrame preparado pelo engine uma única vez, antes do loop.
+    """
+
+    def __init__(self, engine):
+        from .backtest_engine import Trade  # Import tardio para evitar ciclo
+
+        self.trade_cls = Trade
+        self.engine = engine
+        self.config = FastConfig(engine.strategy)
+        self.state = FastState.from_engine(engine)
+        self.trades = engine.trades  # TradeLog
+        self.equity: np.ndarray = engine.equity
+        self.track_equity = engine.track_equity
+        self.events = engine.events
+        self.emit_events = engine.emit_events
+
+        data = engine.data
+        index = data.index
+        self.index = index
+        self.close = data['close'].to_numpy(dtype=np.float64).tolist()
+        self.high = data['high'].to_numpy(dtype=np.float64).tolist()
+        self.low = data['low'].to_numpy(dtype=np.float64).tolist()
+        if 'atr' in data.columns:
+            self.atr = data['atr'].to_numpy(dtype=np.float64).tolist()
+        else:
+            self.atr = [0] * len(data)
+        self.signal_lw = engine.signal_lw.tolist()
+        self.signal_bb = engine.signal_bb.tolist()
+        self.spread_ok = engine.spread_ok.tolist()
+        self.intrabar = engine.intrabar
+
+        # Campos de tempo (hora local da barra, inclusive para índices com fuso)
+        self.hour = index.hour.to_numpy().tolist()
+        self.minute = index.minute.to_numpy().tolist()
+        self.hhmm = (index.hour.to_numpy() * 100 + index.minute.to_numpy()).tolist()
+        self.day = (index.year.to_numpy() * 10000 + index.month.to_numpy() * 100 + index.day.to_numpy()).tolist()
+
+    def run(self):
+        """Executa todas as barras e devolve o estado ao engine"""
+        step = self.step
+        for i in range(len(self.close)):
+            step(i)
+        self.state.write_back(self.engine)
+
+    def step(self, i: int):
+        """Executa a lógica da estratégia para uma barra (equivalente a _execute_bar)"""
+        cfg = self.config
+        st = self.state
+
+        # 1. Atualizar controles diários
+        day = self.day[i]
+        if st.ultimo_dia != day:
+            st.ultimo_dia = day
+            st.trades_hoje = 0
+            st.resultado_diario = 0.0
+            st.bloqueado_meta = False
+            if self.emit_events:
+                timestamp = self.index[i]
+                self.events.emit(EVENT_DAILY_RESET, {'time': timestamp, 'date': timestamp.date()})
+        bloqueado_antes = st.bloqueado_meta
+        if cfg.lucro_max > 0 and st.resultado_diario >= cfg.lucro_max:
+            st.bloqueado_meta = True
+        if cfg.risco_max > 0 and st.resultado_diario <= -cfg.risco_max:
+            st.bloqueado_meta = True
+        if self.emit_events and st.bloqueado_meta and not bloqueado_antes:
+            self.events.emit(EVENT_BLOCK, {'time': self.index[i], 'reason': 'META_DIARIA',
+                                           'daily_result': st.resultado_diario})
+
+        # 1.1. Reconciliação de posição
+        if st.posicao_aberta and st.position == 0:
+            st.posicao_aberta = False
+
+        # 2. Encerramento de trade (stops, gains, fim da sessão)
+        is_after_close_time = self.hhmm[i] >= cfg.hora_encerramento
+        if st.position != 0:
+            if is_after_close_time:
+                self._close_position(i, "END_OF_SESSION")
+            else:
+                self._check_exit_conditions(i)
+
+        # 3. Entrada se não houver posição aberta
+        if st.position == 0 and not is_after_close_time:
+            self._check_entry_conditions(i)
+
+        # 4. Equity no final da barra
+        if self.track_equity:
+            equity = st.realized
+            trade = st.trade
+            if st.position != 0 and trade:
+                if trade.direction == 'LONG':
+                    equity += (self.close[i] - trade.entry_price) * trade.quantity * cfg.pontos_por_tick
+                else:
+                    equity += (trade.entry_price - self.close[i]) * trade.quantity * cfg.pontos_por_tick
+            self.equity[i] = equity
+
+    def _primeira_barra_signal(self, i: int) -> int:
+        """Setup Primeira Barra (V0045), com estado mantido em FastState"""
+        cfg = self.config
+        st = self.state
+        hour = self.hour[i]
+        minute = self.minute[i]
+        high = self.high[i]
+        low = self.low[i]
+
+        if (hour == cfg.pb_start_hour and minute >= cfg.pb_start_min) or \
+           (hour == cfg.pb_end_hour and minute <= cfg.pb_end_min):
+            if high > st.maxima_pb:
+                st.maxima_pb = high
+            if low < st.minima_pb:
+                st.minima_pb = low
+            return 0
+
+        if hour > cfg.pb_end_hour or (hour == cfg.pb_end_hour and minute > cfg.pb_end_min):
+            if not st.primeira_barra_definida:
+                st.primeira_barra_definida = True
+            if high > st.maxima_pb and self.high[i - 1] <= st.maxima_pb:
+                return 1
+            elif low < st.minima_pb and self.low[i - 1] >= st.minima_pb:
+                return -1
+
+        return 0
+
+    def _check_entry_conditions(self, i: int):
+        """Condições de entrada do orquestrador (equivalente a _check_entry_conditions)"""
+        cfg = self.config
+        st = self.state
+
+        if st.loss_consecutivo >= cfg.max_loss_consec:
+            if self.emit_events and not st.bloqueado_loss_consec:
+                self.events.emit(EVENT_BLOCK, {'time': self.index[i], 'reason': 'LOSS_CONSECUTIVO',
+                                               'loss_streak': st.loss_consecutivo})
+            st.bloqueado_loss_consec = True
+        if st.bloqueado_meta or st.bloqueado_loss_consec:
+            return
+        if st.trades_hoje >= cfg.max_trades:
+            return
+
+        if cfg.usar_janela:
+            hhmm = self.hhmm[i]
+            if not (cfg.hora_inicio <= hhmm < cfg.hora_fim):
+                return
+            if not self.spread_ok[i]:
+                return
+
+        sinal_lw = self.signal_lw[i]
+        sinal_pb = self._primeira_barra_signal(i)
+        sinal_bb = self.signal_bb[i]
+
+        score_compra = 0
+        score_venda = 0
+        if sinal_lw == 1:
+            score_compra += cfg.peso_lw
+        elif sinal_lw == -1:
+            score_venda += cfg.peso_lw
+        if sinal_pb == 1:
+            score_compra += cfg.peso_pb
+        elif sinal_pb == -1:
+            score_venda += cfg.peso_pb
+        if sinal_bb == 1:
+            score_compra += cfg.peso_bb
+        elif sinal_bb == -1:
+            score_venda += cfg.peso_bb
+
+        if score_compra >= cfg.score_minimo and score_compra > score_venda:
+            entry_type = 'BREAKOUT_LONG' if sinal_pb == 1 and cfg.peso_pb > 0 else None
+            self._open_position(i, 'LONG', entry_type)
+        elif score_venda >= cfg.score_minimo and score_venda > score_compra:
+            entry_type = 'BREAKOUT_SHORT' if sinal_pb == -1 and cfg.peso_pb > 0 else None
+            self._open_position(i, 'SHORT', entry_type)
+
+    def _open_position(self, i: int, direction: str, entry_type: Optional[str]):
+        """Abre nova posição (equivalente a _open_position)"""
+        cfg = self.config
+        st = self.state
+        quantity = cfg.quantity
+        st.position = quantity if direction == 'LONG' else -quantity
+
+        if entry_type == 'BREAKOUT_LONG':
+            entry_price = st.maxima_pb
+        elif entry_type == 'BREAKOUT_SHORT':
+            entry_price = st.minima_pb
+        else:
+            entry_price = self.close[i]
+
+        atr = self.atr[i]
+        if atr == 0:
+            return
+
+        stop_price = 0
+        gain_price = 0
+        if direction == 'LONG':
+            if cfg.usar_stop_loss:
+                stop_price = entry_price - (atr * cfg.fator_stop)
+            if cfg.usar_stop_gain:
+                gain_price = entry_price + (atr * cfg.fator_gain)
+        else:
+            if cfg.usar_stop_loss:
+                stop_price = entry_price + (atr * cfg.fator_stop)
+            if cfg.usar_stop_gain:
+                gain_price = entry_price - (atr * cfg.fator_gain)
+
+        timestamp = self.index[i]
+        st.trade = self.trade_cls(
+            entry_time=timestamp,
+            exit_time=None,
+            direction=direction,
+            entry_price=entry_price,
+            exit_price=None,
+            quantity=abs(quantity),
+            result=None,
+            status='OPEN',
+            stop_loss=stop_price if stop_price > 0 else None,
+            take_profit=gain_price if gain_price > 0 else None
+        )
+        st.posicao_aberta = True
+        st.trades_hoje += 1
+
+        if self.emit_events:
+            self.events.emit(EVENT_ENTRY, {
+                'time': timestamp, 'direction': direction, 'price': entry_price,
+                'quantity': abs(quantity), 'stop_loss': st.trade.stop_loss,
+                'take_profit': st.trade.take_profit, 'entry_type': entry_type
+            })
+
+    def _check_exit_conditions(self, i: int):
+        """Stop, Gain, Breakeven e Trailing (equivalente a _check_exit_conditions)"""
+        trade = self.state.trade
+        if trade is None or trade.status != 'OPEN':
+            return
+
+        cfg = self.config
+        atr = self.atr[i]
+        if atr == 0:
+            return
+        stop_at_open = trade.stop_loss
+
+        close_price = self.close[i]
+        high_price = self.high[i]
+        low_price = self.low[i]
+
+        if cfg.usar_break_even and trade.stop_loss < trade.entry_price:
+            if high_price >= trade.entry_price + (atr * cfg.gatilho_be):
+                trade.stop_loss = trade.entry_price
+
+        if cfg.usar_trailing:
+            if trade.direction == 'LONG' and high_price >= trade.entry_price + (atr * cfg.gatilho_ts):
+                novo_stop = close_price - (atr * cfg.distancia_ts)
+                if novo_stop > trade.stop_loss:
+                    trade.stop_loss = novo_stop
+            elif trade.direction == 'SHORT' and low_price <= trade.entry_price - (atr * cfg.gatilho_ts):
+                novo_stop = close_price + (atr * cfg.distancia_ts)
+                if novo_stop < trade.stop_loss:
+                    trade.stop_loss = novo_stop
+
+        # Intrabarra: stop da abertura da barra (ver BacktestEngine._check_exit_conditions)
+        stop_loss = stop_at_open if self.intrabar is not None else trade.stop_loss
+
+        if trade.direction == 'LONG':
+            hit_gain = bool(trade.take_profit) and high_price >= trade.take_profit
+            hit_stop = bool(stop_loss) and low_price <= stop_loss
+        else:
+            hit_gain = bool(trade.take_profit) and low_price <= trade.take_profit
+            hit_stop = bool(stop_loss) and high_price >= stop_loss
+        if not (hit_gain or hit_stop):
+            return
+        trade.stop_loss = stop_loss
+
+        if self.intrabar is not None:
+            touch = self.intrabar.first_touch(i, trade.direction, stop_loss, trade.take_profit)
+            if touch is not None:
+                self._close_position(i, touch[0], price=touch[1])
+                return
+
+        self._close_position(i, "TAKE_PROFIT" if hit_gain else "STOP_LOSS")
+
+    def _close_position(self, i: int, reason: str, price: Optional[float] = None):
+        """Fecha a posição atual no preço informado ou no fechamento da barra (equivalente a _close_position)"""
+        st = self.state
+        trade = st.trade
+        if trade is None:
+            return
+
+        cfg = self.config
+        exit_price = price if price is not None else self.close[i]
+        if trade.direction == 'LONG':
+            result = (exit_price - trade.entry_price) * trade.quantity
+        else:
+            result = (trade.entry_price - exit_price) * trade.quantity
+        result *= cfg.pontos_por_tick
+        result -= cfg.custo_operacao
+
+        timestamp = self.index[i]
+        trade.exit_time = timestamp
+        trade.exit_price = exit_price
+        trade.result = result
+        trade.status = 'CLOSED'
+        trade.exit_reason = reason
+        self.trades.append(trade)
+        st.realized += result
+
+        st.resultado_diario += result
+        if result < 0:
+            st.loss_consecutivo += 1
+        else:
+            st.loss_consecutivo = 0
+
+        st.position = 0
+        st.posicao_aberta = False
+        st.trade = None
+
+        if self.emit_events:
+            self.events.emit(EVENT_EXIT, {
+                'time': timestamp, 'direction': trade.direction, 'price': exit_price,
+                'result': result, 'reason': reason
+            })
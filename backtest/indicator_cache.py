@@ -0,0 +1,280 @@
+"""
+Cache de resultados de indicadores técnicos.
+
+Em varreduras de parâmetros a maioria das execuções altera apenas parâmetros de
+risco, de modo que SMA/EMA/BBANDS/ATR são idênticos entre milhares de execuções.
+O cache memoriza cada resultado pela chave
+(função, coluna de origem, parâmetros, impressão digital do conjunto de dados),
+com um nível em memória (LRU limitado em bytes) e um nível opcional em disco.
+"""
+
+import hashlib
+import os
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .technical_indicators import TechnicalIndicators
+
+# Colunas que participam da impressão digital do conjunto de dados
+FINGERPRINT_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+CacheKey = Tuple[str, str, tuple, str]
+
+
+def dataset_fingerprint(data: pd.DataFrame, columns=FINGERPRINT_COLUMNS) -> str:
+    """Calcula a impressão digital (hash) do índice e das colunas OHLCV"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.ascontiguousarray(data.index.asi8).tobytes())
+    for col in columns:
+        if col in data.columns:
+            h.update(col.encode())
+            h.update(np.ascontiguousarray(data[col].to_numpy()).tobytes())
+    return h.hexdigest()
+
+
+def _column_addresses(data: pd.DataFrame, columns=FINGERPRINT_COLUMNS) -> tuple:
+    """Endereços dos buffers das colunas (detecta colunas substituídas)"""
+    return tuple(
+        data[col].to_numpy().__array_interface__['data'][0] if col in data.columns else 0
+        for col in columns
+    ) + (len(data),)
+
+
+class IndicatorCache:
+    """
+    Cache de indicadores com LRU em memória (limitado em bytes) e nível opcional em disco.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, disk_dir: Optional[Union[str, Path]] = None):
+        """
+        Args:
+            max_bytes: Orçamento de memória do LRU
+            disk_dir: Diretório do nível em disco (None desativa)
+        """
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+        self._entries: 'OrderedDict[CacheKey, Tuple[np.ndarray, ...]]' = OrderedDict()
+        self._bytes = 0
+        self._fingerprints: Dict[int, tuple] = {}
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def fingerprint(self, data: pd.DataFrame) -> str:
+        """
+        Impressão digital do DataFrame, memorizada por objeto.
+        Alterações in-place em valores de um DataFrame já visto não são detectadas;
+        nesse caso use forget(data) antes da próxima execução.
+        """
+        addresses = _column_addresses(data)
+        memo = self._fingerprints.get(id(data))
+        if memo is not None:
+            ref, memo_addresses, fp = memo
+            if ref() is data and memo_addresses == addresses:
+                return fp
+
+        fp = dataset_fingerprint(data)
+        self._fingerprints = {k: v for k, v in self._fingerprints.items() if v[0]() is not None}
+        self._fingerprints[id(data)] = (weakref.ref(data), addresses, fp)
+        return fp
+
+    def forget(self, data: pd.DataFrame):
+        """Descarta a impressão digital memorizada de um DataFrame"""
+        self._fingerprints.pop(id(data), None)
+
+    def get_or_compute(self, key: CacheKey, compute: Callable[[], Tuple[np.ndarray, ...]]) -> Tuple[np.ndarray, ...]:
+        """Retorna o resultado em cache ou calcula, armazena e retorna"""
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+        value = self._load_from_disk(key)
+        if value is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            value = tuple(np.asarray(v, dtype=np.float64) for v in compute())
+            self._save_to_disk(key, value)
+
+        for arr in value:
+            arr.setflags(write=False)  # Os arrays são compartilhados entre execuções
+        self._store(key, value)
+        return value
+
+    def _store(self, key: CacheKey, value: Tuple[np.ndarray, ...]):
+        size = sum(arr.nbytes for arr in value)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = value
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= sum(arr.nbytes for arr in evicted)
+            self.evictions += 1
+
+    def _disk_path(self, key: CacheKey) -> Path:
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return self.disk_dir / f"{key[0]}_{digest}.npy"
+
+    def _load_from_disk(self, key: CacheKey) -> Optional[Tuple[np.ndarray, ...]]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        if not path.exists():
+            return None
+        try:
+            stacked = np.load(path, allow_pickle=False)
+        except (OSError, ValueError):
+            return None
+        return tuple(stacked[i].copy() for i in range(stacked.shape[0]))
+
+    def _save_to_disk(self, key: CacheKey, value: Tuple[np.ndarray, ...]):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.vstack(value), allow_pickle=False)
+        os.replace(tmp_path, path)  # Escrita atômica (vários processos podem gravar)
+
+    def stats(self) -> Dict[str, float]:
+        """Estatísticas de uso do cache"""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self._bytes
+        }
+
+    def clear(self, disk: bool = False):
+        """Limpa o nível em memória (e o nível em disco, se disk=True)"""
+        self._entries.clear()
+        self._bytes = 0
+        if disk and self.disk_dir:
+            for path in self.disk_dir.glob('*.npy'):
+                path.unlink()
+
+
+class CachedIndicators(TechnicalIndicators):
+    """
+    Fachada compatível com TechnicalIndicators que consulta o IndicatorCache.
+    Deve ser associada ao conjunto de dados (prepare/bind) antes do uso.
+    """
+
+    def __init__(self, cache: IndicatorCache):
+        self.cache = cache
+        self.dataset = None
+
+    def bind(self, fingerprint: str):
+        """Associa as próximas consultas ao conjunto de dados informado"""
+        self.dataset = fingerprint
+
+    def prepare(self, data: pd.DataFrame):
+        """Associa as próximas consultas ao DataFrame que será testado"""
+        self.bind(self.cache.fingerprint(data))
+
+    def _cached(self, name: str, params: tuple, data: Union[pd.Series, pd.DataFrame],
+                compute: Callable[[Union[pd.Series, pd.DataFrame]], tuple]) -> Tuple[pd.Series, ...]:
+        if self.dataset is None:
+            raise ValueError("CachedIndicators precisa de bind(fingerprint) antes do uso")
+        source = 'ohlc' if isinstance(data, pd.DataFrame) else data.name
+        if source is None:
+            # Série derivada (sem nome de coluna): não há chave segura, calcula direto
+            return tuple(pd.Series(np.asarray(v, dtype=np.float64), index=data.index) for v in compute(data))
+        values = self.cache.get_or_compute((name, source, params, self.dataset), lambda: compute(data))
+        return tuple(pd.Series(v, index=data.index) for v in values)
+
+    def sma(self, data: pd.Series, period: int) -> pd.Series:
+        return self._cached('sma', (period,), data, lambda d: (TechnicalIndicators.sma(d, period),))[0]
+
+    def ema(self, data: pd.Series, period: int) -> pd.Series:
+        return self._cached('ema', (period,), data, lambda d: (TechnicalIndicators.ema(d, period),))[0]
+
+    def smma(self, data: pd.Series, period: int) -> pd.Series:
+        return self._cached('smma', (period,), data, lambda d: (TechnicalIndicators.smma(d, period),))[0]
+
+    def wma(self, data: pd.Series, period: int) -> pd.Series:
+        return self._cached('wma', (period,), data, lambda d: (TechnicalIndicators.wma(d, period),))[0]
+
+    def atr(self, data: pd.DataFrame, period: int = 14) -> pd.Series:
+        return self._cached('atr', (period,), data, lambda d: (TechnicalIndicators.atr(d, period),))[0]
+
+    def bollinger_bands(self, data: pd.Series, period: int = 20, std_dev: float = 2.0,
+                        ma_type=0) -> Tuple[pd.Series, pd.Series, pd.Series]:
+        return self._cached('bollinger_bands', (period, std_dev, ma_type), data,
+                            lambda d: TechnicalIndicators.bollinger_bands(d, period, std_dev, ma_type=ma_type))
+
+    def adx(self, data: pd.DataFrame, period: int = 14) -> pd.Series:
+        return self._cached('adx', (period,), data, lambda d: (TechnicalIndicators.adx(d, period),))[0]
+
+    def dmi(self, data: pd.DataFrame, period: int = 14):
+        return self._cached('dmi', (period,), data, lambda d: TechnicalIndicators.dmi(d, period))
+
+    def rsi(self, data: pd.Series, period: int = 14) -> pd.Series:
+        return self._cached('rsi', (period,), data, lambda d: (TechnicalIndicators.rsi(d, period),))[0]
+
+    def macd(self, data: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9):
+        return self._cached('macd', (fast, slow, signal), data,
+                            lambda d: TechnicalIndicators.macd(d, fast, slow, signal))
+
+    def tema(self, data: pd.Series, period: int) -> pd.Series:
+        return self._cached('tema', (period,), data, lambda d: (TechnicalIndicators.tema(d, period),))[0]
+
+
+class WindowedIndicators(CachedIndicators):
+    """
+    Calcula cada indicador uma única vez sobre o histórico completo e entrega
+    apenas o trecho da janela testada (walk-forward). Além de evitar recálculos,
+    a janela recebe indicadores já aquecidos pelas barras anteriores a ela.
+    """
+
+    def __init__(self, cache: IndicatorCache, history: pd.DataFrame):
+        super().__init__(cache)
+        self.history = history
+        self.window: Optional[slice] = None
+
+    def prepare(self, data: pd.DataFrame):
+        """
+        Localiza a janela no histórico. O índice é ordenado e sem duplicatas, então
+        mesmo tamanho e mesmas extremidades identificam um trecho contíguo.
+        DataFrames que não são trechos do histórico são tratados como no CachedIndicators.
+        """
+        index = self.history.index
+        start = int(index.searchsorted(data.index[0])) if len(data) else 0
+        stop = start + len(data)
+        if (len(data) and stop <= len(index)
+                and index[start] == data.index[0] and index[stop - 1] == data.index[-1]):
+            self.window = slice(start, stop)
+            self.bind(self.cache.fingerprint(self.history))
+        else:
+            self.window = None
+            super().prepare(data)
+
+    def _cached(self, name: str, params: tuple, data: Union[pd.Series, pd.DataFrame],
+                compute: Callable[[Union[pd.Series, pd.DataFrame]], tuple]) -> Tuple[pd.Series, ...]:
+        if self.window is None:
+            return super()._cached(name, params, data, compute)
+        if isinstance(data, pd.DataFrame):
+            source, full = 'ohlc', self.history
+        elif data.name in self.history.columns:
+            source, full = data.name, self.history[data.name]
+        else:
+            return super()._cached(name, params, data, compute)
+        values = self.cache.get_or_compute((name, source, params, self.dataset), lambda: compute(full))
+        return tuple(pd.Series(v[self.window], index=data.index) for v in values)
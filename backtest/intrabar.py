@@ -0,0 +1,84 @@
+"""
+Simulação de execução intrabarra a partir das barras de 1 minuto.
+
+Quando os dados são reamostrados (5/15 min), a barra só informa máxima e mínima:
+não é possível saber se o stop ou o alvo foi atingido primeiro. O IntrabarIndex
+guarda, para cada barra reamostrada, o intervalo [início, fim) correspondente no
+DataFrame de 1 minuto (calculado uma única vez com searchsorted). Nas barras em
+que um nível foi tocado, apenas esses minutos são percorridos para decidir qual
+nível veio primeiro e executar no preço do nível.
+
+Os minutos são comparados com o stop vigente na abertura da barra. Break even e
+trailing dependem da máxima e do fechamento da barra inteira: ajustados ao fim
+dela, só valem a partir da barra seguinte (sem olhar minutos do futuro).
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def bar_duration(index: pd.DatetimeIndex, timeframe: Optional[str] = None) -> pd.Timedelta:
+    """Duração das barras: pelo tempo gráfico ('5min') ou, na falta dele, pelo menor intervalo do índice"""
+    if timeframe:
+        if timeframe.isdigit():
+            timeframe = f"{timeframe}min"
+        try:
+            return pd.Timedelta(timeframe)
+        except ValueError:
+            pass
+    diffs = np.diff(index.asi8)
+    diffs = diffs[diffs > 0]
+    if len(diffs) == 0:
+        raise ValueError("Não foi possível determinar a duração das barras")
+    return pd.Timedelta(int(diffs.min()), unit='ns')
+
+
+class IntrabarIndex:
+    """
+    Mapeia cada barra reamostrada para o intervalo de barras de 1 minuto que a compõe.
+
+    As barras reamostradas seguem o padrão do DataProvider (resample com rótulo e
+    fechamento à esquerda): a barra rotulada T cobre os minutos em [T, T + duração).
+    """
+
+    def __init__(self, base: pd.DataFrame, bars_index: pd.DatetimeIndex, duration: pd.Timedelta):
+        """
+        Args:
+            base: Dados de 1 minuto (open, high, low), índice ordenado
+            bars_index: Índice das barras reamostradas usadas no backtest
+            duration: Duração de cada barra reamostrada
+        """
+        base_index = base.index
+        self.starts = base_index.searchsorted(bars_index, side='left').tolist()
+        self.ends = base_index.searchsorted(bars_index + duration, side='left').tolist()
+        self.open = base['open'].to_numpy(dtype=np.float64).tolist()
+        self.high = base['high'].to_numpy(dtype=np.float64).tolist()
+        self.low = base['low'].to_numpy(dtype=np.float64).tolist()
+
+    def first_touch(self, bar_idx: int, direction: str, stop_loss: Optional[float],
+                    take_profit: Optional[float]) -> Optional[Tuple[str, float]]:
+        """
+        Determina qual nível foi atingido primeiro dentro da barra.
+
+        Se os dois níveis são tocados no mesmo minuto, assume o stop (hipótese
+        conservadora). Se o minuto já abre além do nível (gap), executa na abertura.
+
+        Returns:
+            ("TAKE_PROFIT" | "STOP_LOSS", preço de execução) ou None se nenhum
+            nível foi tocado nos minutos da barra
+        """
+        opens, highs, lows = self.open, self.high, self.low
+        for j in range(self.starts[bar_idx], self.ends[bar_idx]):
+            if direction == 'LONG':
+                if stop_loss and lows[j] <= stop_loss:
+                    return "STOP_LOSS", min(stop_loss, opens[j])
+                if take_profit and highs[j] >= take_profit:
+                    return "TAKE_PROFIT", max(take_profit, opens[j])
+            else:
+                if stop_loss and highs[j] >= stop_loss:
+                    return "STOP_LOSS", max(stop_loss, opens[j])
+                if take_profit and lows[j] <= take_profit:
+                    return "TAKE_PROFIT", min(take_profit, opens[j])
+        return None
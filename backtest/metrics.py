@@ -0,0 +1,195 @@
+"""
+Métricas de performance calculadas com NumPy.
+
+As métricas de trades vêm de um array com o resultado de cada trade fechado; as
+de risco vêm da curva de equity barra a barra (resultado realizado + não
+realizado) e do índice temporal das barras. Todo o cálculo é vetorizado e
+linear no número de barras e de trades, para poder rodar dentro de varreduras
+de parâmetros sobre milhões de barras.
+
+Convenções:
+- drawdown é medido contra o topo da equity, com o capital inicial (0) também
+  contando como topo, e reportado como valor negativo;
+- o resultado diário é a variação da equity no fechamento de cada pregão (o
+  primeiro pregão parte de 0);
+- Sharpe e Sortino usam o resultado diário em valor (sem taxa livre de risco),
+  anualizados por sqrt(252).
+"""
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+TRADING_DAYS_PER_YEAR = 252
+WEEKDAY_NAMES = ('Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sáb', 'Dom')
+
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Início e fim (exclusivo) de cada sequência contínua de True"""
+    edges = np.flatnonzero(np.diff(np.r_[0, mask.astype(np.int8), 0]))
+    return edges[::2], edges[1::2]
+
+
+def _ratio(numerator: float, denominator: float) -> float:
+    """numerator / denominator, com inf (numerador positivo) ou 0 quando o denominador é 0"""
+    if denominator > 0:
+        return float(numerator / denominator)
+    return float('inf') if numerator > 0 else 0.0
+
+
+def longest_streak(mask: np.ndarray) -> int:
+    """Maior sequência contínua de True"""
+    starts, ends = _runs(np.asarray(mask, dtype=bool))
+    return int((ends - starts).max()) if len(starts) else 0
+
+
+def trade_metrics(results: np.ndarray, cost_per_trade: float = 0.0) -> Dict[str, float]:
+    """
+    Métricas a partir dos resultados (líquidos) dos trades fechados, em ordem.
+
+    Args:
+        results: Resultado de cada trade (custos já deduzidos)
+        cost_per_trade: Custo por operação, só para reportar o custo total
+
+    Returns:
+        Métricas; vazio se não há trades
+    """
+    results = np.asarray(results, dtype=np.float64)
+    total_trades = len(results)
+    if total_trades == 0:
+        return {}
+
+    winners = results[results > 0]
+    losers = results[results < 0]
+    gross_profit = float(winners.sum())
+    gross_loss = float(losers.sum())
+    net_profit = float(results.sum())
+    avg_winner = float(winners.mean()) if len(winners) else 0.0
+    avg_loser = float(losers.mean()) if len(losers) else 0.0
+    # Valor esperado por trade: P(ganho) * ganho médio + P(perda) * perda média
+    expectancy = (len(winners) * avg_winner + len(losers) * avg_loser) / total_trades
+
+    return {
+        'net_profit': net_profit,
+        'gross_profit': gross_profit,
+        'gross_loss': gross_loss,  # Negativo, para exibição
+        'total_costs': cost_per_trade * total_trades,
+        'profit_factor': _ratio(gross_profit, -gross_loss),
+        'total_trades': total_trades,
+        'winning_trades': len(winners),
+        'losing_trades': len(losers),
+        'win_rate': len(winners) / total_trades * 100,
+        'avg_trade': net_profit / total_trades,
+        'avg_winner': avg_winner,
+        'avg_loser': avg_loser,
+        'payoff_ratio': _ratio(avg_winner, -avg_loser),
+        'expectancy': expectancy,
+        'expectancy_ratio': _ratio(expectancy, -avg_loser),  # Valor esperado em múltiplos da perda média
+        'max_consecutive_wins': longest_streak(results > 0),
+        'max_consecutive_losses': longest_streak(results < 0),
+    }
+
+
+# Resumo de trades do portfólio e do walk-forward (subconjunto de trade_metrics)
+SUMMARY_KEYS = ('net_profit', 'total_trades', 'win_rate', 'profit_factor')
+
+
+def trade_summary(results: np.ndarray) -> Dict[str, float]:
+    """SUMMARY_KEYS de trade_metrics; sem trades, tudo zerado (em vez do dicionário vazio)"""
+    metrics = trade_metrics(results)
+    if not metrics:
+        return {'net_profit': 0.0, 'total_trades': 0, 'win_rate': 0.0, 'profit_factor': 0.0}
+    return {key: metrics[key] for key in SUMMARY_KEYS}
+
+
+def daily_close_positions(index: pd.DatetimeIndex) -> np.ndarray:
+    """Posição da última barra de cada pregão (índice ordenado)"""
+    days = index.normalize().asi8
+    return np.flatnonzero(np.r_[days[1:] != days[:-1], True]) if len(days) else np.array([], dtype=np.int64)
+
+
+def daily_pnl(equity_curve: pd.Series) -> pd.Series:
+    """Resultado de cada pregão: variação da equity de fechamento a fechamento"""
+    equity = equity_curve.to_numpy(dtype=np.float64)
+    closes = daily_close_positions(equity_curve.index)
+    day_equity = equity[closes]
+    pnl = np.diff(day_equity, prepend=0.0)
+    return pd.Series(pnl, index=equity_curve.index[closes].normalize(), name='pnl')
+
+
+def weekday_pnl(equity_curve: pd.Series) -> pd.DataFrame:
+    """Resultado total, médio e número de pregões por dia da semana"""
+    daily = daily_pnl(equity_curve)
+    weekdays = daily.index.weekday.to_numpy()
+    values = daily.to_numpy()
+    count = np.bincount(weekdays, minlength=7)
+    total = np.bincount(weekdays, weights=values, minlength=7)
+    present = count > 0
+    return pd.DataFrame({
+        'pnl': total[present],
+        'avg_pnl': total[present] / count[present],
+        'days': count[present],
+    }, index=pd.Index(np.array(WEEKDAY_NAMES)[present], name='weekday'))
+
+
+def equity_metrics(equity: np.ndarray, index: pd.DatetimeIndex, net_profit: Optional[float] = None) -> Dict[str, float]:
+    """
+    Métricas de risco a partir da curva de equity barra a barra.
+
+    Args:
+        equity: Equity de cada barra (parte de 0)
+        index: Índice temporal das barras (ordenado)
+        net_profit: Resultado líquido para o fator de recuperação (padrão: equity final)
+
+    Returns:
+        Drawdown máximo (valor, barras e dias corridos), fator de recuperação,
+        Sharpe e Sortino diários anualizados e estatísticas por pregão
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    if len(equity) == 0:
+        return {}
+    if net_profit is None:
+        net_profit = float(equity[-1])
+
+    peak = np.maximum.accumulate(equity)
+    np.maximum(peak, 0.0, out=peak)  # O capital inicial (0) também é um topo
+    drawdown = equity - peak
+    max_drawdown = float(drawdown.min())
+
+    # Duração: do topo (barra anterior à queda) até a barra que volta ao topo (ou a última)
+    starts, ends = _runs(drawdown < 0)
+    if len(starts):
+        peaks = np.maximum(starts - 1, 0)
+        recoveries = np.minimum(ends, len(equity) - 1)
+        max_drawdown_bars = int((recoveries - peaks).max())
+        max_drawdown_days = float((index[recoveries] - index[peaks]).max() / pd.Timedelta(days=1))
+    else:
+        max_drawdown_bars, max_drawdown_days = 0, 0.0
+
+    closes = daily_close_positions(index)
+    daily = np.diff(equity[closes], prepend=0.0)
+    if len(daily) > 1:
+        std = float(daily.std(ddof=1))
+        downside = float(np.sqrt(np.mean(np.minimum(daily, 0.0) ** 2)))
+        scale = np.sqrt(TRADING_DAYS_PER_YEAR)
+        sharpe = float(daily.mean() / std * scale) if std > 0 else 0.0
+        sortino = float(daily.mean() / downside * scale) if downside > 0 else 0.0
+    else:
+        sharpe = sortino = 0.0
+
+    return {
+        'max_drawdown': max_drawdown,
+        'max_drawdown_bars': max_drawdown_bars,
+        'max_drawdown_days': max_drawdown_days,
+        'recovery_factor': _ratio(net_profit, -max_drawdown),
+        'sharpe_ratio': sharpe,
+        'sortino_ratio': sortino,
+        'trading_days': len(daily),
+        'positive_days': int((daily > 0).sum()),
+        'negative_days': int((daily < 0).sum()),
+        'avg_day': float(daily.mean()),
+        'best_day': float(daily.max()),
+        'worst_day': float(daily.min()),
+    }
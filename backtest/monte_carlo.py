@@ -0,0 +1,195 @@
+"""
+Simulação de Monte Carlo sobre a sequência de trades de um backtest.
+
+A partir dos resultados de BacktestResult.trades, gera N sequências alternativas:
+- shuffle: permutação dos trades (mesmo resultado final, ordem diferente)
+- bootstrap: sorteio com reposição de trades individuais
+- block: bootstrap em blocos circulares (preserva dependência entre trades vizinhos)
+
+Todas as sequências de um lote são geradas como uma matriz NumPy (caminhos x trades);
+os lotes existem apenas para limitar a memória (100k caminhos x 3k trades em float64
+ocupariam 2,4 GB de uma vez). Do conjunto são extraídas as distribuições de lucro
+final e drawdown máximo, faixas de percentis da curva de equity e o risco de ruína.
+
+Uso:
+    python -m backtest.monte_carlo --trades resultados/backtests/x_trades.csv \\
+        --paths 100000 --method block --block-size 10 --ruin 2000
+"""
+
+import argparse
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .backtest_engine import BacktestResult, Trade
+from .trade_log import TradeLog
+
+MC_METHODS = ('shuffle', 'bootstrap', 'block')
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+@dataclass
+class MonteCarloResult:
+    """Distribuições resultantes da simulação"""
+    method: str
+    n_paths: int
+    n_trades: int
+    final_profit: np.ndarray          # Lucro final de cada caminho
+    max_drawdown: np.ndarray          # Drawdown máximo (negativo) de cada caminho
+    equity_bands: pd.DataFrame        # Percentis da equity por trade amostrado (linhas) x percentil (colunas)
+    risk_of_ruin: Optional[float]     # Fração dos caminhos que atingem a perda de ruína
+    percentiles: Sequence[float]
+
+    def summary(self) -> pd.DataFrame:
+        """Percentis do lucro final e do drawdown máximo"""
+        return pd.DataFrame({
+            'net_profit': np.percentile(self.final_profit, self.percentiles),
+            'max_drawdown': np.percentile(self.max_drawdown, self.percentiles)
+        }, index=pd.Index([f"p{p:g}" for p in self.percentiles], name='percentil'))
+
+
+def trade_results(source: Union[BacktestResult, List[Trade], Sequence[float], np.ndarray]) -> np.ndarray:
+    """Extrai os resultados (fechados) de um BacktestResult, TradeLog, lista de Trade ou sequência numérica"""
+    if isinstance(source, BacktestResult):
+        source = source.trades
+    if isinstance(source, TradeLog):
+        return source.results
+    if len(source) and isinstance(source[0], Trade):
+        return np.array([t.result for t in source if t.result is not None], dtype=np.float64)
+    return np.asarray(source, dtype=np.float64)
+
+
+class MonteCarloSimulator:
+    """
+    Gera caminhos de Monte Carlo a partir dos resultados dos trades.
+    """
+
+    def __init__(self, source: Union[BacktestResult, List[Trade], Sequence[float], np.ndarray],
+                 seed: Optional[int] = None, max_chunk_bytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            source: BacktestResult, lista de trades ou resultados por trade
+            seed: Semente do gerador (resultados reproduzíveis)
+            max_chunk_bytes: Memória máxima da matriz de um lote
+        """
+        self.results = trade_results(source)
+        if len(self.results) == 0:
+            raise ValueError("Nenhum trade fechado para simular")
+        self.rng = np.random.default_rng(seed)
+        self.max_chunk_bytes = max_chunk_bytes
+
+    def _sample_indices(self, n_paths: int, method: str, block_size: int) -> np.ndarray:
+        """Matriz (n_paths x n_trades) de índices dos trades de cada caminho"""
+        n = len(self.results)
+        if method == 'shuffle':
+            return self.rng.permuted(np.broadcast_to(np.arange(n), (n_paths, n)), axis=1)
+        if method == 'bootstrap':
+            return self.rng.integers(0, n, size=(n_paths, n))
+        # Bootstrap em blocos circulares: blocos consecutivos a partir de inícios sorteados
+        n_blocks = -(-n // block_size)
+        starts = self.rng.integers(0, n, size=(n_paths, n_blocks, 1))
+        indices = (starts + np.arange(block_size)) % n
+        return indices.reshape(n_paths, n_blocks * block_size)[:, :n]
+
+    def run(self, n_paths: int = 10000, method: str = 'bootstrap', block_size: int = 10,
+            ruin_loss: Optional[float] = None, n_points: int = 100,
+            percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> MonteCarloResult:
+        """
+        Executa a simulação.
+
+        Args:
+            n_paths: Número de caminhos
+            method: 'shuffle', 'bootstrap' ou 'block'
+            block_size: Tamanho do bloco (método 'block')
+            ruin_loss: Perda (positiva, a partir do início) que caracteriza ruína; None não calcula
+            n_points: Quantidade de pontos da curva usados nas faixas de percentis
+            percentiles: Percentis reportados
+        """
+        if method not in MC_METHODS:
+            raise ValueError(f"Método não suportado: {method}. Disponíveis: {MC_METHODS}")
+        if n_paths <= 0:
+            raise ValueError("n_paths deve ser positivo")
+        if method == 'block' and block_size <= 0:
+            raise ValueError("block_size deve ser positivo")
+
+        n = len(self.results)
+        # Pontos amostrados da curva (número do trade, 1..n)
+        points = np.unique(np.linspace(0, n - 1, min(n_points, n)).round().astype(np.int64))
+
+        final_profit = np.empty(n_paths, dtype=np.float64)
+        max_drawdown = np.empty(n_paths, dtype=np.float64)
+        sampled = np.empty((n_paths, len(points)), dtype=np.float64)
+        ruined = np.zeros(n_paths, dtype=bool)
+
+        # Por elemento do lote: índices (int64) + equity + topo (float64)
+        chunk = max(1, self.max_chunk_bytes // (n * 24))
+        for start in range(0, n_paths, chunk):
+            stop = min(start + chunk, n_paths)
+            equity = self.results[self._sample_indices(stop - start, method, block_size)]
+            np.cumsum(equity, axis=1, out=equity)
+
+            final_profit[start:stop] = equity[:, -1]
+            sampled[start:stop] = equity[:, points]
+            if ruin_loss is not None:
+                ruined[start:stop] = equity.min(axis=1) <= -ruin_loss
+
+            peak = np.maximum.accumulate(equity, axis=1)
+            np.maximum(peak, 0.0, out=peak)  # O capital inicial (0) também é um topo
+            np.subtract(equity, peak, out=peak)
+            max_drawdown[start:stop] = peak.min(axis=1)
+
+        equity_bands = pd.DataFrame(
+            np.percentile(sampled, percentiles, axis=0).T,
+            index=pd.Index(points + 1, name='trade'),
+            columns=[f"p{p:g}" for p in percentiles]
+        )
+
+        return MonteCarloResult(
+            method=method,
+            n_paths=n_paths,
+            n_trades=n,
+            final_profit=final_profit,
+            max_drawdown=max_drawdown,
+            equity_bands=equity_bands,
+            risk_of_ruin=float(ruined.mean()) if ruin_loss is not None else None,
+            percentiles=tuple(percentiles)
+        )
+
+
+def main():
+    """Função principal (CLI)"""
+    parser = argparse.ArgumentParser(description='Monte Carlo sobre os trades de um backtest')
+    parser.add_argument('--trades', required=True, help='CSV de trades exportado (coluna result)')
+    parser.add_argument('--paths', '-n', type=int, default=10000, help='Número de caminhos')
+    parser.add_argument('--method', choices=MC_METHODS, default='bootstrap', help='Método de reamostragem')
+    parser.add_argument('--block-size', type=int, default=10, help='Tamanho do bloco (método block)')
+    parser.add_argument('--ruin', type=float, help='Perda que caracteriza ruína (ex: capital alocado)')
+    parser.add_argument('--seed', type=int, help='Semente do gerador aleatório')
+    parser.add_argument('--output', '-o', help='CSV para salvar as faixas de percentis da equity')
+
+    args = parser.parse_args()
+
+    trades = pd.read_csv(args.trades)
+    if 'accepted' in trades.columns:
+        trades = trades[trades['accepted'].astype(bool)]  # Trades descartados pelo portfólio
+    results = trades['result'].dropna().to_numpy(dtype=np.float64)
+
+    start = time.perf_counter()
+    mc = MonteCarloSimulator(results, seed=args.seed).run(
+        args.paths, args.method, block_size=args.block_size, ruin_loss=args.ruin)
+    print(f"Monte Carlo ({mc.method}): {mc.n_paths} caminhos x {mc.n_trades} trades "
+          f"em {time.perf_counter() - start:.1f}s\n")
+    print(mc.summary().round(2).to_string())
+    if mc.risk_of_ruin is not None:
+        print(f"\nRisco de ruína (perda de {args.ruin:.2f}): {mc.risk_of_ruin * 100:.2f}%")
+
+    if args.output:
+        mc.equity_bands.to_csv(args.output)
+        print(f"\nFaixas de percentis salvas em: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,848 @@
+"""
+Tokenizador e parser recursivo descendente para NTSL.
+
+O código é lido em uma única passada (um regex compilado percorre o texto e
+descarta espaços e comentários) e convertido em uma AST com as seções do script:
+inputs, constantes, variáveis, funções/procedimentos e o bloco principal. Os
+blocos begin/end são casados pela gramática, então blocos aninhados dentro de
+funções não são confundidos com o fim da função.
+
+Sinônimos em português aceitos: inicio/fim, se/entao/senao, para/ate/faca,
+enquanto/faca, e/ou/nao, verdadeiro/falso, parametro.
+
+O resultado do parse pode ser guardado em disco (ParseCache), com chave no hash
+do conteúdo: um arquivo não alterado não é parseado de novo.
+
+Uso:
+    python -m backtest.ntsl_ast estrategias/automations/orquestrador_moderado_1.txt
+    python -m backtest.ntsl_ast --bench estrategias     # vazão sobre o corpus
+"""
+
+import argparse
+import hashlib
+import os
+import pickle
+import re
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Union
+
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".cache" / "ntsl"
+AST_FORMAT_VERSION = 1
+
+
+class NTSLSyntaxError(ValueError):
+    """Erro de sintaxe NTSL, com linha e coluna da ocorrência"""
+
+    def __init__(self, message: str, line: int, column: int):
+        super().__init__(f"linha {line}, coluna {column}: {message}")
+        self.line = line
+        self.column = column
+
+
+# ================================================================
+# TOKENIZADOR
+# ================================================================
+
+class Token(NamedTuple):
+    kind: str    # 'name', 'number', 'string', 'op' ou 'eof'
+    text: str    # Texto original
+    key: str     # Texto em minúsculas (nomes) ou o próprio texto
+    start: int   # Posição no código-fonte
+
+
+_TOKEN_RE = re.compile(r'''
+    (?P<space>[\s\ufeff]+)
+  | (?P<comment>//[^\n]*|\{[^}]*\})
+  | (?P<number>0[xX][0-9A-Fa-f]+|\$[0-9A-Fa-f]+|\d+(?:\.(?!\.)\d*)?(?:[eE][-+]?\d+)?|\.\d+)
+  | (?P<name>[^\W\d]\w*)
+  | (?P<string>"[^"\n]*"|'[^'\n]*')
+  | (?P<op>:=|<>|<=|>=|\.\.|[-+*/=<>()\[\];:,.|])
+  | (?P<error>.)
+''', re.VERBOSE | re.DOTALL)
+
+
+def tokenize(source: str) -> List[Token]:
+    """Converte o código em tokens (espaços e comentários são descartados)"""
+    tokens = []
+    append = tokens.append
+    for match in _TOKEN_RE.finditer(source):
+        kind = match.lastgroup
+        if kind == 'space' or kind == 'comment':
+            continue
+        text = match.group()
+        if kind == 'name':
+            append(Token(kind, text, text.lower(), match.start()))
+        elif kind == 'error':
+            message = "comentário '{' sem '}'" if text == '{' else f"caractere inesperado {text!r}"
+            raise _syntax_error(source, match.start(), message)
+        else:
+            append(Token(kind, text, text, match.start()))
+    append(Token('eof', '', '', len(source)))
+    return tokens
+
+
+def _syntax_error(source: str, position: int, message: str) -> NTSLSyntaxError:
+    line = source.count('\n', 0, position) + 1
+    column = position - (source.rfind('\n', 0, position) + 1) + 1
+    return NTSLSyntaxError(message, line, column)
+
+
+# ================================================================
+# AST
+# ================================================================
+
+@dataclass
+class Literal:
+    """Número, texto ou booleano"""
+    value: Any
+
+
+@dataclass
+class Name:
+    """Identificador (variável, input, série de preço ou função sem argumentos)"""
+    name: str
+
+
+@dataclass
+class Attribute:
+    """Acesso a membro, ex.: win.close"""
+    value: 'Expr'
+    attr: str
+
+
+@dataclass
+class Call:
+    """Chamada de função ou indicador"""
+    func: str
+    args: List['Expr']
+
+
+@dataclass
+class Index:
+    """Valor de barras anteriores, ex.: Close[1]"""
+    value: 'Expr'
+    offset: 'Expr'
+
+
+@dataclass
+class Output:
+    """Linha de um indicador com várias saídas, ex.: BollingerBands(2, 20, 0)|1|"""
+    value: 'Expr'
+    line: 'Expr'
+
+
+@dataclass
+class UnaryOp:
+    op: str        # '-', '+' ou 'not'
+    operand: 'Expr'
+
+
+@dataclass
+class BinOp:
+    op: str        # '+', '-', '*', '/', 'div', 'mod', '=', '<>', '<', '>', '<=', '>=', 'and', 'or', 'xor'
+    left: 'Expr'
+    right: 'Expr'
+
+
+Expr = Union[Literal, Name, Attribute, Call, Index, Output, UnaryOp, BinOp]
+
+
+@dataclass
+class Block:
+    """begin ... end; start/end delimitam o conteúdo no código-fonte"""
+    body: List['Stmt']
+    start: int
+    end: int
+
+
+@dataclass
+class Assign:
+    target: Expr   # Name ou Index
+    value: Expr
+
+
+@dataclass
+class CallStatement:
+    """Chamada usada como comando, ex.: BuyAtMarket; ou Plot(x);"""
+    call: Call
+
+
+@dataclass
+class If:
+    test: Expr
+    body: 'Stmt'
+    orelse: Optional['Stmt'] = None
+
+
+@dataclass
+class For:
+    var: str
+    start: Expr
+    stop: Expr
+    body: 'Stmt'
+    downto: bool = False
+
+
+@dataclass
+class While:
+    test: Expr
+    body: 'Stmt'
+
+
+Stmt = Union[Block, Assign, CallStatement, If, For, While]
+
+
+@dataclass
+class InputDecl:
+    """Nome(valor); text é o valor como escrito no código"""
+    name: str
+    value: Expr
+    text: str
+
+
+@dataclass
+class ConstDecl:
+    name: str
+    value: Expr
+
+
+@dataclass
+class VarDecl:
+    """a, b: Tipo; (type_name como escrito, inclusive 'array[1..10] of float')"""
+    names: List[str]
+    type_name: str
+
+
+@dataclass
+class FunctionDef:
+    """
+    function/procedure com parâmetros, variáveis locais e corpo.
+
+    start/end delimitam a definição inteira no código-fonte; body_start é a
+    posição logo após o cabeçalho (início das variáveis locais ou do corpo).
+    """
+    kind: str
+    name: str
+    params: List[VarDecl]
+    return_type: Optional[str]
+    variables: List[VarDecl]
+    body: Block
+    start: int
+    body_start: int
+    end: int
+
+
+@dataclass
+class Program:
+    inputs: List[InputDecl] = field(default_factory=list)
+    constants: List[ConstDecl] = field(default_factory=list)
+    variables: List[VarDecl] = field(default_factory=list)
+    functions: List[FunctionDef] = field(default_factory=list)
+    main: Optional[Block] = None
+
+
+# ================================================================
+# PARSER
+# ================================================================
+
+INPUT_WORDS = {'input', 'parametro', 'parametros', 'parâmetro', 'parâmetros'}
+BEGIN_WORDS = {'begin', 'inicio', 'início'}
+END_WORDS = {'end', 'fim'}
+IF_WORDS = {'if', 'se'}
+THEN_WORDS = {'then', 'entao', 'então'}
+ELSE_WORDS = {'else', 'senao', 'senão'}
+FOR_WORDS = {'for', 'para'}
+TO_WORDS = {'to', 'ate', 'até'}
+DO_WORDS = {'do', 'faca', 'faça'}
+WHILE_WORDS = {'while', 'enquanto'}
+NOT_WORDS = {'not', 'nao', 'não'}
+OR_WORDS = {'or': 'or', 'ou': 'or', 'xor': 'xor'}
+AND_WORDS = {'and', 'e'}
+TRUE_WORDS = {'true', 'verdadeiro'}
+FALSE_WORDS = {'false', 'falso'}
+COMPARISONS = {'=', '<>', '<', '>', '<=', '>='}
+SECTION_WORDS = INPUT_WORDS | {'var', 'const', 'function', 'procedure'} | BEGIN_WORDS
+
+# Palavras que nunca são identificadores (os sinônimos curtos, como 'e' e 'ate',
+# só são tratados como palavra-chave na posição em que a gramática os espera)
+RESERVED = (BEGIN_WORDS | END_WORDS | IF_WORDS | THEN_WORDS | ELSE_WORDS | DO_WORDS
+            | {'for', 'while', 'to', 'downto', 'var', 'const', 'function', 'procedure',
+               'and', 'or', 'xor', 'not', 'div', 'mod', 'of', 'array', 'input'})
+
+
+class _Parser:
+    """Parser recursivo descendente sobre a lista de tokens"""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.tokens = tokenize(source)
+        self.pos = 0
+        self.tok = self.tokens[0]
+
+    # --- utilitários ---
+
+    def advance(self) -> Token:
+        tok = self.tok
+        self.pos += 1
+        self.tok = self.tokens[self.pos]
+        return tok
+
+    def peek(self, offset: int = 1) -> Token:
+        return self.tokens[min(self.pos + offset, len(self.tokens) - 1)]
+
+    def error(self, message: str, tok: Optional[Token] = None) -> NTSLSyntaxError:
+        tok = tok or self.tok
+        found = f"'{tok.text}'" if tok.kind != 'eof' else 'fim do arquivo'
+        return _syntax_error(self.source, tok.start, f"{message}, encontrado {found}")
+
+    def expect(self, key: str) -> Token:
+        if self.tok.key != key:
+            raise self.error(f"esperado '{key}'")
+        return self.advance()
+
+    def expect_word(self, words: set, label: str) -> Token:
+        if self.tok.kind != 'name' or self.tok.key not in words:
+            raise self.error(f"esperado '{label}'")
+        return self.advance()
+
+    def identifier(self) -> str:
+        if self.tok.kind != 'name' or self.tok.key in RESERVED:
+            raise self.error("esperado identificador")
+        return self.advance().text
+
+    def end_of(self, tok: Token) -> int:
+        return tok.start + len(tok.text)
+
+    # --- seções ---
+
+    def program(self) -> Program:
+        program = Program()
+        while self.tok.kind == 'name':
+            key = self.tok.key
+            if key in INPUT_WORDS:
+                self.advance()
+                program.inputs.extend(self.input_section())
+            elif key == 'var':
+                self.advance()
+                program.variables.extend(self.var_section())
+            elif key == 'const':
+                self.advance()
+                program.constants.extend(self.const_section())
+            elif key == 'function' or key == 'procedure':
+                program.functions.append(self.function_def())
+            else:
+                break
+
+        if self.tok.key in BEGIN_WORDS:
+            program.main = self.block()
+            while self.tok.key in (';', '.'):
+                self.advance()
+        if self.tok.kind != 'eof':
+            raise self.error("esperado 'begin' ou fim do arquivo")
+        return program
+
+    def input_section(self) -> List[InputDecl]:
+        inputs = []
+        while self.tok.kind == 'name' and self.peek().key == '(' and self.tok.key not in SECTION_WORDS:
+            name = self.advance().text
+            self.advance()
+            first = self.tok
+            value = self.expression()
+            text = self.source[first.start:self.tok.start].strip()
+            self.expect(')')
+            inputs.append(InputDecl(name, value, text))
+            if self.tok.key in (';', ','):
+                self.advance()
+            else:
+                raise self.error("esperado ';'")
+        return inputs
+
+    def var_section(self) -> List[VarDecl]:
+        declarations = []
+        while self.tok.kind == 'name' and self.tok.key not in SECTION_WORDS:
+            declarations.append(self.var_decl())
+            self.expect(';')
+        return declarations
+
+    def var_decl(self) -> VarDecl:
+        names = [self.identifier()]
+        while self.tok.key == ',':
+            self.advance()
+            names.append(self.identifier())
+        self.expect(':')
+        return VarDecl(names, self.type_name())
+
+    def type_name(self) -> str:
+        if self.tok.key != 'array':
+            if self.tok.kind != 'name':
+                raise self.error("esperado tipo")
+            return self.advance().text
+        first = self.advance()
+        while self.tok.key != 'of':
+            if self.tok.kind == 'eof' or self.tok.key == ';':
+                raise self.error("esperado 'of'")
+            self.advance()
+        self.advance()
+        last = self.advance()
+        if last.kind != 'name':
+            raise self.error("esperado tipo", last)
+        return self.source[first.start:self.end_of(last)]
+
+    def const_section(self) -> List[ConstDecl]:
+        constants = []
+        while self.tok.kind == 'name' and self.tok.key not in SECTION_WORDS:
+            name = self.identifier()
+            self.expect('=')
+            constants.append(ConstDecl(name, self.expression()))
+            self.expect(';')
+        return constants
+
+    def function_def(self) -> FunctionDef:
+        header = self.advance()
+        name = self.identifier()
+        params = []
+        if self.tok.key == '(':
+            self.advance()
+            while self.tok.key != ')':
+                if self.tok.key in ('var', 'const'):
+                    self.advance()
+                params.append(self.var_decl())
+                if self.tok.key == ';':
+                    self.advance()
+                elif self.tok.key != ')':
+                    raise self.error("esperado ')'")
+            self.advance()
+        return_type = None
+        if self.tok.key == ':':
+            self.advance()
+            return_type = self.type_name()
+        body_start = self.end_of(self.expect(';'))
+
+        variables = []
+        while self.tok.key == 'var':
+            self.advance()
+            variables.extend(self.var_section())
+        body = self.block()
+        end = self.end_of(self.tokens[self.pos - 1])
+        if self.tok.key == ';':
+            end = self.end_of(self.advance())
+        return FunctionDef(header.key, name, params, return_type, variables, body,
+                           header.start, body_start, end)
+
+    # --- comandos ---
+
+    def block(self) -> Block:
+        begin = self.expect_word(BEGIN_WORDS, 'begin')
+        body = self.statements()
+        end = self.expect_word(END_WORDS, 'end')
+        return Block(body, self.end_of(begin), end.start)
+
+    def statements(self) -> List[Stmt]:
+        body = []
+        while True:
+            while self.tok.key == ';':
+                self.advance()
+            if self.tok.key in END_WORDS or self.tok.kind == 'eof':
+                return body
+            body.append(self.statement())
+            if self.tok.key == ';':
+                self.advance()
+            elif self.tok.key not in END_WORDS:
+                raise self.error("esperado ';'")
+
+    def statement(self) -> Stmt:
+        tok = self.tok
+        key = tok.key
+        if tok.kind == 'name':
+            if key in BEGIN_WORDS:
+                return self.block()
+            if key in IF_WORDS:
+                return self.if_statement()
+            if key in FOR_WORDS and self.peek(2).key == ':=':
+                return self.for_statement()
+            if key in WHILE_WORDS and self.peek().key != ':=':
+                return self.while_statement()
+
+        target = self.postfix()
+        if self.tok.key == ':=':
+            if not isinstance(target, (Name, Index)):
+                raise self.error("atribuição inválida", tok)
+            self.advance()
+            return Assign(target, self.expression())
+        if isinstance(target, Name):
+            target = Call(target.name, [])
+        if not isinstance(target, Call):
+            raise self.error("esperado ':='")
+        return CallStatement(target)
+
+    def branch(self) -> Stmt:
+        """Comando de um if/for/while; pode ser vazio (ex.: 'then;')"""
+        if self.tok.key == ';' or self.tok.key in END_WORDS or self.tok.key in ELSE_WORDS:
+            return Block([], self.tok.start, self.tok.start)
+        return self.statement()
+
+    def if_statement(self) -> If:
+        self.advance()
+        test = self.expression()
+        self.expect_word(THEN_WORDS, 'then')
+        body = self.branch()
+        orelse = None
+        if self.tok.key in ELSE_WORDS:
+            self.advance()
+            orelse = self.branch()
+        return If(test, body, orelse)
+
+    def for_statement(self) -> For:
+        self.advance()
+        var = self.identifier()
+        self.expect(':=')
+        start = self.expression()
+        if self.tok.key == 'downto':
+            downto = True
+            self.advance()
+        else:
+            downto = False
+            self.expect_word(TO_WORDS, 'to')
+        stop = self.expression()
+        self.expect_word(DO_WORDS, 'do')
+        return For(var, start, stop, self.branch(), downto)
+
+    def while_statement(self) -> While:
+        self.advance()
+        test = self.expression()
+        self.expect_word(DO_WORDS, 'do')
+        return While(test, self.branch())
+
+    # --- expressões (precedência: or < and < not < comparação < soma < produto < unário) ---
+
+    def expression(self) -> Expr:
+        left = self.conjunction()
+        while self.tok.kind == 'name' and self.tok.key in OR_WORDS:
+            op = OR_WORDS[self.advance().key]
+            left = BinOp(op, left, self.conjunction())
+        return left
+
+    def conjunction(self) -> Expr:
+        left = self.negation()
+        while self.tok.kind == 'name' and self.tok.key in AND_WORDS:
+            self.advance()
+            left = BinOp('and', left, self.negation())
+        return left
+
+    def negation(self) -> Expr:
+        if self.tok.kind == 'name' and self.tok.key in NOT_WORDS and self._starts_operand(self.peek()):
+            self.advance()
+            return UnaryOp('not', self.negation())
+        return self.comparison()
+
+    def comparison(self) -> Expr:
+        left = self.additive()
+        while self.tok.key in COMPARISONS and self.tok.kind == 'op':
+            op = self.advance().key
+            left = BinOp(op, left, self.additive())
+        return left
+
+    def additive(self) -> Expr:
+        left = self.term()
+        while self.tok.key in ('+', '-') and self.tok.kind == 'op':
+            op = self.advance().key
+            left = BinOp(op, left, self.term())
+        return left
+
+    def term(self) -> Expr:
+        left = self.unary()
+        while (self.tok.kind == 'op' and self.tok.key in ('*', '/')) or self.tok.key in ('div', 'mod'):
+            op = self.advance().key
+            left = BinOp(op, left, self.unary())
+        return left
+
+    def unary(self) -> Expr:
+        if self.tok.kind == 'op' and self.tok.key in ('-', '+'):
+            op = self.advance().key
+            return UnaryOp(op, self.unary())
+        return self.postfix()
+
+    def postfix(self) -> Expr:
+        node = self.primary()
+        while True:
+            key = self.tok.key
+            if key == '(' and isinstance(node, Name):
+                self.advance()
+                args = []
+                if self.tok.key != ')':
+                    args.append(self.expression())
+                    while self.tok.key == ',':
+                        self.advance()
+                        args.append(self.expression())
+                self.expect(')')
+                node = Call(node.name, args)
+            elif key == '[':
+                self.advance()
+                offset = self.expression()
+                self.expect(']')
+                node = Index(node, offset)
+            elif key == '|':
+                self.advance()
+                line = self.unary_operand()
+                self.expect('|')
+                node = Output(node, line)
+            elif key == '.' and self.peek().kind == 'name':
+                self.advance()
+                node = Attribute(node, self.advance().text)
+            else:
+                return node
+
+    def unary_operand(self) -> Expr:
+        """Índice entre barras (|n|): número ou identificador, sem operadores"""
+        if self.tok.kind == 'op' and self.tok.key == '-':
+            self.advance()
+            return UnaryOp('-', self.primary())
+        return self.primary()
+
+    def primary(self) -> Expr:
+        tok = self.tok
+        if tok.kind == 'number':
+            self.advance()
+            return Literal(_number(tok.text))
+        if tok.kind == 'string':
+            self.advance()
+            return Literal(tok.text[1:-1])
+        if tok.kind == 'name':
+            if tok.key in TRUE_WORDS:
+                self.advance()
+                return Literal(True)
+            if tok.key in FALSE_WORDS:
+                self.advance()
+                return Literal(False)
+            return Name(self.identifier())
+        if tok.key == '(':
+            self.advance()
+            node = self.expression()
+            self.expect(')')
+            return node
+        raise self.error("esperado expressão")
+
+    @staticmethod
+    def _starts_operand(tok: Token) -> bool:
+        return tok.kind in ('name', 'number', 'string') or tok.key in ('(', '-', '+')
+
+
+def _number(text: str):
+    lowered = text.lower()
+    if lowered.startswith('0x'):
+        return int(text, 16)
+    if text.startswith('$'):
+        return int(text[1:], 16)
+    if '.' in text or 'e' in lowered:
+        return float(text)
+    return int(text)
+
+
+def parse_program(source: str) -> Program:
+    """Parseia o código NTSL completo (levanta NTSLSyntaxError se inválido)"""
+    parser = _Parser(source)
+    try:
+        return parser.program()
+    except RecursionError:
+        raise parser.error("aninhamento profundo demais") from None
+
+
+# ================================================================
+# CACHE DE PARSE
+# ================================================================
+
+class ParseCache:
+    """ASTs gravadas em disco (pickle), com chave no hash do código-fonte"""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        Args:
+            cache_dir: Diretório do cache (padrão: backtest/.cache/ntsl)
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+
+    @staticmethod
+    def key(source: str) -> str:
+        """Hash do conteúdo (inclui a versão do formato da AST)"""
+        digest = hashlib.sha1(f"ntsl-ast-{AST_FORMAT_VERSION}\n".encode('utf-8'))
+        digest.update(source.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def load(self, source: str) -> Optional[Program]:
+        try:
+            with open(self.cache_dir / f"{self.key(source)}.pkl", 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+
+    def store(self, source: str, program: Program):
+        """Gravação atômica (arquivo temporário + os.replace)"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.cache_dir / f"{self.key(source)}.pkl"
+        tmp = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+        with open(tmp, 'wb') as f:
+            pickle.dump(program, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def invalidate(self) -> int:
+        """Remove todas as entradas; retorna quantas removeu"""
+        if not self.cache_dir.exists():
+            return 0
+        removed = 0
+        for path in self.cache_dir.glob('*.pkl'):
+            path.unlink()
+            removed += 1
+        return removed
+
+
+def parse_source(source: str, cache: Optional[ParseCache] = None) -> Program:
+    """parse_program com o cache em disco (quando informado)"""
+    if cache is not None:
+        program = cache.load(source)
+        if program is not None:
+            return program
+    program = parse_program(source)
+    if cache is not None:
+        try:
+            cache.store(source, program)
+        except (OSError, RecursionError):
+            pass
+    return program
+
+
+def read_source(path: str) -> str:
+    """Lê um arquivo NTSL (utf-8, ou latin-1 para arquivos salvos pelo editor do Profit)"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    try:
+        return raw.decode('utf-8')
+    except UnicodeDecodeError:
+        return raw.decode('latin-1')
+
+
+# ================================================================
+# CLI / BENCHMARK
+# ================================================================
+
+def _corpus(root: str) -> Dict[str, List]:
+    """Arquivos de texto do diretório (arquivos binários são separados)"""
+    texts, binaries = [], []
+    for path in sorted(Path(root).rglob('*')):
+        if not path.is_file():
+            continue
+        with open(path, 'rb') as f:
+            head = f.read(4096)
+        if b'\0' in head:
+            binaries.append(path)
+        else:
+            texts.append((path, read_source(str(path))))
+    return {'texts': texts, 'binaries': binaries}
+
+
+def tokenize_safe(source: str):
+    """tokenize que devolve o erro em vez de levantá-lo (benchmark)"""
+    try:
+        return tokenize(source)
+    except NTSLSyntaxError as e:
+        return e
+
+
+def benchmark(root: str, show_errors: int = 10):
+    """Compara a extração por regex (legado) com tokenizador + parser e cache de parse"""
+    from .ntsl_parser import NTSLParser
+
+    corpus = _corpus(root)
+    texts = corpus['texts']
+    total_bytes = sum(len(source.encode('utf-8', 'surrogatepass')) for _, source in texts)
+    total_lines = sum(source.count('\n') + 1 for _, source in texts)
+    print(f"Corpus: {root}")
+    print(f"   {len(texts)} arquivos de texto, {total_lines} linhas, {total_bytes / 1e6:.2f} MB"
+          f" ({len(corpus['binaries'])} binário(s) ignorado(s))")
+
+    def run(label, func):
+        started = time.perf_counter()
+        results = [func(source) for _, source in texts]
+        elapsed = time.perf_counter() - started
+        print(f"   {label:<28} {elapsed:8.3f}s  {total_bytes / 1e6 / elapsed:8.2f} MB/s"
+              f"  {total_lines / elapsed:12,.0f} linhas/s")
+        return results
+
+    legacy = NTSLParser()
+
+    def legacy_sections(source):
+        code = legacy._remove_comments(source)
+        return (legacy._extract_inputs(code), legacy._extract_variables(code),
+                legacy._extract_functions(code), legacy._extract_main_logic(code))
+
+    def safe_parse(source):
+        try:
+            return parse_program(source)
+        except NTSLSyntaxError as e:
+            return e
+
+    print()
+    run("regex (legado)", legacy_sections)
+    run("tokenizador", tokenize_safe)
+    parsed = run("tokenizador + parser", safe_parse)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ParseCache(tmp)
+        for (_, source), program in zip(texts, parsed):
+            if isinstance(program, Program):
+                cache.store(source, program)
+        ok_sources = [source for (_, source), program in zip(texts, parsed) if isinstance(program, Program)]
+        started = time.perf_counter()
+        for source in ok_sources:
+            cache.load(source)
+        elapsed = time.perf_counter() - started
+        cached_bytes = sum(len(source.encode('utf-8', 'surrogatepass')) for source in ok_sources)
+        print(f"   {'cache de parse (acerto)':<28} {elapsed:8.3f}s  {cached_bytes / 1e6 / elapsed:8.2f} MB/s")
+
+    failures = [(path, error) for (path, _), error in zip(texts, parsed) if isinstance(error, NTSLSyntaxError)]
+    print(f"\nParse: {len(texts) - len(failures)} ok, {len(failures)} com erro de sintaxe")
+    for path, error in failures[:show_errors]:
+        print(f"   {path}: {error}")
+    if len(failures) > show_errors:
+        print(f"   ... mais {len(failures) - show_errors}")
+
+
+def _describe(path: str):
+    """Resumo da AST de um arquivo"""
+    program = parse_program(read_source(path))
+    print(f"{path}")
+    print(f"   Inputs: {len(program.inputs)}")
+    print(f"   Constantes: {len(program.constants)}")
+    print(f"   Variáveis: {sum(len(decl.names) for decl in program.variables)}")
+    for function in program.functions:
+        print(f"   {function.kind} {function.name}: {len(function.params)} parâmetro(s), "
+              f"{len(function.body.body)} comando(s)")
+    main = len(program.main.body) if program.main else 0
+    print(f"   Bloco principal: {main} comando(s)")
+
+
+def main():
+    """CLI: resumo da AST de arquivos NTSL ou benchmark sobre um diretório"""
+    parser = argparse.ArgumentParser(description='Tokenizador e parser NTSL')
+    parser.add_argument('files', nargs='*', help='Arquivos NTSL para parsear')
+    parser.add_argument('--bench', metavar='DIR', help='Mede a vazão do parse sobre todos os arquivos do diretório')
+    parser.add_argument('--errors', type=int, default=10, help='Erros de sintaxe exibidos no benchmark (padrão: 10)')
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.bench, args.errors)
+    elif args.files:
+        for path in args.files:
+            try:
+                _describe(path)
+            except NTSLSyntaxError as e:
+                print(f"{path}: erro de sintaxe, {e}")
+    else:
+        parser.error("informe arquivos NTSL ou --bench DIR")
+
+
+if __name__ == "__main__":
+    main()
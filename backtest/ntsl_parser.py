@@ -1,7 +1,10 @@
 import re
 import ast
-from typing import Dict, List, Any, Tuple, Optional
-from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Any, Tuple, Optional
+from dataclasses import dataclass, replace
+
+if TYPE_CHECKING:  # import só para anotação: evita carregar o módulo ao rodar 'python -m backtest.ntsl_ast'
+    from .ntsl_ast import ParseCache, Program
 
 @dataclass
 class NTSLStrategy:
@@ -13,6 +16,7 @@ class NTSLStrategy:
     functions: Dict[str, str]
     main_logic: str
     risk_params: Dict[str, float]
+    program: Optional['Program'] = None  # AST do código (None se o parse falhou e a extração foi por regex)
 
 class NTSLParser:
     """
@@ -20,8 +24,13 @@ class NTSLParser:
     Baseado na documentação oficial em docs/
     """
     
-    def __init__(self):
+    def __init__(self, cache: Optional['ParseCache'] = None):
+        """
+        Args:
+            cache: Cache em disco das ASTs, por hash do conteúdo (ver ntsl_ast.ParseCache)
+        """
         self.strategy = None
+        self.cache = cache
         # Mapeamento baseado em docs/funcoes_constantes_NTSL.md
         self.ntsl_functions_map = {
             'Media': 'smma',
@@ -58,21 +67,27 @@ class NTSLParser:
     
     def parse_file(self, ntsl_file_path: str) -> NTSLStrategy:
         """Parseia arquivo NTSL e retorna estratégia estruturada"""
-        with open(ntsl_file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        return self.parse_content(content)
+        from .ntsl_ast import read_source
+        # utf-8, ou latin-1 se utf-8 falhar (arquivos salvos pelo editor do Profit)
+        return self.parse_content(read_source(ntsl_file_path))
     
     def parse_content(self, ntsl_code: str) -> NTSLStrategy:
         """Parseia conteúdo NTSL seguindo sintaxe documentada"""
-        # Remover comentários de linha e bloco
-        clean_code = self._remove_comments(ntsl_code)
+        from .ntsl_ast import NTSLSyntaxError, parse_source
+        try:
+            program = parse_source(ntsl_code, self.cache)
+        except NTSLSyntaxError:
+            program = None
         
-        # Extrair seções na ordem correta
-        inputs = self._extract_inputs(clean_code)
-        variables = self._extract_variables(clean_code) 
-        functions = self._extract_functions(clean_code)
-        main_logic = self._extract_main_logic(clean_code)
+        if program is not None:
+            inputs, variables, functions, main_logic = self._sections_from_program(program, ntsl_code)
+        else:
+            # Código fora da gramática: extração das seções por regex
+            clean_code = self._remove_comments(ntsl_code)
+            inputs = self._extract_inputs(clean_code)
+            variables = self._extract_variables(clean_code) 
+            functions = self._extract_functions(clean_code)
+            main_logic = self._extract_main_logic(clean_code)
         
         # Extrair parâmetros de risco
         risk_params = self._extract_risk_parameters(inputs)
@@ -84,12 +99,31 @@ class NTSLParser:
             variables=variables,
             functions=functions,
             main_logic=main_logic,
-            risk_params=risk_params
+            risk_params=risk_params,
+            program=program
         )
         
         self.strategy = strategy
         return strategy
     
+    def _sections_from_program(self, program: 'Program', ntsl_code: str) -> Tuple[Dict, Dict, Dict, str]:
+        """Inputs, variáveis, funções e lógica principal a partir da AST"""
+        inputs = {decl.name: self._parse_value(decl.text) for decl in program.inputs}
+        
+        variables = {}
+        for decl in program.variables:
+            default_value = self._get_default_value_for_type(decl.type_name)
+            for var_name in decl.names:
+                variables[var_name] = default_value
+        
+        # Texto de cada função: variáveis locais + corpo, sem o 'end' final
+        functions = {
+            function.name: ntsl_code[function.body_start:function.body.end].strip()
+            for function in program.functions
+        }
+        main_logic = ntsl_code[program.main.start:program.main.end].strip() if program.main else ""
+        return inputs, variables, functions, main_logic
+    
     def _remove_comments(self, code: str) -> str:
         """Remove comentários NTSL (// e {})"""
         # Comentários de linha
@@ -184,6 +218,20 @@ class NTSLParser:
         )
         return main_match.group(1).strip() if main_match else ""
     
+    def apply_inputs(self, strategy: NTSLStrategy, overrides: Dict[str, Any]) -> NTSLStrategy:
+        """
+        Retorna uma cópia da estratégia com os inputs sobrescritos.
+        Os parâmetros de risco são recalculados a partir dos novos inputs.
+        """
+        inputs = dict(strategy.inputs)
+        inputs.update(overrides)
+        return replace(
+            strategy,
+            inputs=inputs,
+            variables=dict(strategy.variables),
+            risk_params=self._extract_risk_parameters(inputs)
+        )
+    
     def _extract_risk_parameters(self, inputs: Dict) -> Dict[str, float]:
         """Extrai parâmetros de risco baseado em padrões do catálogo"""
         risk_keys = [
@@ -0,0 +1,528 @@
+"""
+Indicadores incrementais (O(1) por barra) para o modo streaming.
+
+Cada objeto guarda apenas o estado da janela (buffers circulares) e recebe uma
+barra por vez em update(...), devolvendo o valor atual, também disponível em
+.value. O caminho de atualização usa apenas float do Python (sem pandas).
+
+Os algoritmos reproduzem as versões em lote de TechnicalIndicators na mesma
+ordem de operações, para que os resultados sejam equivalentes:
+- SMA, SMMA, Didi e VWAP seguem as agregações do pandas (soma compensada de
+  Kahan do rolling/expanding e a recursão do ewm) e são idênticos bit a bit
+- EMA, WMA, Bollinger, ATR, RSI, Estocástico, MACD, Hull e TEMA seguem os
+  algoritmos do TA-Lib (semente pela média do primeiro período, somas corridas,
+  NaN iniciais ignorados). Com preços em ticks inteiros costumam ser idênticos;
+  em geral diferem do TA-Lib instalado apenas no arredondamento (erro abaixo
+  de 1e-10 da escala do valor), sem efeito prático nos sinais
+"""
+
+import math
+from collections import deque
+from typing import Tuple
+
+NAN = math.nan
+
+# Limiares do TA-Lib para "zero" e "zero ou negativo"
+_TA_EPSILON = 1e-14
+
+
+class OnlineSMA:
+    """Média móvel simples com min_periods=1 (equivalente a TechnicalIndicators.sma)"""
+
+    def __init__(self, period: int):
+        if period <= 0:
+            raise ValueError("period deve ser positivo")
+        self.period = period
+        self.window = deque()
+        self.value = NAN
+        # Estado da soma compensada do pandas (roll_mean)
+        self._sum = 0.0
+        self._comp_add = 0.0
+        self._comp_remove = 0.0
+        self._nobs = 0
+        self._neg_ct = 0
+        self._same_ct = 0
+        self._prev = NAN
+
+    def update(self, x: float) -> float:
+        window = self.window
+        if len(window) == self.period:
+            old = window.popleft()
+            if old == old:
+                self._nobs -= 1
+                y = -old - self._comp_remove
+                t = self._sum + y
+                self._comp_remove = t - self._sum - y
+                self._sum = t
+                if math.copysign(1.0, old) < 0:
+                    self._neg_ct -= 1
+        window.append(x)
+        if x == x:
+            self._nobs += 1
+            y = x - self._comp_add
+            t = self._sum + y
+            self._comp_add = t - self._sum - y
+            self._sum = t
+            if math.copysign(1.0, x) < 0:
+                self._neg_ct += 1
+            # Valores repetidos: o pandas devolve o próprio valor (sem resíduo da soma)
+            self._same_ct = self._same_ct + 1 if x == self._prev else 1
+            self._prev = x
+
+        nobs = self._nobs
+        if nobs == 0:
+            value = NAN
+        elif self._same_ct >= nobs:
+            value = self._prev
+        else:
+            value = self._sum / nobs
+            if self._neg_ct == 0 and value < 0:
+                value = 0.0
+            elif self._neg_ct == nobs and value > 0:
+                value = 0.0
+        self.value = value
+        return value
+
+
+class _TalibSMA:
+    """SMA por soma corrida do TA-Lib (usada dentro do Estocástico)"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window = deque()
+        self.value = NAN
+        self._total = 0.0
+
+    def update(self, x: float) -> float:
+        self.window.append(x)
+        self._total += x
+        if len(self.window) == self.period:
+            total = self._total
+            self._total -= self.window.popleft()
+            self.value = total / self.period
+        return self.value
+
+
+class OnlineEMA:
+    """Média exponencial do TA-Lib (equivalente a TechnicalIndicators.ema)"""
+
+    def __init__(self, period: int, k: float = None):
+        if period <= 0:
+            raise ValueError("period deve ser positivo")
+        self.period = period
+        self.k = 2.0 / (period + 1) if k is None else k
+        self.value = NAN
+        self._count = 0
+        self._total = 0.0
+
+    def update(self, x: float) -> float:
+        if self._count == 0 and x != x:
+            return self.value  # NaN iniciais são ignorados, como no TA-Lib
+        self._count += 1
+        if self._count < self.period:
+            self._total += x
+        elif self._count == self.period:
+            # Semente: média simples do primeiro período
+            self._total += x
+            self.value = self._total / self.period
+        else:
+            self.value = (x - self.value) * self.k + self.value
+        return self.value
+
+
+class OnlineSMMA:
+    """Média suavizada via ewm(span=period, adjust=False) do pandas (equivalente a TechnicalIndicators.smma)"""
+
+    def __init__(self, period: int):
+        if period <= 0:
+            raise ValueError("period deve ser positivo")
+        self.period = period
+        com = (period - 1) / 2.0
+        self._alpha = 1.0 / (1.0 + com)
+        self._old_wt = 1.0 - self._alpha
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        weighted = self.value
+        if weighted == weighted:
+            if x == x and weighted != x:
+                weighted = self._old_wt * weighted + self._alpha * x
+                weighted /= (self._old_wt + self._alpha)
+        elif x == x:
+            weighted = x
+        self.value = weighted
+        return weighted
+
+
+class OnlineWMA:
+    """Média ponderada linear do TA-Lib (equivalente a TechnicalIndicators.wma)"""
+
+    def __init__(self, period: int):
+        if period <= 0:
+            raise ValueError("period deve ser positivo")
+        self.period = period
+        self.window = deque()
+        self.value = NAN
+        self._divider = (period * (period + 1)) >> 1
+        self._period_sum = 0.0
+        self._period_sub = 0.0
+        self._trailing = 0.0
+
+    def update(self, x: float) -> float:
+        window = self.window
+        if not window and self.value != self.value and x != x:
+            return self.value  # NaN iniciais são ignorados, como no TA-Lib
+        if self.period == 1:
+            self.value = x
+            return x
+
+        window.append(x)
+        if len(window) < self.period:
+            self._period_sub += x
+            self._period_sum += x * len(window)
+            return self.value
+
+        self._period_sub += x
+        self._period_sub -= self._trailing
+        self._period_sum += x * self.period
+        self._trailing = window.popleft()
+        self.value = self._period_sum / self._divider
+        self._period_sum -= self._period_sub
+        return self.value
+
+
+class OnlineATR:
+    """Average True Range de Wilder (equivalente a TechnicalIndicators.atr)"""
+
+    def __init__(self, period: int = 14):
+        if period <= 0:
+            raise ValueError("period deve ser positivo")
+        self.period = period
+        self.value = NAN
+        self._prev_close = None
+        self._count = 0
+        self._sum = 0.0
+
+    def update(self, high: float, low: float, close: float) -> float:
+        prev_close = self._prev_close
+        if prev_close is None and (high != high or low != low or close != close):
+            return self.value
+        self._prev_close = close
+        if prev_close is None:
+            return self.value  # Primeira barra não tem True Range
+
+        true_range = max(high - low, abs(prev_close - high), abs(prev_close - low))
+        period = self.period
+        self._count += 1
+        if self._count < period:
+            self._sum += true_range
+        elif self._count == period:
+            self._sum += true_range
+            self.value = self._sum / period
+        else:
+            self.value = (self.value * (period - 1) + true_range) / period
+        return self.value
+
+
+class OnlineBollinger:
+    """
+    Bandas de Bollinger (equivalente a TechnicalIndicators.bollinger_bands).
+    ma_type segue o TA-Lib: 0 = SMA, 1 = EMA, 2 = WMA. O desvio é sempre o
+    populacional sobre a janela, como no BBANDS.
+    """
+
+    def __init__(self, period: int = 20, std_dev: float = 2.0, ma_type: int = 0):
+        if period <= 0:
+            raise ValueError("period deve ser positivo")
+        if ma_type not in (0, 1, 2):
+            raise ValueError(f"Tipo de média não suportado no modo incremental: {ma_type}")
+        self.period = period
+        self.std_dev = std_dev
+        self.ma_type = ma_type
+        self.window = deque()
+        self.value = (NAN, NAN, NAN)
+        self._total = 0.0
+        self._ma = OnlineEMA(period) if ma_type == 1 else OnlineWMA(period) if ma_type == 2 else None
+        # Variância por somas deslocadas de uma âncora (evita o cancelamento de x² em
+        # preços altos); a âncora é renovada a cada período, sem acumular erro
+        self._anchor = None
+        self._shifted_sum = 0.0
+        self._shifted_sum_sq = 0.0
+        self._since_anchor = 0
+
+    def _reanchor(self):
+        anchor = self.window[0]
+        self._anchor = anchor
+        self._shifted_sum = sum(v - anchor for v in self.window)
+        self._shifted_sum_sq = sum((v - anchor) * (v - anchor) for v in self.window)
+        self._since_anchor = 0
+
+    def update(self, x: float) -> Tuple[float, float, float]:
+        """Devolve (upper, middle, lower)"""
+        window = self.window
+        if not window and self.value[1] != self.value[1] and x != x:
+            return self.value
+        if self._anchor is None:
+            self._anchor = x
+        window.append(x)
+        self._total += x
+        shifted = x - self._anchor
+        self._shifted_sum += shifted
+        self._shifted_sum_sq += shifted * shifted
+        middle = self._ma.update(x) if self._ma is not None else NAN
+        if len(window) < self.period:
+            return self.value
+
+        period = self.period
+        if self._ma is None:
+            middle = self._total / period
+        shifted_mean = self._shifted_sum / period
+        variance = self._shifted_sum_sq / period - shifted_mean * shifted_mean
+        std = math.sqrt(variance) if variance >= _TA_EPSILON else 0.0
+
+        old = window.popleft()
+        self._total -= old
+        shifted = old - self._anchor
+        self._shifted_sum -= shifted
+        self._shifted_sum_sq -= shifted * shifted
+        self._since_anchor += 1
+        if self._since_anchor >= period and window:
+            self._reanchor()
+
+        if self.std_dev != 1.0:
+            std *= self.std_dev
+        self.value = (middle + std, middle, middle - std)
+        return self.value
+
+
+class OnlineRSI:
+    """Índice de Força Relativa de Wilder (equivalente a TechnicalIndicators.rsi)"""
+
+    def __init__(self, period: int = 14):
+        if period <= 0:
+            raise ValueError("period deve ser positivo")
+        self.period = period
+        self.value = NAN
+        self._prev = None
+        self._count = 0
+        self._gain = 0.0
+        self._loss = 0.0
+
+    def _rsi(self) -> float:
+        total = self._gain + self._loss
+        return 100.0 * (self._gain / total) if not -_TA_EPSILON < total < _TA_EPSILON else 0.0
+
+    def update(self, x: float) -> float:
+        if self._prev is None:
+            if x == x:
+                self._prev = x
+            return self.value
+        diff = x - self._prev
+        self._prev = x
+        period = self.period
+        self._count += 1
+        if self._count > period:
+            self._loss *= (period - 1)
+            self._gain *= (period - 1)
+        if diff < 0:
+            self._loss -= diff
+        else:
+            self._gain += diff
+        if self._count >= period:
+            self._loss /= period
+            self._gain /= period
+            self.value = self._rsi()
+        return self.value
+
+
+class _MonotonicExtreme:
+    """Máximo (ou mínimo) de uma janela deslizante em O(1) amortizado"""
+
+    def __init__(self, period: int, maximum: bool):
+        self.period = period
+        self.maximum = maximum
+        self._items = deque()  # (posição, valor), valores monotônicos
+        self._pos = 0
+
+    def update(self, x: float) -> float:
+        items = self._items
+        if self.maximum:
+            while items and items[-1][1] <= x:
+                items.pop()
+        else:
+            while items and items[-1][1] >= x:
+                items.pop()
+        items.append((self._pos, x))
+        if items[0][0] <= self._pos - self.period:
+            items.popleft()
+        self._pos += 1
+        return items[0][1]
+
+
+class OnlineStochastic:
+    """Estocástico lento (equivalente a TechnicalIndicators.stochastic): devolve (%K, %D)"""
+
+    def __init__(self, k_period: int = 14, d_period: int = 3):
+        if k_period <= 0 or d_period <= 0:
+            raise ValueError("Períodos devem ser positivos")
+        self.k_period = k_period
+        self.d_period = d_period
+        self.value = (NAN, NAN)
+        self._highest = _MonotonicExtreme(k_period, maximum=True)
+        self._lowest = _MonotonicExtreme(k_period, maximum=False)
+        self._count = 0
+        self._slow_k = _TalibSMA(d_period)
+        self._slow_d = _TalibSMA(d_period)
+
+    def update(self, high: float, low: float, close: float) -> Tuple[float, float]:
+        if self._count == 0 and (high != high or low != low or close != close):
+            return self.value
+        self._count += 1
+        highest = self._highest.update(high)
+        lowest = self._lowest.update(low)
+        if self._count < self.k_period:
+            return self.value
+
+        diff = (highest - lowest) / 100.0
+        fast_k = (close - lowest) / diff if diff != 0.0 else 0.0
+        slow_k = self._slow_k.update(fast_k)
+        if slow_k == slow_k:
+            slow_d = self._slow_d.update(slow_k)
+            if slow_d == slow_d:
+                self.value = (slow_k, slow_d)
+        return self.value
+
+
+class OnlineMACD:
+    """MACD do TA-Lib (equivalente a TechnicalIndicators.macd): devolve (macd, sinal, histograma)"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        if fast <= 0 or slow <= 0 or signal <= 0:
+            raise ValueError("Períodos devem ser positivos")
+        if slow < fast:
+            fast, slow = slow, fast
+        self.fast = fast
+        self.slow = slow
+        self.signal = signal
+        self.value = (NAN, NAN, NAN)
+        self._count = 0
+        self._fast_ema = OnlineEMA(fast)
+        self._slow_ema = OnlineEMA(slow)
+        self._signal_ema = OnlineEMA(signal)
+
+    def update(self, x: float) -> Tuple[float, float, float]:
+        if self._count == 0 and x != x:
+            return self.value
+        self._count += 1
+        slow_value = self._slow_ema.update(x)
+        # A EMA rápida começa alinhada ao fim do primeiro período da lenta
+        if self._count > self.slow - self.fast:
+            fast_value = self._fast_ema.update(x)
+        if self._count < self.slow:
+            return self.value
+
+        macd = fast_value - slow_value
+        signal = self._signal_ema.update(macd)
+        if signal == signal:
+            self.value = (macd, signal, macd - signal)
+        return self.value
+
+
+class OnlineHullMA:
+    """Hull Moving Average (equivalente a TechnicalIndicators.hull_ma)"""
+
+    def __init__(self, period: int):
+        if period <= 0:
+            raise ValueError("period deve ser positivo")
+        self.period = period
+        self._wma_half = OnlineWMA(period // 2)
+        self._wma_full = OnlineWMA(period)
+        self._wma_hull = OnlineWMA(int(math.sqrt(period)))
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        hull_data = 2 * self._wma_half.update(x) - self._wma_full.update(x)
+        self.value = self._wma_hull.update(hull_data)
+        return self.value
+
+
+class OnlineTEMA:
+    """Média exponencial tripla do TA-Lib (equivalente a TechnicalIndicators.tema)"""
+
+    def __init__(self, period: int):
+        if period <= 0:
+            raise ValueError("period deve ser positivo")
+        self.period = period
+        self._ema1 = OnlineEMA(period)
+        self._ema2 = OnlineEMA(period)
+        self._ema3 = OnlineEMA(period)
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        ema1 = self._ema1.update(x)
+        if ema1 == ema1:
+            ema2 = self._ema2.update(ema1)
+            if ema2 == ema2:
+                ema3 = self._ema3.update(ema2)
+                if ema3 == ema3:
+                    self.value = ema3 + ((3.0 * ema1) - (3.0 * ema2))
+        return self.value
+
+
+class OnlineDidiIndex:
+    """Didi Index (equivalente a TechnicalIndicators.didi_index): devolve (curta, média, longa)"""
+
+    def __init__(self, short: int = 3, medium: int = 8, long: int = 20):
+        self._short = OnlineSMA(short)
+        self._medium = OnlineSMA(medium)
+        self._long = OnlineSMA(long)
+        self.value = (NAN, NAN, NAN)
+
+    def update(self, x: float) -> Tuple[float, float, float]:
+        self.value = (self._short.update(x), self._medium.update(x), self._long.update(x))
+        return self.value
+
+
+class _ExpandingSum:
+    """Soma acumulada com a compensação de Kahan do expanding().sum() do pandas"""
+
+    def __init__(self):
+        self._sum = 0.0
+        self._comp = 0.0
+        self._nobs = 0
+        self._same_ct = 0
+        self._prev = NAN
+
+    def update(self, x: float) -> float:
+        if x == x:
+            self._nobs += 1
+            y = x - self._comp
+            t = self._sum + y
+            self._comp = t - self._sum - y
+            self._sum = t
+            self._same_ct = self._same_ct + 1 if x == self._prev else 1
+            self._prev = x
+        if self._nobs == 0:
+            return NAN
+        return self._prev * self._nobs if self._same_ct >= self._nobs else self._sum
+
+
+class OnlineVWAP:
+    """VWAP acumulado desde a primeira barra (equivalente a TechnicalIndicators.vwap)"""
+
+    def __init__(self):
+        self._volume_price = _ExpandingSum()
+        self._volume = _ExpandingSum()
+        self.value = NAN
+
+    def update(self, high: float, low: float, close: float, volume: float) -> float:
+        typical_price = (high + low + close) / 3
+        cumulative_volume_price = self._volume_price.update(typical_price * volume)
+        cumulative_volume = self._volume.update(volume)
+        if cumulative_volume != 0:
+            self.value = cumulative_volume_price / cumulative_volume
+        elif cumulative_volume_price == 0 or cumulative_volume_price != cumulative_volume_price:
+            self.value = NAN  # 0/0 (ou NaN) resulta em NaN, como na divisão do pandas
+        else:
+            self.value = math.copysign(math.inf, cumulative_volume_price)
+        return self.value
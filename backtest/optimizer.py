@@ -0,0 +1,257 @@
+"""
+Otimizador de parâmetros (varredura em grade) para estratégias NTSL.
+
+Executa o BacktestEngine para cada combinação de valores de inputs da estratégia
+(ex: scoreMinimoEntrada, pesos do orquestrador, fatorAtrStop/fatorAtrGain,
+bb_periodo) em um pool de processos. Os dados OHLCV são carregados uma vez e
+compartilhados com os workers via memória compartilhada.
+
+Uso:
+    python -m backtest.optimizer --strategy estrategias/automations/x.txt \\
+        --data backtest/dados/WINFUT_1min.csv --timeframe 5 \\
+        --param fatorAtrStop=1.0:3.0:0.5 --param bb_periodo=10,20,30
+"""
+
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .ntsl_parser import NTSLParser, NTSLStrategy
+from .backtest_engine import ENGINE_MODES, BacktestEngine
+from .indicator_cache import IndicatorCache
+from .spread_model import SWEEP_SEED, UniformSpreadModel
+from .data_provider import DataProvider
+from .shared_data import SharedDataFrame, SharedFrameDescriptor, attach_shared_frame
+
+
+def parse_param_range(spec: str) -> Tuple[str, List[Any]]:
+    """
+    Converte uma especificação de faixa em lista de valores.
+
+    Formatos aceitos:
+        nome=inicio:fim:passo   (faixa inclusiva, ex: fatorAtrStop=1.0:3.0:0.5)
+        nome=v1,v2,v3           (lista explícita, ex: bb_periodo=10,20,30)
+        nome=valor              (valor único)
+    """
+    if '=' not in spec:
+        raise ValueError(f"Especificação de parâmetro inválida: '{spec}'. Use nome=inicio:fim:passo ou nome=v1,v2")
+
+    name, values_str = spec.split('=', 1)
+    name = name.strip()
+    parser = NTSLParser()
+
+    if ':' in values_str:
+        parts = values_str.split(':')
+        if len(parts) != 3:
+            raise ValueError(f"Faixa inválida para '{name}': use inicio:fim:passo")
+        start, stop, step = (parser._parse_value(p) for p in parts)
+        if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in (start, stop, step)) or step <= 0:
+            raise ValueError(f"Faixa inválida para '{name}': valores numéricos e passo positivo são obrigatórios")
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        values = [start + k * step for k in range(count)]
+        if all(isinstance(v, int) for v in (start, stop, step)):
+            return name, [int(v) for v in values]
+        return name, [round(float(v), 10) for v in values]
+
+    return name, [parser._parse_value(v) for v in values_str.split(',') if v.strip()]
+
+
+def build_grid(param_ranges: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """Produto cartesiano das faixas de parâmetros"""
+    if not param_ranges:
+        return [{}]
+    names = list(param_ranges.keys())
+    return [dict(zip(names, combo)) for combo in itertools.product(*(param_ranges[n] for n in names))]
+
+
+# --- Estado do processo de trabalho (inicializado uma vez por processo) ---
+_worker_context: Dict[str, Any] = {}
+
+
+def _set_context(data: pd.DataFrame, strategy: NTSLStrategy, asset: str,
+                 timeframe: str, mode: str, seed: Optional[int],
+                 cache_bytes: int, cache_dir: Optional[str]):
+    """Define os dados e a estratégia usados pelas execuções deste processo"""
+    _worker_context.update(
+        indicator_cache=IndicatorCache(cache_bytes, cache_dir) if cache_bytes > 0 else None,
+        data=data,
+        strategy=strategy,
+        asset=asset,
+        timeframe=timeframe,
+        mode=mode,
+        seed=seed,
+        parser=NTSLParser()
+    )
+
+
+def _init_worker(descriptor: SharedFrameDescriptor, *args):
+    """Conecta o worker aos dados compartilhados"""
+    _set_context(attach_shared_frame(descriptor), *args)
+
+
+def _run_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Executa um backtest para um conjunto de parâmetros (no worker)"""
+    ctx = _worker_context
+    strategy = ctx['parser'].apply_inputs(ctx['strategy'], params)
+
+    start = time.perf_counter()
+    engine = BacktestEngine(verbosity=0, indicator_cache=ctx['indicator_cache'],
+                            spread_model=UniformSpreadModel(ctx['seed']))
+    try:
+        result = engine.run_backtest(strategy, ctx['data'], ctx['asset'], ctx['timeframe'],
+                                     mode=ctx['mode'], rebuild_equity=True)
+        metrics = dict(result.metrics)
+        error = None
+    except Exception as e:
+        metrics = {}
+        error = str(e)
+
+    row = dict(params)
+    row.update(metrics)
+    row['elapsed_s'] = time.perf_counter() - start
+    row['error'] = error
+    return row
+
+
+class ParameterOptimizer:
+    """
+    Varredura em grade dos inputs de uma estratégia NTSL.
+    O resultado é uma tabela ordenada pelas métricas de _calculate_metrics.
+    """
+
+    def __init__(self, strategy: NTSLStrategy, data: pd.DataFrame, asset: str = 'ATIVO',
+                 timeframe: str = '1min', mode: str = 'fast', workers: Optional[int] = None,
+                 seed: Optional[int] = SWEEP_SEED, cache_bytes: int = 256 * 1024 * 1024,
+                 cache_dir: Optional[str] = None):
+        """
+        Args:
+            strategy: Estratégia base (inputs não varridos mantêm o valor original)
+            data: Dados OHLCV já carregados (e reamostrados, se for o caso)
+            mode: Modo do engine ('fast' recomendado para varreduras)
+            workers: Número de processos (padrão: todos os núcleos)
+            seed: Semente do modelo de spread (padrão: SWEEP_SEED, a mesma em todas as execuções;
+                  None sorteia um spread diferente a cada execução)
+            cache_bytes: Orçamento do cache de indicadores por processo (0 desativa)
+            cache_dir: Diretório do nível em disco do cache de indicadores
+        """
+        self.strategy = strategy
+        self.data = data
+        self.asset = asset
+        self.timeframe = timeframe
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed
+        self.cache_bytes = cache_bytes
+        self.cache_dir = cache_dir
+
+    def run(self, param_ranges: Dict[str, Sequence[Any]], rank_by: str = 'net_profit',
+            ascending: bool = False) -> pd.DataFrame:
+        """
+        Executa a varredura.
+
+        Args:
+            param_ranges: {nome_do_input: [valores]}
+            rank_by: Métrica usada na ordenação
+            ascending: Ordem crescente (ex: para métricas de perda)
+        """
+        unknown = [name for name in param_ranges if name not in self.strategy.inputs]
+        if unknown:
+            raise ValueError(f"Inputs não encontrados na estratégia: {unknown}")
+
+        grid = build_grid(param_ranges)
+        initargs = (self.strategy, self.asset, self.timeframe, self.mode, self.seed,
+                    self.cache_bytes, self.cache_dir)
+
+        if self.workers <= 1 or len(grid) == 1:
+            _set_context(self.data, *initargs)
+            rows = [_run_params(params) for params in grid]
+            _worker_context.clear()
+        else:
+            chunksize = max(1, len(grid) // (self.workers * 4))
+            with SharedDataFrame(self.data) as shared:
+                with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                         initargs=(shared.descriptor, *initargs)) as executor:
+                    rows = list(executor.map(_run_params, grid, chunksize=chunksize))
+
+        return rank_results(pd.DataFrame(rows), rank_by, ascending)
+
+
+def rank_results(results: pd.DataFrame, rank_by: str = 'net_profit', ascending: bool = False) -> pd.DataFrame:
+    """Ordena a tabela de resultados pela métrica escolhida e adiciona a coluna 'rank'"""
+    if rank_by not in results.columns:
+        results[rank_by] = np.nan
+    results = results.sort_values(rank_by, ascending=ascending, na_position='last', kind='stable')
+    results = results.reset_index(drop=True)
+    results.insert(0, 'rank', np.arange(1, len(results) + 1))
+    return results
+
+
+def main():
+    """Função principal (CLI)"""
+    parser = argparse.ArgumentParser(description='Otimização de parâmetros de estratégias NTSL')
+    parser.add_argument('--strategy', '-s', required=True, help='Caminho da estratégia NTSL')
+    parser.add_argument('--data', '-d', required=True, help='Caminho do arquivo CSV')
+    parser.add_argument('--start-date', help='Data início (YYYY-MM-DD)')
+    parser.add_argument('--end-date', help='Data fim (YYYY-MM-DD)')
+    parser.add_argument('--timeframe', '-t', help='Tempo gráfico em minutos (ex: 5, 15)')
+    parser.add_argument('--param', '-p', action='append', default=[],
+                        help='Faixa de um input: nome=inicio:fim:passo ou nome=v1,v2,v3 (repetível)')
+    parser.add_argument('--workers', '-w', type=int, help='Número de processos (padrão: todos os núcleos)')
+    parser.add_argument('--mode', '-m', choices=ENGINE_MODES, default='fast', help='Modo do engine')
+    parser.add_argument('--rank-by', default='net_profit', help='Métrica para ordenação')
+    parser.add_argument('--seed', type=int, default=SWEEP_SEED,
+                        help='Semente do modelo de spread (padrão: %(default)s)')
+    parser.add_argument('--cache-mb', type=int, default=256,
+                        help='Cache de indicadores por processo, em MB (0 desativa)')
+    parser.add_argument('--cache-dir', help='Diretório do cache de indicadores em disco')
+    parser.add_argument('--top', type=int, default=20, help='Quantidade de linhas exibidas')
+    parser.add_argument('--output', '-o', help='Arquivo CSV para salvar a tabela completa')
+
+    args = parser.parse_args()
+
+    param_ranges = dict(parse_param_range(spec) for spec in args.param)
+    strategy = NTSLParser().parse_file(args.strategy)
+    timeframe_str = f"{args.timeframe}min" if args.timeframe else "1min"
+
+    data = DataProvider(verbose=False).get_data(
+        symbol=args.data,
+        start_date=args.start_date or '',
+        end_date=args.end_date or '',
+        source='local_csv',
+        target_interval=timeframe_str
+    )
+    if args.start_date and args.end_date:
+        data = data[(data.index >= pd.to_datetime(args.start_date)) & (data.index <= pd.to_datetime(args.end_date))]
+
+    grid_size = len(build_grid(param_ranges))
+    asset_name = Path(args.data).stem.split('_')[0]
+    optimizer = ParameterOptimizer(strategy, data, asset=asset_name, timeframe=timeframe_str,
+                                   mode=args.mode, workers=args.workers, seed=args.seed,
+                                   cache_bytes=args.cache_mb * 1024 * 1024, cache_dir=args.cache_dir)
+
+    print(f"Otimizando {strategy.name}: {grid_size} combinações em {optimizer.workers} processos")
+    start = time.perf_counter()
+    results = optimizer.run(param_ranges, rank_by=args.rank_by)
+    print(f"Concluído em {time.perf_counter() - start:.1f}s\n")
+
+    display_cols = ['rank'] + list(param_ranges.keys()) + [
+        c for c in ['net_profit', 'profit_factor', 'win_rate', 'total_trades', 'avg_trade'] if c in results.columns]
+    with pd.option_context('display.width', 200, 'display.max_columns', 50):
+        print(results[display_cols].head(args.top).to_string(index=False))
+
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        results.to_csv(output_path, index=False)
+        print(f"\nTabela completa salva em: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
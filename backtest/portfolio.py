@@ -0,0 +1,301 @@
+"""
+Backtest de portfólio: várias pernas (estratégia, arquivo de dados, tempo gráfico)
+executadas em paralelo e consolidadas em uma única curva de equity.
+
+Cada perna é executada de forma independente em um pool de processos (cada
+worker carrega o próprio CSV). Opcionalmente, um limite de perda diária do
+portfólio é aplicado sobre todas as pernas: quando o resultado realizado do
+dia atinge o limite, as entradas seguintes de qualquer perna são descartadas.
+
+Uso:
+    python -m backtest.portfolio \\
+        --leg "estrategias/automations/x.txt,backtest/dados/WIN_1min.csv,5" \\
+        --leg "estrategias/automations/x.txt,backtest/dados/WDO_1min.csv,5" \\
+        --max-daily-loss 500
+"""
+
+import argparse
+import heapq
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .ntsl_parser import NTSLParser
+from .backtest_engine import ENGINE_MODES, BacktestEngine, rebuild_equity_curve
+from .data_provider import DataProvider
+from .metrics import equity_metrics, trade_summary
+from .trade_log import TradeLog
+from .spread_model import SWEEP_SEED, UniformSpreadModel
+
+
+@dataclass
+class PortfolioLeg:
+    """Uma perna do portfólio"""
+    strategy_path: str
+    data_path: str
+    timeframe: str = '1min'
+    name: Optional[str] = None
+
+    def __post_init__(self):
+        if self.timeframe.isdigit():
+            self.timeframe = f"{self.timeframe}min"
+        if not self.name:
+            self.name = f"{Path(self.data_path).stem.split('_')[0]}:{Path(self.strategy_path).stem}"
+
+
+@dataclass
+class PortfolioResult:
+    """Resultado consolidado do portfólio"""
+    legs: pd.DataFrame             # Uma linha por perna: métricas e trades descartados
+    equity_curve: pd.Series        # Equity do portfólio no índice comum (união dos índices)
+    leg_equity: pd.DataFrame       # Equity de cada perna no índice comum
+    trades: pd.DataFrame           # Trades de todas as pernas (coluna 'leg' e 'accepted')
+    metrics: Dict[str, float]
+
+
+def parse_leg(spec: str) -> PortfolioLeg:
+    """Converte 'estrategia.txt,dados.csv[,tempo_grafico[,nome]]' em PortfolioLeg"""
+    parts = [p.strip() for p in spec.split(',')]
+    if len(parts) < 2 or len(parts) > 4:
+        raise ValueError(f"Perna inválida: '{spec}'. Use estrategia,dados[,tempo_grafico[,nome]]")
+    return PortfolioLeg(*parts)
+
+
+def _run_leg(leg: PortfolioLeg, start_date: str, end_date: str, mode: str,
+             seed: Optional[int]) -> Dict[str, Any]:
+    """Carrega os dados e executa o backtest de uma perna (no worker)"""
+    start = time.perf_counter()
+    try:
+        strategy = NTSLParser().parse_file(leg.strategy_path)
+        data = DataProvider(verbose=False).get_data(
+            symbol=leg.data_path,
+            start_date=start_date or '',
+            end_date=end_date or '',
+            source='local_csv',
+            target_interval=leg.timeframe
+        )
+        if start_date and end_date:
+            data = data[(data.index >= pd.to_datetime(start_date)) & (data.index <= pd.to_datetime(end_date))]
+        if data is None or data.empty:
+            raise ValueError(f"Nenhum dado carregado de {leg.data_path}")
+
+        result = BacktestEngine(verbosity=0, spread_model=UniformSpreadModel(seed)).run_backtest(
+            strategy, data, leg.name, leg.timeframe, mode=mode, rebuild_equity=True)
+        return {
+            'leg': leg,
+            'trades': result.trades,
+            'close': data['close'].to_numpy(dtype=np.float64),
+            'index': data.index,
+            'points_per_tick': float(strategy.inputs.get('pontosPorTick', 1.0)),
+            'error': None,
+            'elapsed_s': time.perf_counter() - start
+        }
+    except Exception as e:
+        return {'leg': leg, 'trades': TradeLog(), 'close': None, 'index': None,
+                'error': str(e), 'elapsed_s': time.perf_counter() - start}
+
+
+def apply_daily_risk_cap(leg_trades: List[TradeLog], max_daily_loss: float) -> List[np.ndarray]:
+    """
+    Aplica o limite de perda diária do portfólio sobre todas as pernas.
+
+    As entradas são percorridas em ordem cronológica; o resultado realizado do dia
+    considera apenas trades aceitos que saíram (no mesmo dia) até o momento da
+    entrada. Atingido -max_daily_loss, as entradas restantes do dia são descartadas.
+
+    Returns:
+        Uma máscara booleana por perna (True = trade aceito)
+    """
+    accepted = [np.ones(len(trades), dtype=bool) for trades in leg_trades]
+    entry_times = [trades.times('entry_time') for trades in leg_trades]
+    exit_times = [trades.times('exit_time') for trades in leg_trades]
+    results = [trades.column('result') for trades in leg_trades]
+    entries = sorted((t, leg, k) for leg, times in enumerate(entry_times) for k, t in enumerate(times))
+
+    pending = []  # heap de (saída, sequência, resultado) dos trades aceitos
+    day = None
+    realized = 0.0
+    for seq, (entry_time, leg, k) in enumerate(entries):
+        if entry_time.date() != day:
+            day = entry_time.date()
+            realized = 0.0
+
+        while pending and pending[0][0] <= entry_time:
+            exit_time, _, result = heapq.heappop(pending)
+            if exit_time.date() == day:
+                realized += result
+
+        if realized <= -max_daily_loss:
+            accepted[leg][k] = False
+            continue
+        exit_time, result = exit_times[leg][k], results[leg][k]
+        if not pd.isna(exit_time) and not np.isnan(result):
+            heapq.heappush(pending, (exit_time, seq, float(result)))
+
+    return accepted
+
+
+class PortfolioBacktest:
+    """
+    Executa as pernas do portfólio em paralelo e consolida os resultados.
+    """
+
+    def __init__(self, legs: List[PortfolioLeg], mode: str = 'fast', workers: Optional[int] = None,
+                 seed: Optional[int] = SWEEP_SEED, max_daily_loss: Optional[float] = None):
+        """
+        Args:
+            legs: Pernas do portfólio
+            mode: Modo do engine ('standard' ou 'fast')
+            workers: Número de processos (padrão: uma por perna, até o número de núcleos)
+            seed: Semente do modelo de spread (padrão: SWEEP_SEED, a mesma em todas as execuções;
+                  None sorteia um spread diferente a cada execução)
+            max_daily_loss: Limite de perda diária do portfólio (None desativa)
+        """
+        if not legs:
+            raise ValueError("O portfólio precisa de pelo menos uma perna")
+        names = [leg.name for leg in legs]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Nomes de pernas duplicados: {names}")
+
+        self.legs = legs
+        self.mode = mode
+        self.workers = workers or min(len(legs), os.cpu_count() or 1)
+        self.seed = seed
+        self.max_daily_loss = max_daily_loss
+
+    def run(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> PortfolioResult:
+        """Executa todas as pernas e consolida o portfólio"""
+        args = (start_date, end_date, self.mode, self.seed)
+        if self.workers <= 1 or len(self.legs) == 1:
+            outcomes = [_run_leg(leg, *args) for leg in self.legs]
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = [executor.submit(_run_leg, leg, *args) for leg in self.legs]
+                outcomes = [future.result() for future in futures]
+
+        return self._consolidate(outcomes)
+
+    def _consolidate(self, outcomes: List[Dict[str, Any]]) -> PortfolioResult:
+        """Aplica o limite diário, reconstrói as curvas e soma no índice comum"""
+        leg_trades = [outcome['trades'] for outcome in outcomes]
+        if self.max_daily_loss is not None:
+            accepted = apply_daily_risk_cap(leg_trades, self.max_daily_loss)
+        else:
+            accepted = [np.ones(len(trades), dtype=bool) for trades in leg_trades]
+
+        curves = {}
+        leg_rows = []
+        trade_frames = []
+        leg_results = []
+        for outcome, mask in zip(outcomes, accepted):
+            leg = outcome['leg']
+            kept = outcome['trades'].select(mask)
+            results = kept.results
+            leg_results.append(results)
+
+            if outcome['error'] is None:
+                equity = rebuild_equity_curve(kept, outcome['close'], outcome['index'],
+                                              points_per_tick=outcome['points_per_tick'])
+                curves[leg.name] = pd.Series(equity, index=outcome['index'])
+
+            row = {'leg': leg.name, 'strategy': leg.strategy_path, 'data': leg.data_path,
+                   'timeframe': leg.timeframe}
+            row.update(trade_summary(results))
+            row['dropped_trades'] = int((~mask).sum())
+            row['elapsed_s'] = outcome['elapsed_s']
+            row['error'] = outcome['error']
+            leg_rows.append(row)
+
+            if len(outcome['trades']):
+                frame = outcome['trades'].to_frame()
+                frame.insert(0, 'leg', leg.name)
+                frame['accepted'] = mask
+                trade_frames.append(frame)
+
+        # Índice comum: união dos índices; cada perna mantém o último valor (ffill)
+        # e vale zero antes da sua primeira barra
+        if curves:
+            leg_equity = pd.DataFrame(curves).sort_index().ffill().fillna(0.0)
+        else:
+            leg_equity = pd.DataFrame()
+        equity_curve = leg_equity.sum(axis=1).rename('equity')
+
+        trades = pd.concat(trade_frames, ignore_index=True) if trade_frames else pd.DataFrame()
+        if not trades.empty:
+            trades = trades.sort_values(['entry_time', 'leg'], kind='stable').reset_index(drop=True)
+
+        accepted_results = np.concatenate(leg_results) if leg_results else np.empty(0, dtype=np.float64)
+        metrics = trade_summary(accepted_results)
+        metrics['dropped_trades'] = int(sum(row['dropped_trades'] for row in leg_rows))
+        metrics['legs'] = len(self.legs)
+        metrics['failed_legs'] = sum(1 for row in leg_rows if row['error'])
+        metrics.update(equity_metrics(equity_curve.to_numpy(), equity_curve.index, metrics['net_profit']))
+
+        return PortfolioResult(
+            legs=pd.DataFrame(leg_rows),
+            equity_curve=equity_curve,
+            leg_equity=leg_equity,
+            trades=trades,
+            metrics=metrics
+        )
+
+
+def main():
+    """Função principal (CLI)"""
+    parser = argparse.ArgumentParser(description='Backtest de portfólio com várias pernas em paralelo')
+    parser.add_argument('--leg', '-l', action='append', default=[],
+                        help='Perna: estrategia.txt,dados.csv[,tempo_grafico[,nome]] (repetível)')
+    parser.add_argument('--legs-file', help='CSV com colunas strategy,data[,timeframe,name]')
+    parser.add_argument('--start-date', help='Data início (YYYY-MM-DD)')
+    parser.add_argument('--end-date', help='Data fim (YYYY-MM-DD)')
+    parser.add_argument('--max-daily-loss', type=float, help='Limite de perda diária do portfólio')
+    parser.add_argument('--workers', '-w', type=int, help='Número de processos')
+    parser.add_argument('--mode', '-m', choices=ENGINE_MODES, default='fast', help='Modo do engine')
+    parser.add_argument('--seed', type=int, default=SWEEP_SEED,
+                        help='Semente do modelo de spread (padrão: %(default)s)')
+    parser.add_argument('--output', '-o', help='Diretório para salvar pernas, trades e equity (CSV)')
+
+    args = parser.parse_args()
+
+    legs = [parse_leg(spec) for spec in args.leg]
+    if args.legs_file:
+        table = pd.read_csv(args.legs_file, dtype=str).fillna('')
+        for row in table.to_dict('records'):
+            legs.append(PortfolioLeg(row['strategy'], row['data'], row.get('timeframe') or '1min',
+                                     row.get('name') or None))
+    if not legs:
+        parser.error('informe ao menos uma perna (--leg ou --legs-file)')
+
+    portfolio = PortfolioBacktest(legs, mode=args.mode, workers=args.workers, seed=args.seed,
+                                  max_daily_loss=args.max_daily_loss)
+    print(f"Portfólio com {len(legs)} pernas em {portfolio.workers} processos")
+    start = time.perf_counter()
+    result = portfolio.run(args.start_date, args.end_date)
+    print(f"Concluído em {time.perf_counter() - start:.1f}s\n")
+
+    display_cols = ['leg', 'timeframe', 'net_profit', 'total_trades', 'win_rate', 'dropped_trades', 'error']
+    with pd.option_context('display.width', 200, 'display.max_columns', 50):
+        print(result.legs[display_cols].to_string(index=False))
+
+    print("\nResumo do portfólio:")
+    for key, value in result.metrics.items():
+        print(f"  {key}: {value:.2f}" if isinstance(value, float) else f"  {key}: {value}")
+
+    if args.output:
+        output_dir = Path(args.output)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        result.legs.to_csv(output_dir / 'pernas.csv', index=False)
+        result.trades.to_csv(output_dir / 'trades.csv', index=False, date_format='%Y-%m-%d %H:%M:%S')
+        result.leg_equity.assign(portfolio=result.equity_curve).to_csv(
+            output_dir / 'equity.csv', index_label='datetime')
+        print(f"\nResultados salvos em: {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Compartilhamento de DataFrames entre processos via memória compartilhada.
+
+O DataFrame (colunas numéricas + índice de datas) é copiado uma única vez para
+blocos de multiprocessing.shared_memory. Os processos de trabalho recebem apenas
+um descritor leve e reconstroem o DataFrame sobre os mesmos buffers, sem que os
+dados sejam serializados (pickle) a cada tarefa.
+"""
+
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class SharedFrameDescriptor:
+    """Descritor serializável de um DataFrame em memória compartilhada"""
+    index_block: str
+    index_dtype: str
+    index_name: Optional[str]
+    tz: Optional[str]  # índice gravado em UTC quando há fuso
+    columns: List[Tuple[str, str, str]]  # (coluna, nome do bloco, dtype)
+    length: int
+    attrs: Dict
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Conecta a um bloco existente sem registrá-lo no resource tracker do processo"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: o parâmetro track não existe. Os workers do pool usam o
+        # resource tracker do processo principal, onde o registro é idempotente;
+        # desregistrar aqui apagaria o registro do próprio processo principal
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedDataFrame:
+    """
+    Mantém um DataFrame em memória compartilhada (lado do processo principal).
+    Use como context manager para garantir a liberação dos blocos.
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        self._blocks: List[shared_memory.SharedMemory] = []
+
+        index = data.index
+        tz = str(index.tz) if getattr(index, 'tz', None) is not None else None
+        # Índices com fuso seguem em UTC: a hora local é ambígua na volta do horário de verão
+        index_values = index.tz_convert('UTC').tz_localize(None).to_numpy() if tz else index.to_numpy()
+        index_block = self._copy_to_block(index_values)
+
+        columns = []
+        for col in data.columns:
+            values = data[col].to_numpy()
+            if values.dtype == object:
+                continue  # Apenas colunas numéricas são compartilhadas
+            block = self._copy_to_block(values)
+            columns.append((col, block.name, values.dtype.str))
+
+        self.descriptor = SharedFrameDescriptor(
+            index_block=index_block.name,
+            index_dtype=index_values.dtype.str,
+            index_name=index.name,
+            tz=tz,
+            columns=columns,
+            length=len(data),
+            attrs=dict(data.attrs)
+        )
+
+    def _copy_to_block(self, values: np.ndarray) -> shared_memory.SharedMemory:
+        block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+        self._blocks.append(block)
+        return block
+
+    def close(self):
+        """Libera os blocos de memória compartilhada"""
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self) -> 'SharedDataFrame':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+# Blocos conectados no processo de trabalho (mantidos vivos enquanto o DataFrame existir)
+_attached_blocks: List[shared_memory.SharedMemory] = []
+
+
+def attach_shared_frame(descriptor: SharedFrameDescriptor) -> pd.DataFrame:
+    """Reconstrói o DataFrame a partir do descritor, sem copiar os dados"""
+    length = descriptor.length
+
+    block = _attach(descriptor.index_block)
+    _attached_blocks.append(block)
+    index_values = np.ndarray((length,), dtype=np.dtype(descriptor.index_dtype), buffer=block.buf)
+    index = pd.DatetimeIndex(index_values, name=descriptor.index_name, copy=False)
+    if descriptor.tz:
+        index = index.tz_localize('UTC').tz_convert(descriptor.tz)
+
+    columns = {}
+    for col, block_name, dtype in descriptor.columns:
+        block = _attach(block_name)
+        _attached_blocks.append(block)
+        columns[col] = np.ndarray((length,), dtype=np.dtype(dtype), buffer=block.buf)
+
+    data = pd.DataFrame(columns, index=index, copy=False)
+    data.attrs.update(descriptor.attrs)
+    return data
@@ -0,0 +1,111 @@
+"""
+Modelos de spread usados no filtro de entrada (filtro_spreadMaximoTicks).
+
+Cada modelo gera o spread simulado (em ticks) de todas as barras de uma vez,
+como um único vetor por execução. O engine converte o vetor em uma máscara
+booleana (entrada permitida / bloqueada) antes do loop, de modo que o filtro
+não chama o gerador aleatório barra a barra e, com semente, é reproduzível.
+No modo streaming, bar_entry_ok avalia uma barra por vez com a mesma sequência.
+"""
+
+import math
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+SPREAD_MODELS = ('uniform', 'fixed', 'column')
+
+# Semente padrão das varreduras (otimizador, walk-forward, catálogo, portfólio): todos os
+# pontos da grade veem o mesmo spread, e o ranking reflete só o efeito dos parâmetros
+SWEEP_SEED = 42
+
+
+class SpreadModel:
+    """Interface base dos modelos de spread"""
+
+    def spread_ticks(self, data: pd.DataFrame, max_ticks: float) -> np.ndarray:
+        """Spread simulado (em ticks) de cada barra"""
+        raise NotImplementedError
+
+    def entry_mask(self, data: pd.DataFrame, max_ticks: float) -> np.ndarray:
+        """Máscara booleana por barra: True quando o spread permite a entrada"""
+        spread = self.spread_ticks(data, max_ticks)
+        # NaN (spread desconhecido) não bloqueia a entrada
+        return ~(spread > max_ticks)
+
+    def bar_spread_ticks(self, bar: Dict[str, float], max_ticks: float) -> float:
+        """Spread simulado (em ticks) de uma única barra (modo streaming)"""
+        raise NotImplementedError
+
+    def bar_entry_ok(self, bar: Dict[str, float], max_ticks: float) -> bool:
+        """Equivalente de entry_mask para uma única barra"""
+        return not self.bar_spread_ticks(bar, max_ticks) > max_ticks
+
+
+class UniformSpreadModel(SpreadModel):
+    """
+    Spread uniforme entre 0 e max_ticks + margem (comportamento original do engine).
+    Com seed, a mesma semente gera o mesmo vetor em todas as execuções.
+    """
+
+    def __init__(self, seed: Optional[int] = None, margin_ticks: float = 2.0):
+        self.seed = seed
+        self.margin_ticks = margin_ticks
+        self._stream_rng = None
+
+    def spread_ticks(self, data: pd.DataFrame, max_ticks: float) -> np.ndarray:
+        rng = np.random.default_rng(self.seed)
+        return rng.uniform(0.0, max_ticks + self.margin_ticks, size=len(data))
+
+    def bar_spread_ticks(self, bar: Dict[str, float], max_ticks: float) -> float:
+        # Um sorteio por barra: com a mesma semente, reproduz o vetor de spread_ticks
+        if self._stream_rng is None:
+            self._stream_rng = np.random.default_rng(self.seed)
+        return float(self._stream_rng.uniform(0.0, max_ticks + self.margin_ticks))
+
+
+class FixedSpreadModel(SpreadModel):
+    """Spread constante (ex: 0 desativa o filtro na prática)"""
+
+    def __init__(self, ticks: float = 1.0):
+        self.ticks = ticks
+
+    def spread_ticks(self, data: pd.DataFrame, max_ticks: float) -> np.ndarray:
+        return np.full(len(data), float(self.ticks))
+
+    def bar_spread_ticks(self, bar: Dict[str, float], max_ticks: float) -> float:
+        return float(self.ticks)
+
+
+class ColumnSpreadModel(SpreadModel):
+    """
+    Spread lido de uma coluna dos dados (ex: coluna 'Spread' exportada do Profit).
+    Se tick_size for informado, a coluna está em pontos e é convertida para ticks.
+    """
+
+    def __init__(self, column: str = 'spread', tick_size: Optional[float] = None):
+        self.column = column
+        self.tick_size = tick_size
+
+    def spread_ticks(self, data: pd.DataFrame, max_ticks: float) -> np.ndarray:
+        if self.column not in data.columns:
+            raise ValueError(f"Coluna de spread '{self.column}' não encontrada nos dados")
+        spread = data[self.column].to_numpy(dtype=np.float64)
+        return spread / self.tick_size if self.tick_size else spread
+
+    def bar_spread_ticks(self, bar: Dict[str, float], max_ticks: float) -> float:
+        spread = bar.get(self.column, math.nan)
+        return spread / self.tick_size if self.tick_size else spread
+
+
+def create_spread_model(name: str, seed: Optional[int] = None, ticks: float = 1.0,
+                        column: str = 'spread') -> SpreadModel:
+    """Cria um modelo pelo nome ('uniform', 'fixed' ou 'column'), usado pelas CLIs"""
+    if name == 'uniform':
+        return UniformSpreadModel(seed)
+    if name == 'fixed':
+        return FixedSpreadModel(ticks)
+    if name == 'column':
+        return ColumnSpreadModel(column)
+    raise ValueError(f"Modelo de spread não suportado: {name}. Disponíveis: {SPREAD_MODELS}")
@@ -0,0 +1,457 @@
+"""
+Modo streaming (paper trading) sobre um CSV que o Profit Pro continua anexando.
+
+A cada consulta (poll), apenas as linhas novas do arquivo são lidas (a posição
+em bytes é guardada). Os minutos são agregados no tempo gráfico e, quando uma
+barra fecha, os indicadores são atualizados de forma incremental
+(online_indicators) e a lógica da estratégia roda uma única vez para essa barra,
+reaproveitando o passo do FastBarKernel. Entradas e saídas são emitidas pelos
+mesmos EventSinks do engine.
+
+O estado completo da sessão (posição no arquivo, barra em formação, indicadores,
+posição aberta, trades e controles diários) é salvo em disco e restaurado ao
+reiniciar, continuando de onde parou.
+
+Uso:
+    python -m backtest.streaming --strategy estrategias/automations/orquestrador_moderado_1.txt \\
+        --data backtest/dados/WINFUT_1min.csv --timeframe 5 \\
+        --state resultados/streaming/estado.pkl --events resultados/streaming/eventos.jsonl
+"""
+
+import argparse
+import math
+import os
+import pickle
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from .ntsl_parser import NTSLParser, NTSLStrategy
+from .backtest_engine import Trade, NTSL_TO_TALIB_MATYPE
+from .trade_log import TradeLog
+from .data_provider import csv_rename_map
+from .fast_kernel import FastBarKernel, FastConfig, FastState
+from .online_indicators import OnlineSMA, OnlineBollinger, OnlineATR
+from .spread_model import SPREAD_MODELS, SpreadModel, UniformSpreadModel, create_spread_model
+from .events import EventSink, NullEventSink, ConsoleEventSink, JsonlEventSink, TeeEventSink
+
+
+def _parse_number(text: str) -> float:
+    """Número no formato do Profit (milhar '.', decimal ',')"""
+    text = text.strip()
+    if not text:
+        return math.nan
+    return float(text.replace('.', '').replace(',', '.'))
+
+
+def _parse_timestamp(data: str, hora: str) -> pd.Timestamp:
+    """Data 'dd/mm/aaaa' e hora 'HH:MM[:SS]' do Profit"""
+    day, month, year = data.strip().split('/')
+    parts = hora.strip().split(':')
+    second = int(parts[2]) if len(parts) > 2 else 0
+    return pd.Timestamp(datetime(int(year), int(month), int(day), int(parts[0]), int(parts[1]), second))
+
+
+class CsvTail:
+    """
+    Lê apenas as linhas novas de um CSV em crescimento.
+    Linhas incompletas (sem quebra de linha) ficam para a próxima leitura.
+    """
+
+    def __init__(self, path: str, sep: str = ';'):
+        self.path = str(path)
+        self.sep = sep
+        self.offset = 0
+        self.encoding: Optional[str] = None
+        self.fields: Optional[Dict[str, int]] = None
+
+    def _read_header(self, line: bytes):
+        """Detecta a codificação e mapeia as colunas pelo cabeçalho"""
+        try:
+            header = line.decode('utf-8-sig')
+            self.encoding = 'utf-8'
+        except UnicodeDecodeError:
+            header = line.decode('latin-1')
+            self.encoding = 'latin-1'
+        columns = [c.strip() for c in header.split(self.sep)]
+        rename_map = csv_rename_map(columns)
+        self.fields = {rename_map[c]: pos for pos, c in enumerate(columns) if c in rename_map}
+        missing = [c for c in ('data', 'hora', 'open', 'high', 'low', 'close') if c not in self.fields]
+        if missing:
+            raise ValueError(f"Colunas obrigatórias não encontradas no CSV: {missing}")
+
+    def read_rows(self) -> List[Dict[str, Any]]:
+        """Devolve as linhas completas anexadas desde a última leitura"""
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return []
+        if size < self.offset:
+            # Arquivo recriado: relê do início (minutos já processados são descartados)
+            self.offset = 0
+            self.fields = None
+        if size == self.offset:
+            return []
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            chunk = f.read(size - self.offset)
+        end = chunk.rfind(b'\n')
+        if end < 0:
+            return []
+        chunk = chunk[:end + 1]
+        self.offset += len(chunk)
+
+        lines = chunk.splitlines()
+        if self.fields is None:
+            self._read_header(lines.pop(0))
+
+        fields = self.fields
+        rows = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                values = line.decode(self.encoding).split(self.sep)
+            except UnicodeDecodeError:
+                values = line.decode('latin-1').split(self.sep)
+            row = {name: _parse_number(values[pos]) for name, pos in fields.items()
+                   if name not in ('data', 'hora') and pos < len(values)}
+            # Linhas sem OHLC completo são descartadas (como o dropna do DataProvider)
+            if any(row.get(c, math.nan) != row.get(c, math.nan) for c in ('open', 'high', 'low', 'close')):
+                continue
+            row['time'] = _parse_timestamp(values[fields['data']], values[fields['hora']])
+            rows.append(row)
+        return rows
+
+
+class BarAggregator:
+    """
+    Agrega minutos no tempo gráfico com a mesma convenção do resample do
+    DataProvider (rótulo e fechamento à esquerda, origem à meia-noite do
+    primeiro dia). A barra é finalizada quando chega o último minuto do
+    intervalo ou o primeiro minuto de um intervalo seguinte.
+    """
+
+    def __init__(self, timeframe: str = '1min', source_step: str = '1min'):
+        if timeframe.isdigit():
+            timeframe = f"{timeframe}min"
+        self.freq = pd.Timedelta(timeframe)
+        self.source_step = pd.Timedelta(source_step)
+        if self.freq < self.source_step:
+            raise ValueError(f"Tempo gráfico {timeframe} menor que o intervalo dos dados ({source_step})")
+        self.origin: Optional[pd.Timestamp] = None
+        self.last_time: Optional[pd.Timestamp] = None
+        self.current: Optional[Dict[str, Any]] = None
+
+    def add(self, row: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Adiciona um minuto e devolve as barras finalizadas por ele"""
+        ts = row['time']
+        if self.last_time is not None and ts <= self.last_time:
+            return []  # Minuto repetido (releitura do arquivo)
+        self.last_time = ts
+        if self.origin is None:
+            self.origin = ts.normalize()
+
+        start = self.origin + ((ts - self.origin) // self.freq) * self.freq
+        finished = []
+        bar = self.current
+        if bar is not None and bar['time'] != start:
+            finished.append(bar)
+            bar = None
+        if bar is None:
+            bar = {'time': start, 'open': row['open'], 'high': row['high'], 'low': row['low'],
+                   'close': row['close'], 'volume': row.get('volume', 100.0)}
+        else:
+            bar['high'] = max(bar['high'], row['high'])
+            bar['low'] = min(bar['low'], row['low'])
+            bar['close'] = row['close']
+            bar['volume'] += row.get('volume', 100.0)
+        if 'spread' in row:
+            bar['spread'] = row['spread']
+
+        if ts + self.source_step >= start + self.freq:
+            finished.append(bar)
+            bar = None
+        self.current = bar
+        return finished
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """Finaliza a barra em formação (ex: fim do pregão ou do arquivo)"""
+        bar, self.current = self.current, None
+        return [bar] if bar is not None else []
+
+
+class StreamingIndicators:
+    """
+    Indicadores e sinais da estratégia atualizados barra a barra
+    (equivalente a _prepare_data + _precompute_signals do engine).
+    """
+
+    def __init__(self, inputs: Dict[str, Any]):
+        self.count = 0
+        self.sma_trend = OnlineSMA(int(inputs['lw_mediaTendencia'])) if 'lw_mediaTendencia' in inputs else None
+        self.sma_signal_high = self.sma_signal_low = None
+        if 'lw_mediaSinal' in inputs:
+            periodo = int(inputs['lw_mediaSinal'])
+            self.sma_signal_high = OnlineSMA(periodo)
+            self.sma_signal_low = OnlineSMA(periodo)
+        self.bollinger = None
+        if 'bb_periodo' in inputs:
+            ta_matype = NTSL_TO_TALIB_MATYPE.get(int(inputs.get('bb_tipoMedia', 0)), 0)
+            self.bollinger = OnlineBollinger(int(inputs['bb_periodo']), float(inputs.get('bb_desvio', 2.0)), ta_matype)
+        self.atr = OnlineATR(int(inputs['filtro_volatilidade_atrPeriodo'])) \
+            if 'filtro_volatilidade_atrPeriodo' in inputs else None
+
+    def update(self, bar: Dict[str, Any]):
+        """Devolve (atr, sinal_lw, sinal_bb) da barra"""
+        close, high, low = bar['close'], bar['high'], bar['low']
+        index = self.count
+        self.count += 1
+
+        signal_lw = 0
+        if self.sma_trend is not None:
+            tendencia = self.sma_trend.update(close)
+        if self.sma_signal_high is not None:
+            media_sinal_high = self.sma_signal_high.update(high)
+            media_sinal_low = self.sma_signal_low.update(low)
+            if self.sma_trend is not None and index >= 20:
+                # Comparações com NaN resultam em False, como na versão vetorizada
+                if close > tendencia and low < media_sinal_low:
+                    signal_lw = 1
+                elif close < tendencia and high > media_sinal_high:
+                    signal_lw = -1
+
+        signal_bb = 0
+        if self.bollinger is not None:
+            bb_upper, _, bb_lower = self.bollinger.update(close)
+            if close > bb_upper:
+                signal_bb = 1
+            elif close < bb_lower:
+                signal_bb = -1
+
+        atr = self.atr.update(high, low, close) if self.atr is not None else 0
+        return atr, signal_lw, signal_bb
+
+
+class StreamingKernel(FastBarKernel):
+    """
+    FastBarKernel com buffers que crescem a cada barra fechada, em vez de
+    arrays extraídos de um DataFrame completo.
+    """
+
+    def __init__(self, strategy: NTSLStrategy, event_sink: Optional[EventSink] = None):
+        self.trade_cls = Trade
+        self.engine = None
+        self.config = FastConfig(strategy)
+        self.state = FastState.initial()
+        self.trades = TradeLog()
+        self.equity: List[float] = []
+        self.track_equity = True
+        self.intrabar = None
+        self.index: List[pd.Timestamp] = []
+        self.close: List[float] = []
+        self.high: List[float] = []
+        self.low: List[float] = []
+        self.atr: List[float] = []
+        self.signal_lw: List[int] = []
+        self.signal_bb: List[int] = []
+        self.spread_ok: List[bool] = []
+        self.hour: List[int] = []
+        self.minute: List[int] = []
+        self.hhmm: List[int] = []
+        self.day: List[int] = []
+        self.attach_events(event_sink)
+
+    def attach_events(self, event_sink: Optional[EventSink]):
+        """Define o destino dos eventos (não é salvo junto com o estado)"""
+        self.events = event_sink or NullEventSink()
+        self.emit_events = self.events.enabled
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['events'] = None
+        state['emit_events'] = False
+        return state
+
+    def append_bar(self, bar: Dict[str, Any], atr: float, signal_lw: int, signal_bb: int, spread_ok: bool):
+        """Acrescenta uma barra fechada aos buffers e executa a estratégia sobre ela"""
+        ts = bar['time']
+        self.index.append(ts)
+        self.close.append(bar['close'])
+        self.high.append(bar['high'])
+        self.low.append(bar['low'])
+        self.atr.append(atr)
+        self.signal_lw.append(signal_lw)
+        self.signal_bb.append(signal_bb)
+        self.spread_ok.append(spread_ok)
+        self.hour.append(ts.hour)
+        self.minute.append(ts.minute)
+        self.hhmm.append(ts.hour * 100 + ts.minute)
+        self.day.append(ts.year * 10000 + ts.month * 100 + ts.day)
+        self.equity.append(0.0)
+        self.step(len(self.close) - 1)
+
+
+class StreamingSession:
+    """
+    Sessão de paper trading: consome o CSV incrementalmente e mantém o estado
+    da estratégia entre consultas e entre reinícios (save/load).
+    """
+
+    def __init__(self, strategy: NTSLStrategy, data_path: str, timeframe: str = '1min',
+                 spread_model: Optional[SpreadModel] = None, event_sink: Optional[EventSink] = None):
+        """
+        Args:
+            strategy: Estratégia NTSL parseada
+            data_path: CSV de 1 minuto exportado pelo Profit (em crescimento)
+            timeframe: Tempo gráfico da estratégia ('5min' ou '5')
+            spread_model: Modelo de spread do filtro de entrada (padrão: uniforme sem semente)
+            event_sink: Destino dos eventos de entrada/saída/bloqueio/virada de dia
+        """
+        self.strategy = strategy
+        self.timeframe = timeframe
+        self.tail = CsvTail(data_path)
+        self.aggregator = BarAggregator(timeframe)
+        self.indicators = StreamingIndicators(strategy.inputs)
+        self.spread_model = spread_model or UniformSpreadModel()
+        self.max_spread_ticks = strategy.inputs.get('filtro_spreadMaximoTicks', 5)
+        self.kernel = StreamingKernel(strategy, event_sink)
+        # Latência do processamento de cada barra fechada (segundos)
+        self.bar_seconds_total = 0.0
+        self.bar_seconds_max = 0.0
+
+    @property
+    def trades(self) -> TradeLog:
+        return self.kernel.trades
+
+    @property
+    def bars(self) -> int:
+        return len(self.kernel.close)
+
+    @property
+    def open_trade(self) -> Optional[Trade]:
+        return self.kernel.state.trade
+
+    def attach_events(self, event_sink: Optional[EventSink]):
+        self.kernel.attach_events(event_sink)
+
+    def on_bar(self, bar: Dict[str, Any]):
+        """Processa uma barra fechada"""
+        start = time.perf_counter()
+        atr, signal_lw, signal_bb = self.indicators.update(bar)
+        spread_ok = self.spread_model.bar_entry_ok(bar, self.max_spread_ticks)
+        self.kernel.append_bar(bar, atr, signal_lw, signal_bb, spread_ok)
+        elapsed = time.perf_counter() - start
+        self.bar_seconds_total += elapsed
+        if elapsed > self.bar_seconds_max:
+            self.bar_seconds_max = elapsed
+
+    def poll(self) -> int:
+        """Lê as linhas novas do CSV e processa as barras que fecharam; devolve quantas"""
+        processed = 0
+        for row in self.tail.read_rows():
+            for bar in self.aggregator.add(row):
+                self.on_bar(bar)
+                processed += 1
+        return processed
+
+    def flush(self) -> int:
+        """Fecha e processa a barra em formação"""
+        bars = self.aggregator.flush()
+        for bar in bars:
+            self.on_bar(bar)
+        return len(bars)
+
+    def save(self, path: str):
+        """Salva o estado da sessão (escrita atômica)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, event_sink: Optional[EventSink] = None) -> 'StreamingSession':
+        """Restaura uma sessão salva por save()"""
+        with open(path, 'rb') as f:
+            session = pickle.load(f)
+        if not isinstance(session, cls):
+            raise ValueError(f"Arquivo de estado inválido: {path}")
+        session.attach_events(event_sink)
+        return session
+
+    def run(self, poll_interval: float = 1.0, state_path: Optional[str] = None, once: bool = False):
+        """
+        Consulta o CSV continuamente (até Ctrl+C). O estado é salvo sempre que
+        alguma barra é processada e ao encerrar.
+        """
+        try:
+            while True:
+                if self.poll() and state_path:
+                    self.save(state_path)
+                if once:
+                    break
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if state_path:
+                self.save(state_path)
+
+
+def main():
+    """Função principal (CLI)"""
+    parser = argparse.ArgumentParser(description='Paper trading sobre um CSV exportado pelo Profit (streaming)')
+    parser.add_argument('--strategy', '-s', required=True, help='Caminho da estratégia NTSL')
+    parser.add_argument('--data', '-d', required=True, help='CSV de 1 minuto em crescimento')
+    parser.add_argument('--timeframe', '-t', default='1', help='Tempo gráfico em minutos (ex: 5, 15)')
+    parser.add_argument('--state', help='Arquivo de estado (restaurado ao reiniciar)')
+    parser.add_argument('--reset', action='store_true', help='Ignora o estado salvo e recomeça do início do arquivo')
+    parser.add_argument('--events', help='Arquivo JSONL para gravar os eventos')
+    parser.add_argument('--poll', type=float, default=1.0, help='Intervalo entre consultas ao arquivo (segundos)')
+    parser.add_argument('--once', action='store_true', help='Processa o que houver no arquivo e encerra')
+    parser.add_argument('--verbosity', '-v', type=int, choices=[0, 1, 2], default=1,
+                        help='0 = silencioso, 1 = entradas e saídas, 2 = também bloqueios e viradas de dia')
+    parser.add_argument('--spread', choices=SPREAD_MODELS, default='uniform', help='Modelo de spread')
+    parser.add_argument('--spread-ticks', type=float, default=1.0, help='Spread do modelo fixed, em ticks')
+    parser.add_argument('--seed', type=int, help='Semente do modelo de spread')
+
+    args = parser.parse_args()
+
+    sinks = [ConsoleEventSink(args.verbosity)] if args.verbosity >= 1 else []
+    if args.events:
+        sinks.append(JsonlEventSink(args.events, buffer_size=1))
+    event_sink = TeeEventSink(*sinks)
+
+    if args.state and not args.reset and Path(args.state).exists():
+        session = StreamingSession.load(args.state, event_sink)
+        print(f"Estado restaurado: {session.strategy.name} | {session.bars} barras | "
+              f"{len(session.trades)} trades | posição no arquivo: {session.tail.offset} bytes")
+    else:
+        strategy = NTSLParser().parse_file(args.strategy)
+        spread_model = create_spread_model(args.spread, seed=args.seed, ticks=args.spread_ticks)
+        session = StreamingSession(strategy, args.data, args.timeframe, spread_model, event_sink)
+        print(f"Nova sessão: {strategy.name} | {args.data} | {session.aggregator.freq}")
+
+    bars_before = session.bars
+    seconds_before = session.bar_seconds_total
+    session.run(args.poll, args.state, once=args.once)
+    event_sink.close()
+
+    new_bars = session.bars - bars_before
+    if new_bars:
+        mean_ms = (session.bar_seconds_total - seconds_before) / new_bars * 1000
+        print(f"\n{new_bars} barras processadas (média {mean_ms:.3f} ms por barra, "
+              f"máximo {session.bar_seconds_max * 1000:.3f} ms)")
+    realized = float(session.trades.results.sum())
+    print(f"Trades: {len(session.trades)} | Resultado realizado: {realized:.2f} | "
+          f"Posição aberta: {session.open_trade.direction if session.open_trade else '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -76,6 +76,25 @@ class TechnicalIndicators:
         
         return upper, middle, lower
     
+    @staticmethod
+    def adx(data: pd.DataFrame, period: int = 14) -> pd.Series:
+        """
+        Average Directional Index - função ADX() do NTSL
+        Conforme documentação: ADX(Periodo, Suavizacao)
+        """
+        return ta.ADX(data['high'], data['low'], data['close'], timeperiod=period)
+    
+    @staticmethod
+    def dmi(data: pd.DataFrame, period: int = 14) -> Tuple[pd.Series, pd.Series]:
+        """
+        Directional Movement Index - função DiPDiM() do NTSL
+        Conforme documentação: DiPDiM(Periodo)
+        Retorna: (DI+, DI-)
+        """
+        plus_di = ta.PLUS_DI(data['high'], data['low'], data['close'], timeperiod=period)
+        minus_di = ta.MINUS_DI(data['high'], data['low'], data['close'], timeperiod=period)
+        return plus_di, minus_di
+    
     @staticmethod
     def rsi(data: pd.Series, period: int = 14) -> pd.Series:
         """
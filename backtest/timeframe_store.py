@@ -0,0 +1,185 @@
+"""
+Pirâmide de tempos gráficos construída a partir dos dados de 1 minuto.
+
+Em vez de reamostrar o DataFrame de 1 minuto a cada execução, todas as barras de
+2/3/5/10/15/30/60 minutos são construídas de uma vez com reduceat, cada nível a
+partir do anterior (1 → 2, 3, 5; 5 → 10, 15; 15 → 30; 30 → 60).
+
+Alinhamento: o pregão da B3 abre às 09:00 e todos os níveis dividem 540 e 1440
+minutos, então as barras ficam alinhadas à abertura do pregão e à meia-noite. É
+exatamente a grade do resample do DataProvider (rótulo e fechamento à esquerda,
+origem à meia-noite), e o resultado servido pela pirâmide é idêntico ao do
+resample seguido de dropna, inclusive tipos das colunas e freq do índice.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+PYRAMID_MINUTES = (2, 3, 5, 10, 15, 30, 60)
+
+# Nível de origem de cada tempo gráfico (1 = dados base)
+PYRAMID_PARENTS = {2: 1, 3: 1, 5: 1, 10: 5, 15: 5, 30: 15, 60: 30}
+
+# Colunas reamostradas e suas agregações (mesmas do DataProvider)
+OHLCV_AGGREGATIONS = {
+    'open': 'first',
+    'high': 'max',
+    'low': 'min',
+    'close': 'last',
+    'volume': 'sum'
+}
+LAST_VALUE_COLUMNS = ['sma_20_close_csv', 'bb_upper_csv', 'bb_lower_csv', 'first_bar_max_csv', 'first_bar_min_csv', 'spread']
+
+
+def aggregation_map(columns: List[str]) -> Dict[str, str]:
+    """Agregações do resample para as colunas presentes (ordem igual à do DataProvider)"""
+    ohlc_dict = dict(OHLCV_AGGREGATIONS)
+    for col in LAST_VALUE_COLUMNS:
+        if col in columns:
+            ohlc_dict[col] = 'last'
+    return ohlc_dict
+
+
+def interval_minutes(target_interval: str) -> Optional[int]:
+    """Minutos de um tempo gráfico ('5min', '1h'); None se não for um número inteiro de minutos"""
+    try:
+        delta = pd.Timedelta(target_interval)
+    except ValueError:
+        return None
+    minutes, remainder = divmod(delta, pd.Timedelta(minutes=1))
+    return int(minutes) if remainder == pd.Timedelta(0) and minutes > 0 else None
+
+
+class TimeframePyramid:
+    """
+    Barras de todos os tempos gráficos da pirâmide para um DataFrame de 1 minuto.
+
+    Cada nível guarda apenas as barras não vazias, com os tipos originais das
+    colunas; get() aplica filtro de período e a conversão de tipos que o resample
+    faria no intervalo pedido.
+    """
+
+    def __init__(self, levels: Dict[int, pd.DataFrame]):
+        """
+        Args:
+            levels: Barras por tempo gráfico em minutos (ver build())
+        """
+        self.levels = levels
+
+    @classmethod
+    def supports(cls, base: pd.DataFrame) -> bool:
+        """A pirâmide reproduz o resample se o índice está ordenado e as colunas agregadas não têm NaN"""
+        if not base.index.is_monotonic_increasing or 'volume' not in base.columns:
+            return False
+        columns = list(aggregation_map(base.columns))
+        if any(col not in base.columns or base[col].dtype.kind not in 'biuf' for col in columns):
+            return False
+        return not base[columns].isna().to_numpy().any()
+
+    @classmethod
+    def build(cls, base: pd.DataFrame) -> 'TimeframePyramid':
+        """Constrói todos os níveis a partir dos dados de 1 minuto (ver supports())"""
+        columns = aggregation_map(base.columns)
+        base_values = {col: base[col].to_numpy() for col in columns}
+        volume = base_values['volume']
+        # Somas parciais de volumes inteiros são exatas; volumes fracionários são somados
+        # direto dos dados base pelo groupby (mesma soma compensada do resample)
+        exact_volume = volume.dtype.kind in 'biu' or bool(np.all(np.floor(volume) == volume)
+                                                          and np.abs(volume).sum() < 2 ** 53)
+        stamps = base.index.asi8
+        unit = pd.Timedelta(1, unit=base.index.unit)
+
+        levels = {}
+        # Por nível: rótulos (em unidades do índice) e colunas agregadas
+        built = {1: (stamps, base_values)}
+        for minutes in PYRAMID_MINUTES:
+            parent_stamps, parent_values = built[PYRAMID_PARENTS[minutes]]
+            step = pd.Timedelta(minutes=minutes) // unit
+            bins = parent_stamps // step
+            starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]]) if len(bins) else np.array([], dtype=np.int64)
+            ends = np.r_[starts[1:], len(bins)]
+
+            values = {}
+            for col, how in columns.items():
+                source = parent_values[col]
+                if len(starts) == 0:
+                    values[col] = source[:0]
+                elif how == 'first':
+                    values[col] = source[starts]
+                elif how == 'last':
+                    values[col] = source[ends - 1]
+                elif how == 'max':
+                    values[col] = np.maximum.reduceat(source, starts)
+                elif how == 'min':
+                    values[col] = np.minimum.reduceat(source, starts)
+                elif exact_volume:
+                    values[col] = np.add.reduceat(source, starts)
+                else:
+                    values[col] = pd.Series(volume).groupby(stamps // step).sum().to_numpy()
+
+            labels = bins[starts] * step
+            built[minutes] = (labels, values)
+            frame = pd.DataFrame(values)
+            frame.index = pd.DatetimeIndex(labels.astype(f"datetime64[{base.index.unit}]"), name=base.index.name)
+            levels[minutes] = frame
+        return cls(levels)
+
+    def get(self, minutes: int, base_index: pd.DatetimeIndex, start: Optional[pd.Timestamp] = None,
+            end: Optional[pd.Timestamp] = None) -> Optional[pd.DataFrame]:
+        """
+        Barras de um tempo gráfico, iguais às de data[start:end].resample(...).agg(...).dropna().
+
+        Args:
+            minutes: Tempo gráfico (um de PYRAMID_MINUTES)
+            base_index: Índice dos dados de 1 minuto usados na construção
+            start, end: Filtro de período aplicado aos dados de 1 minuto (inclusivo)
+
+        Returns:
+            DataFrame reamostrado, ou None se o filtro corta uma barra no meio
+            (nesse caso o chamador deve reamostrar normalmente)
+        """
+        bars = self.levels.get(minutes)
+        if bars is None:
+            return None
+
+        if start is not None or end is not None:
+            # Posições do filtro nos dados base precisam coincidir com inícios de barra
+            bar_starts = base_index.searchsorted(bars.index, side='left')
+            left = base_index.searchsorted(start, side='left') if start is not None else 0
+            right = base_index.searchsorted(end, side='right') if end is not None else len(base_index)
+            boundaries = np.r_[bar_starts, len(base_index)]
+            first = int(np.searchsorted(boundaries, left))
+            last = int(np.searchsorted(boundaries, right))
+            if left >= right:
+                bars = bars.iloc[:0]
+            elif boundaries[first] != left or boundaries[last] != right:
+                return None
+            else:
+                bars = bars.iloc[first:last]
+
+        return _as_resampled(bars, minutes)
+
+
+def _as_resampled(bars: pd.DataFrame, minutes: int) -> pd.DataFrame:
+    """Aplica às barras não vazias os tipos e a freq que o resample + dropna produziria"""
+    freq = pd.Timedelta(minutes=minutes)
+    if len(bars) == 0:
+        return bars.copy()
+    grid = pd.date_range(bars.index[0], bars.index[-1], freq=freq, name=bars.index.name, unit=bars.index.unit)
+    has_gaps = len(grid) != len(bars)
+
+    result = bars.copy()
+    if has_gaps:
+        # Barras vazias no intervalo viram NaN no resample: as colunas não somadas passam a float
+        for col in result.columns:
+            if col != 'volume' and result[col].dtype.kind in 'biu':
+                result[col] = result[col].astype(np.float64)
+    # Máscara booleana sobre a grade completa, como o dropna (define a freq do índice)
+    positions = (bars.index.asi8 - bars.index.asi8[0]) // (freq // pd.Timedelta(1, unit=bars.index.unit))
+    present = np.zeros(len(grid), dtype=bool)
+    present[positions] = True
+    result.index = grid[present]
+    return result
@@ -0,0 +1,272 @@
+"""
+Registro colunar dos trades fechados.
+
+Em vez de uma lista de objetos Trade, cada campo fica em uma coluna NumPy
+pré-alocada que dobra de tamanho quando enche (struct-of-arrays). Com centenas
+de milhares de trades numa varredura isso evita um objeto Python por trade e a
+conversão linha a linha para DataFrame.
+
+- horários em int64 (nanossegundos, UTC quando o índice tem fuso);
+- preços, resultado e stops em float64 (NaN para ausente);
+- direção, status e motivo de saída como códigos int8 de categorias.
+
+to_frame() e to_arrow() montam a tabela sobre as próprias colunas, sem copiar
+os dados. Indexar ou iterar o registro devolve objetos Trade (cópias das
+linhas), compatíveis com o código que usava a lista.
+"""
+
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:  # import só para anotação: evita ciclo com backtest_engine
+    from .backtest_engine import Trade
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow é opcional (to_arrow)
+    pa = None
+
+
+DIRECTIONS = ('LONG', 'SHORT')
+STATUSES = ('OPEN', 'CLOSED', 'STOPPED')
+
+# Colunas na ordem dos campos de Trade: (nome, dtype das colunas numéricas)
+_NUMERIC_COLUMNS = (
+    ('entry_time', np.int64),
+    ('exit_time', np.int64),
+    ('entry_price', np.float64),
+    ('exit_price', np.float64),
+    ('quantity', np.int64),
+    ('result', np.float64),
+    ('stop_loss', np.float64),
+    ('take_profit', np.float64),
+)
+_CODE_COLUMNS = ('direction', 'status', 'exit_reason')
+COLUMNS = ('entry_time', 'exit_time', 'direction', 'entry_price', 'exit_price', 'quantity',
+           'result', 'status', 'stop_loss', 'take_profit', 'exit_reason')
+
+_NAT = np.iinfo(np.int64).min  # Mesmo valor que o NumPy usa para NaT
+
+
+def _to_ns(stamp) -> int:
+    return _NAT if stamp is None else pd.Timestamp(stamp).value
+
+
+def _to_float(value: Optional[float]) -> float:
+    return np.nan if value is None else float(value)
+
+
+class TradeLog:
+    """Trades fechados em colunas NumPy que crescem por duplicação"""
+
+    def __init__(self, capacity: int = 64):
+        """
+        Args:
+            capacity: Número de linhas pré-alocadas (dobra quando enche)
+        """
+        capacity = max(int(capacity), 1)
+        self._size = 0
+        self._columns: Dict[str, np.ndarray] = {name: np.empty(capacity, dtype=dtype)
+                                                for name, dtype in _NUMERIC_COLUMNS}
+        for name in _CODE_COLUMNS:
+            self._columns[name] = np.empty(capacity, dtype=np.int8)
+        # Categorias de cada coluna de códigos; motivos de saída são registrados conforme aparecem
+        self._categories: Dict[str, List[str]] = {
+            'direction': list(DIRECTIONS), 'status': list(STATUSES), 'exit_reason': []}
+        self._codes: Dict[str, Dict[str, int]] = {
+            name: {value: code for code, value in enumerate(values)} for name, values in self._categories.items()}
+        self.tz = None  # Fuso dos horários (do primeiro trade registrado)
+
+    @classmethod
+    def from_trades(cls, trades: Iterable['Trade']) -> 'TradeLog':
+        """Cria o registro a partir de objetos Trade"""
+        trades = list(trades)
+        log = cls(len(trades))
+        log.extend(trades)
+        return log
+
+    # --- escrita ---
+
+    def _code(self, name: str, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        codes = self._codes[name]
+        code = codes.get(value)
+        if code is None:
+            code = len(codes)
+            if code > np.iinfo(np.int8).max:
+                raise ValueError(f"Categorias demais na coluna {name}")
+            codes[value] = code
+            self._categories[name].append(value)
+        return code
+
+    def _grow(self):
+        # Colunas recortadas (ex.: select com máscara vazia) podem ter capacidade 0
+        capacity = max(1, 2 * len(self._columns['result']))
+        for name, column in self._columns.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    def append(self, trade: 'Trade'):
+        """Registra um trade (normalmente já fechado)"""
+        i = self._size
+        if i == len(self._columns['result']):
+            self._grow()
+        if self.tz is None and i == 0:
+            self.tz = getattr(trade.entry_time, 'tzinfo', None)
+        c = self._columns
+        c['entry_time'][i] = _to_ns(trade.entry_time)
+        c['exit_time'][i] = _to_ns(trade.exit_time)
+        c['entry_price'][i] = trade.entry_price
+        c['exit_price'][i] = _to_float(trade.exit_price)
+        c['quantity'][i] = trade.quantity
+        c['result'][i] = _to_float(trade.result)
+        c['stop_loss'][i] = _to_float(trade.stop_loss)
+        c['take_profit'][i] = _to_float(trade.take_profit)
+        c['direction'][i] = self._code('direction', trade.direction)
+        c['status'][i] = self._code('status', trade.status)
+        c['exit_reason'][i] = self._code('exit_reason', trade.exit_reason)
+        self._size = i + 1
+
+    def extend(self, trades: Union['TradeLog', Iterable['Trade']]):
+        """Registra vários trades; outro TradeLog é copiado coluna a coluna"""
+        if not isinstance(trades, TradeLog):
+            for trade in trades:
+                self.append(trade)
+            return
+
+        other = trades
+        start, end = self._size, self._size + len(other)
+        while end > len(self._columns['result']):
+            self._grow()
+        if self.tz is None and start == 0:
+            self.tz = other.tz
+        for name, column in self._columns.items():
+            values = other.column(name)
+            if name in _CODE_COLUMNS:
+                # Os códigos do outro registro apontam para as categorias dele
+                remap = np.array([self._code(name, value) for value in other._categories[name]] + [-1], dtype=np.int8)
+                values = remap[values]
+            column[start:end] = values
+        self._size = end
+
+    # --- leitura ---
+
+    def __len__(self) -> int:
+        return self._size
+
+    def column(self, name: str) -> np.ndarray:
+        """Visão (sem cópia) das linhas preenchidas de uma coluna; colunas categóricas devolvem os códigos"""
+        return self._columns[name][:self._size]
+
+    @property
+    def results(self) -> np.ndarray:
+        """Resultado líquido dos trades fechados, na ordem de fechamento"""
+        result = self.column('result')
+        return result[~np.isnan(result)]
+
+    def _timestamp(self, value: int) -> Optional[pd.Timestamp]:
+        if value == _NAT:
+            return None
+        stamp = pd.Timestamp(value)
+        return stamp.tz_localize('UTC').tz_convert(self.tz) if self.tz is not None else stamp
+
+    def _category(self, name: str, code: int) -> Optional[str]:
+        return self._categories[name][code] if code >= 0 else None
+
+    def _row(self, i: int) -> 'Trade':
+        from .backtest_engine import Trade  # Import tardio para evitar ciclo
+
+        c = self._columns
+
+        def optional(name):
+            value = c[name][i]
+            return None if np.isnan(value) else float(value)
+
+        return Trade(
+            entry_time=self._timestamp(int(c['entry_time'][i])),
+            exit_time=self._timestamp(int(c['exit_time'][i])),
+            direction=self._category('direction', int(c['direction'][i])),
+            entry_price=float(c['entry_price'][i]),
+            exit_price=optional('exit_price'),
+            quantity=int(c['quantity'][i]),
+            result=optional('result'),
+            status=self._category('status', int(c['status'][i])),
+            stop_loss=optional('stop_loss'),
+            take_profit=optional('take_profit'),
+            exit_reason=self._category('exit_reason', int(c['exit_reason'][i])),
+        )
+
+    def __getitem__(self, key: Union[int, slice]) -> Union['Trade', List['Trade']]:
+        """Trade (cópia da linha) ou lista de Trade para um fatiamento"""
+        if isinstance(key, slice):
+            return [self._row(i) for i in range(*key.indices(self._size))]
+        i = int(key)
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("Índice de trade fora do intervalo")
+        return self._row(i)
+
+    def __iter__(self) -> Iterator['Trade']:
+        for i in range(self._size):
+            yield self._row(i)
+
+    def copy(self) -> 'TradeLog':
+        """Cópia com capacidade igual ao número de trades"""
+        return self.select(np.ones(self._size, dtype=bool))
+
+    def select(self, mask: np.ndarray) -> 'TradeLog':
+        """Novo registro só com as linhas em que mask é True"""
+        mask = np.asarray(mask, dtype=bool)
+        log = TradeLog(int(mask.sum()))
+        for name, column in self._columns.items():
+            log._columns[name] = column[:self._size][mask]
+        log._size = len(log._columns['result'])
+        log._categories = {name: list(values) for name, values in self._categories.items()}
+        log._codes = {name: dict(codes) for name, codes in self._codes.items()}
+        log.tz = self.tz
+        return log
+
+    # --- conversão ---
+
+    def times(self, name: str) -> pd.DatetimeIndex:
+        """Coluna de horários ('entry_time' ou 'exit_time') como DatetimeIndex (NaT para ausente)"""
+        times = pd.DatetimeIndex(self.column(name).view('M8[ns]'), copy=False)
+        return times.tz_localize('UTC').tz_convert(self.tz) if self.tz is not None else times
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame sobre as colunas do registro (sem cópia; categorias como Categorical)"""
+        data = {}
+        for name in COLUMNS:
+            if name in ('entry_time', 'exit_time'):
+                data[name] = self.times(name)
+            elif name in _CODE_COLUMNS:
+                dtype = pd.CategoricalDtype(self._categories[name])
+                data[name] = pd.Categorical.from_codes(self.column(name), dtype=dtype, validate=False)
+            else:
+                data[name] = self.column(name)
+        return pd.DataFrame(data, copy=False)
+
+    def to_arrow(self) -> 'pa.Table':
+        """Tabela Arrow sobre as colunas do registro (sem cópia; categorias como dictionary)"""
+        if pa is None:
+            raise ValueError("TradeLog.to_arrow requer o pyarrow, que não está instalado")
+        tz = str(self.tz) if self.tz is not None else None
+        arrays = []
+        for name in COLUMNS:
+            values = self.column(name)
+            if name in ('entry_time', 'exit_time'):
+                arrays.append(pa.array(values.view('M8[ns]'), type=pa.timestamp('ns', tz=tz)))
+            elif name in _CODE_COLUMNS:
+                indices = pa.array(values, mask=values < 0)
+                arrays.append(pa.DictionaryArray.from_arrays(indices, pa.array(self._categories[name], pa.string())))
+            else:
+                arrays.append(pa.array(values))
+        return pa.Table.from_arrays(arrays, names=list(COLUMNS))
+
+    def __repr__(self) -> str:
+        return f"TradeLog({self._size} trades)"
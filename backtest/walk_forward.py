@@ -0,0 +1,362 @@
+"""
+Otimização walk-forward para estratégias NTSL.
+
+Divide o histórico em janelas dentro da amostra (IS) seguidas de janelas fora
+da amostra (OOS), contadas em dias de pregão. Em cada janela a grade de
+parâmetros é otimizada no trecho IS e a melhor combinação é executada no trecho
+OOS seguinte. As janelas são avaliadas em paralelo sobre os mesmos dados em
+memória compartilhada, e os indicadores são calculados uma única vez sobre o
+histórico completo (WindowedIndicators) e apenas recortados para cada janela.
+
+Uso:
+    python -m backtest.walk_forward --strategy estrategias/automations/x.txt \\
+        --data backtest/dados/WINFUT_1min.csv --timeframe 5 \\
+        --is-days 20 --oos-days 5 --param fatorAtrStop=1.0:3.0:0.5
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .ntsl_parser import NTSLParser, NTSLStrategy
+from .backtest_engine import ENGINE_MODES, BacktestEngine
+from .trade_log import TradeLog
+from .metrics import trade_summary
+from .indicator_cache import IndicatorCache, WindowedIndicators
+from .spread_model import SWEEP_SEED, UniformSpreadModel
+from .data_provider import DataProvider
+from .optimizer import build_grid, parse_param_range, rank_results
+from .shared_data import SharedDataFrame, SharedFrameDescriptor, attach_shared_frame
+
+
+@dataclass
+class WalkForwardWindow:
+    """Janela IS/OOS, em posições de barra do histórico (fim exclusivo)"""
+    number: int
+    is_start: int
+    is_end: int
+    oos_start: int
+    oos_end: int
+
+
+@dataclass
+class WalkForwardResult:
+    """Resultado consolidado do walk-forward"""
+    windows: pd.DataFrame          # Uma linha por janela: parâmetros escolhidos e métricas IS/OOS
+    equity_curve: pd.Series        # Curva OOS encadeada (cada janela parte do saldo da anterior)
+    trades: TradeLog               # Trades de todas as janelas OOS, em ordem
+    metrics: Dict[str, float]      # Métricas agregadas dos trechos OOS
+
+
+def build_windows(index: pd.DatetimeIndex, is_days: int, oos_days: int,
+                  step_days: Optional[int] = None, anchored: bool = False) -> List[WalkForwardWindow]:
+    """
+    Monta as janelas IS/OOS a partir dos dias de pregão presentes no índice.
+
+    Args:
+        is_days: Dias de pregão de cada trecho IS
+        oos_days: Dias de pregão de cada trecho OOS
+        step_days: Avanço entre janelas (padrão: oos_days, trechos OOS contíguos)
+        anchored: Se True, todos os trechos IS começam no primeiro dia (janela ancorada)
+    """
+    step_days = step_days or oos_days
+    if is_days <= 0 or oos_days <= 0:
+        raise ValueError("is_days e oos_days devem ser positivos")
+    if step_days < oos_days:
+        raise ValueError("step_days menor que oos_days geraria trechos OOS sobrepostos")
+
+    # Primeira barra de cada dia de pregão (+ fim do histórico)
+    days = index.normalize()
+    day_starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+    day_bounds = np.r_[day_starts, len(index)]
+    n_days = len(day_starts)
+
+    windows = []
+    k = 0
+    while k * step_days + is_days < n_days:
+        is_first = 0 if anchored else k * step_days
+        is_last = k * step_days + is_days
+        oos_last = min(is_last + oos_days, n_days)
+        windows.append(WalkForwardWindow(
+            number=k + 1,
+            is_start=int(day_bounds[is_first]),
+            is_end=int(day_bounds[is_last]),
+            oos_start=int(day_bounds[is_last]),
+            oos_end=int(day_bounds[oos_last])
+        ))
+        k += 1
+    return windows
+
+
+# --- Estado do processo de trabalho (inicializado uma vez por processo) ---
+_worker_context: Dict[str, Any] = {}
+
+
+def _set_context(data: pd.DataFrame, strategy: NTSLStrategy, asset: str, timeframe: str,
+                 mode: str, seed: Optional[int], param_ranges: Dict[str, Sequence[Any]],
+                 rank_by: str, ascending: bool, cache_bytes: int):
+    """Define os dados, a estratégia e a grade usados pelas janelas deste processo"""
+    _worker_context.update(
+        data=data,
+        indicators=WindowedIndicators(IndicatorCache(cache_bytes), data),
+        strategy=strategy,
+        asset=asset,
+        timeframe=timeframe,
+        mode=mode,
+        seed=seed,
+        grid=build_grid(param_ranges),
+        rank_by=rank_by,
+        ascending=ascending,
+        parser=NTSLParser()
+    )
+
+
+def _init_worker(descriptor: SharedFrameDescriptor, *args):
+    """Conecta o worker aos dados compartilhados"""
+    _set_context(attach_shared_frame(descriptor), *args)
+
+
+def _run_slice(params: Dict[str, Any], start: int, stop: int):
+    """Executa um backtest com os parâmetros dados sobre o trecho [start, stop) do histórico"""
+    ctx = _worker_context
+    strategy = ctx['parser'].apply_inputs(ctx['strategy'], params)
+    engine = BacktestEngine(verbosity=0, indicators=ctx['indicators'],
+                            spread_model=UniformSpreadModel(ctx['seed']))
+    return engine.run_backtest(strategy, ctx['data'].iloc[start:stop], ctx['asset'], ctx['timeframe'],
+                               mode=ctx['mode'], rebuild_equity=True)
+
+
+def _run_window(window: WalkForwardWindow) -> Dict[str, Any]:
+    """Otimiza a grade no trecho IS e executa a melhor combinação no trecho OOS (no worker)"""
+    ctx = _worker_context
+    start = time.perf_counter()
+
+    rows = []
+    for params in ctx['grid']:
+        try:
+            metrics = _run_slice(params, window.is_start, window.is_end).metrics
+            rows.append({**params, **metrics, 'error': None})
+        except Exception as e:
+            rows.append({**params, 'error': str(e)})
+    ranking = rank_results(pd.DataFrame(rows), ctx['rank_by'], ctx['ascending'])
+    valid = ranking[ranking['error'].isna() & ranking[ctx['rank_by']].notna()]
+
+    outcome = {'window': window, 'params': None, 'is_metrics': {}, 'oos': None, 'error': None}
+    if valid.empty:
+        outcome['error'] = 'nenhuma combinação válida no trecho IS'
+    else:
+        best = valid.iloc[0]
+        outcome['params'] = {name: _to_python(best[name]) for name in ctx['grid'][0]}
+        outcome['is_metrics'] = {k: _to_python(v) for k, v in best.items()
+                                 if k not in outcome['params'] and k not in ('rank', 'error')}
+        try:
+            result = _run_slice(outcome['params'], window.oos_start, window.oos_end)
+            outcome['oos'] = (result.metrics, result.trades, result.equity_curve.to_numpy())
+        except Exception as e:
+            outcome['error'] = str(e)
+
+    outcome['elapsed_s'] = time.perf_counter() - start
+    return outcome
+
+
+def _to_python(value):
+    """Converte escalares NumPy para tipos nativos (inputs da estratégia)"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class WalkForwardOptimizer:
+    """
+    Walk-forward com janelas IS/OOS móveis ou ancoradas.
+    """
+
+    def __init__(self, strategy: NTSLStrategy, data: pd.DataFrame, asset: str = 'ATIVO',
+                 timeframe: str = '1min', mode: str = 'fast', workers: Optional[int] = None,
+                 seed: Optional[int] = SWEEP_SEED, cache_bytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            strategy: Estratégia base (inputs não varridos mantêm o valor original)
+            data: Histórico OHLCV completo (indicadores são calculados sobre ele)
+            mode: Modo do engine ('fast' recomendado)
+            workers: Número de processos (padrão: todos os núcleos)
+            seed: Semente do modelo de spread (padrão: SWEEP_SEED, a mesma em todas as execuções;
+                  None sorteia um spread diferente a cada execução)
+            cache_bytes: Orçamento do cache de indicadores por processo
+        """
+        self.strategy = strategy
+        self.data = data
+        self.asset = asset
+        self.timeframe = timeframe
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed
+        self.cache_bytes = cache_bytes
+
+    def run(self, param_ranges: Dict[str, Sequence[Any]], is_days: int, oos_days: int,
+            step_days: Optional[int] = None, anchored: bool = False,
+            rank_by: str = 'net_profit', ascending: bool = False) -> WalkForwardResult:
+        """
+        Executa o walk-forward.
+
+        Args:
+            param_ranges: {nome_do_input: [valores]} otimizados em cada trecho IS
+            is_days / oos_days / step_days / anchored: ver build_windows
+            rank_by: Métrica usada para escolher a combinação no trecho IS
+            ascending: Ordem crescente (ex: para métricas de perda)
+        """
+        unknown = [name for name in param_ranges if name not in self.strategy.inputs]
+        if unknown:
+            raise ValueError(f"Inputs não encontrados na estratégia: {unknown}")
+
+        windows = build_windows(self.data.index, is_days, oos_days, step_days, anchored)
+        if not windows:
+            raise ValueError(f"Histórico insuficiente para uma janela de {is_days} + {oos_days} dias")
+
+        initargs = (self.strategy, self.asset, self.timeframe, self.mode, self.seed,
+                    param_ranges, rank_by, ascending, self.cache_bytes)
+
+        if self.workers <= 1 or len(windows) == 1:
+            _set_context(self.data, *initargs)
+            outcomes = [_run_window(window) for window in windows]
+            _worker_context.clear()
+        else:
+            with SharedDataFrame(self.data) as shared:
+                with ProcessPoolExecutor(max_workers=min(self.workers, len(windows)), initializer=_init_worker,
+                                         initargs=(shared.descriptor, *initargs)) as executor:
+                    outcomes = list(executor.map(_run_window, windows))
+
+        return self._stitch(outcomes, list(param_ranges.keys()))
+
+    def _stitch(self, outcomes: List[Dict[str, Any]], param_names: List[str]) -> WalkForwardResult:
+        """Encadeia os trechos OOS e monta a tabela por janela"""
+        index = self.data.index
+        rows, curves = [], []
+        trades = TradeLog()
+        offset = 0.0
+
+        for outcome in outcomes:
+            window = outcome['window']
+            row = {
+                'window': window.number,
+                'is_start': index[window.is_start],
+                'is_end': index[window.is_end - 1],
+                'oos_start': index[window.oos_start],
+                'oos_end': index[window.oos_end - 1],
+            }
+            for name in param_names:
+                row[name] = (outcome['params'] or {}).get(name)
+            row.update({f"is_{k}": v for k, v in outcome['is_metrics'].items()})
+
+            if outcome['oos'] is not None:
+                metrics, window_trades, equity = outcome['oos']
+                row.update({f"oos_{k}": v for k, v in metrics.items()})
+                trades.extend(window_trades)
+                curves.append(pd.Series(equity + offset, index=index[window.oos_start:window.oos_end]))
+                # O saldo final inclui o fechamento forçado do fim da janela (END_OF_DATA)
+                offset += float(window_trades.results.sum())
+            else:
+                curves.append(pd.Series(offset, index=index[window.oos_start:window.oos_end]))
+
+            row['elapsed_s'] = outcome['elapsed_s']
+            row['error'] = outcome['error']
+            rows.append(row)
+
+        return WalkForwardResult(
+            windows=pd.DataFrame(rows),
+            equity_curve=pd.concat(curves) if curves else pd.Series(dtype=np.float64),
+            trades=trades,
+            metrics=_oos_metrics(trades, pd.DataFrame(rows))
+        )
+
+
+def _oos_metrics(trades: TradeLog, windows: pd.DataFrame) -> Dict[str, float]:
+    """Métricas agregadas dos trechos OOS"""
+    metrics = {
+        'windows': len(windows),
+        'profitable_windows': int((windows.get('oos_net_profit', pd.Series(dtype=float)) > 0).sum()),
+    }
+    metrics.update(trade_summary(trades.results))
+    # Eficiência walk-forward: lucro OOS por dia / lucro IS por dia
+    if 'is_net_profit' in windows and 'oos_net_profit' in windows:
+        is_days = (windows['is_end'] - windows['is_start']).dt.days + 1
+        oos_days = (windows['oos_end'] - windows['oos_start']).dt.days + 1
+        is_rate = (windows['is_net_profit'] / is_days).sum()
+        oos_rate = (windows['oos_net_profit'].fillna(0) / oos_days).sum()
+        metrics['wf_efficiency'] = float(oos_rate / is_rate) if is_rate > 0 else float('nan')
+    return metrics
+
+
+def main():
+    """Função principal (CLI)"""
+    parser = argparse.ArgumentParser(description='Otimização walk-forward de estratégias NTSL')
+    parser.add_argument('--strategy', '-s', required=True, help='Caminho da estratégia NTSL')
+    parser.add_argument('--data', '-d', required=True, help='Caminho do arquivo CSV')
+    parser.add_argument('--start-date', help='Data início (YYYY-MM-DD)')
+    parser.add_argument('--end-date', help='Data fim (YYYY-MM-DD)')
+    parser.add_argument('--timeframe', '-t', help='Tempo gráfico em minutos (ex: 5, 15)')
+    parser.add_argument('--param', '-p', action='append', default=[],
+                        help='Faixa de um input: nome=inicio:fim:passo ou nome=v1,v2,v3 (repetível)')
+    parser.add_argument('--is-days', type=int, required=True, help='Dias de pregão de cada trecho IS')
+    parser.add_argument('--oos-days', type=int, required=True, help='Dias de pregão de cada trecho OOS')
+    parser.add_argument('--step-days', type=int, help='Avanço entre janelas (padrão: --oos-days)')
+    parser.add_argument('--anchored', action='store_true', help='Trechos IS ancorados no início do histórico')
+    parser.add_argument('--workers', '-w', type=int, help='Número de processos (padrão: todos os núcleos)')
+    parser.add_argument('--mode', '-m', choices=ENGINE_MODES, default='fast', help='Modo do engine')
+    parser.add_argument('--rank-by', default='net_profit', help='Métrica para escolha no trecho IS')
+    parser.add_argument('--seed', type=int, default=SWEEP_SEED,
+                        help='Semente do modelo de spread (padrão: %(default)s)')
+    parser.add_argument('--output', '-o', help='Diretório para salvar janelas e curva OOS (CSV)')
+
+    args = parser.parse_args()
+
+    param_ranges = dict(parse_param_range(spec) for spec in args.param)
+    strategy = NTSLParser().parse_file(args.strategy)
+    timeframe_str = f"{args.timeframe}min" if args.timeframe else "1min"
+
+    data = DataProvider(verbose=False).get_data(
+        symbol=args.data,
+        start_date=args.start_date or '',
+        end_date=args.end_date or '',
+        source='local_csv',
+        target_interval=timeframe_str
+    )
+    if args.start_date and args.end_date:
+        data = data[(data.index >= pd.to_datetime(args.start_date)) & (data.index <= pd.to_datetime(args.end_date))]
+
+    asset_name = Path(args.data).stem.split('_')[0]
+    optimizer = WalkForwardOptimizer(strategy, data, asset=asset_name, timeframe=timeframe_str,
+                                     mode=args.mode, workers=args.workers, seed=args.seed)
+
+    print(f"Walk-forward de {strategy.name}: IS {args.is_days}d / OOS {args.oos_days}d"
+          f"{' (ancorado)' if args.anchored else ''}, {len(build_grid(param_ranges))} combinações por janela")
+    start = time.perf_counter()
+    result = optimizer.run(param_ranges, args.is_days, args.oos_days, args.step_days,
+                           args.anchored, rank_by=args.rank_by)
+    print(f"Concluído em {time.perf_counter() - start:.1f}s\n")
+
+    display_cols = ['window', 'oos_start', 'oos_end'] + list(param_ranges.keys()) + [
+        c for c in [f'is_{args.rank_by}', 'oos_net_profit', 'oos_total_trades', 'error'] if c in result.windows.columns]
+    with pd.option_context('display.width', 200, 'display.max_columns', 50):
+        print(result.windows[display_cols].to_string(index=False))
+
+    print("\nResumo OOS:")
+    for key, value in result.metrics.items():
+        print(f"  {key}: {value:.2f}" if isinstance(value, float) else f"  {key}: {value}")
+
+    if args.output:
+        output_dir = Path(args.output)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        result.windows.to_csv(output_dir / 'janelas.csv', index=False)
+        result.equity_curve.rename('equity').to_csv(output_dir / 'equity_oos.csv', index_label='datetime')
+        result.trades.to_frame().to_csv(output_dir / 'trades_oos.csv', index=False)
+        print(f"\nResultados salvos em: {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
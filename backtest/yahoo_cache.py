@@ -0,0 +1,204 @@
+"""
+Cache local dos downloads do Yahoo Finance.
+
+As barras baixadas ficam em disco por símbolo e intervalo, junto com a lista de
+períodos já cobertos. Um novo pedido busca na rede apenas os trechos que ainda
+faltam e monta o resultado a partir do cache; no modo offline nada é buscado e
+um trecho ausente gera erro.
+
+A busca é injetável (fetch_history / fetch_info), o que permite usar o cache com
+uma fonte local no lugar do yfinance.
+"""
+
+import json
+import os
+import pickle
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / ".cache" / "yahoo"
+
+# Validade das informações do símbolo (nome, moeda, preço...) no modo online
+INFO_MAX_AGE = 24 * 3600
+
+Range = Tuple[pd.Timestamp, pd.Timestamp]
+
+
+def yfinance_history(symbol: str, start: str, end: str, interval: str) -> pd.DataFrame:
+    """Busca padrão: barras do yfinance, com os mesmos parâmetros do DataProvider"""
+    import yfinance as yf
+    return yf.Ticker(symbol).history(
+        start=start,
+        end=end,
+        interval=interval,
+        auto_adjust=True,
+        prepost=False,
+        actions=False  # Não incluir dividendos/splits para simplificar
+    )
+
+
+def yfinance_info(symbol: str) -> dict:
+    """Busca padrão: dicionário info do yfinance"""
+    import yfinance as yf
+    return yf.Ticker(symbol).info
+
+
+class YahooCache:
+    """Cache incremental de barras e informações de símbolos do Yahoo Finance"""
+
+    def __init__(self, cache_dir: Optional[str] = None, offline: bool = False,
+                 fetch_history: Optional[Callable[[str, str, str, str], pd.DataFrame]] = None,
+                 fetch_info: Optional[Callable[[str], dict]] = None):
+        """
+        Args:
+            cache_dir: Diretório do cache (padrão: backtest/.cache/yahoo)
+            offline: Se True, serve apenas do cache e nunca acessa a rede
+            fetch_history: Busca de barras (symbol, start, end, interval) -> DataFrame;
+                           padrão: yfinance_history
+            fetch_info: Busca de informações (symbol) -> dict; padrão: yfinance_info
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.offline = offline
+        self.fetch_history = fetch_history or yfinance_history
+        self.fetch_info = fetch_info or yfinance_info
+        self.fetch_count = 0
+
+    def history(self, symbol: str, start_date: str, end_date: str, interval: str) -> pd.DataFrame:
+        """
+        Barras de [start_date, end_date) (fim exclusivo, como no yfinance).
+
+        Busca apenas os trechos ainda não cobertos pelo cache. Trechos a partir de
+        hoje nunca são marcados como cobertos: a barra do dia ainda está em formação.
+        """
+        start, end = _day(start_date), _day(end_date)
+        if end <= start:
+            raise ValueError(f"Período inválido: {start_date} a {end_date}")
+
+        path = self._history_path(symbol, interval)
+        entry = self._load_history(path)
+        missing = _subtract(start, end, entry['ranges'])
+
+        if missing:
+            if self.offline:
+                gaps = ', '.join(f"{a.date()} a {b.date()}" for a, b in missing)
+                raise ValueError(f"Modo offline: {symbol} ({interval}) sem cache para {gaps}")
+            today = pd.Timestamp.now().normalize()
+            for gap_start, gap_end in missing:
+                bars = self.fetch_history(symbol, gap_start.strftime('%Y-%m-%d'),
+                                          gap_end.strftime('%Y-%m-%d'), interval)
+                self.fetch_count += 1
+                entry['bars'] = _merge_bars(entry['bars'], bars)
+                if gap_start < today:
+                    entry['ranges'] = _union(entry['ranges'] + [(gap_start, min(gap_end, today))])
+            self._store(path, entry)
+
+        return _slice_bars(entry['bars'], start, end)
+
+    def info(self, symbol: str) -> dict:
+        """Informações do símbolo; no modo online, renovadas após INFO_MAX_AGE segundos"""
+        path = self.cache_dir / "info" / f"{_safe_name(symbol)}.json"
+        cached = None
+        if path.exists():
+            with open(path, encoding='utf-8') as f:
+                cached = json.load(f)
+
+        if self.offline or (cached is not None and time.time() - cached['fetched_at'] < INFO_MAX_AGE):
+            if cached is None:
+                raise ValueError(f"Modo offline: informações de {symbol} não estão no cache")
+            return cached['info']
+
+        info = dict(self.fetch_info(symbol) or {})
+        self.fetch_count += 1
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'fetched_at': time.time(), 'info': info}, f, ensure_ascii=False, default=str)
+        os.replace(tmp, path)
+        return info
+
+    def covered_ranges(self, symbol: str, interval: str) -> List[Range]:
+        """Períodos [início, fim) já cobertos pelo cache para o símbolo e intervalo"""
+        return list(self._load_history(self._history_path(symbol, interval))['ranges'])
+
+    def _history_path(self, symbol: str, interval: str) -> Path:
+        return self.cache_dir / "history" / f"{_safe_name(symbol)}_{interval}.pkl"
+
+    @staticmethod
+    def _load_history(path: Path) -> Dict:
+        if path.exists():
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        return {'bars': None, 'ranges': []}
+
+    @staticmethod
+    def _store(path: Path, entry: Dict):
+        """Gravação atômica (arquivo temporário + os.replace)"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+
+def _day(date: str) -> pd.Timestamp:
+    """Data (meia-noite, sem fuso) de uma string 'YYYY-MM-DD'"""
+    stamp = pd.Timestamp(date)
+    if stamp.tzinfo is not None:
+        stamp = stamp.tz_localize(None)
+    return stamp.normalize()
+
+
+def _safe_name(symbol: str) -> str:
+    return ''.join(c if c.isalnum() or c in '.-_' else '_' for c in symbol)
+
+
+def _union(ranges: List[Range]) -> List[Range]:
+    """Une períodos sobrepostos ou adjacentes"""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _subtract(start: pd.Timestamp, end: pd.Timestamp, covered: List[Range]) -> List[Range]:
+    """Trechos de [start, end) fora dos períodos cobertos"""
+    missing = []
+    cursor = start
+    for range_start, range_end in covered:
+        if range_end <= cursor or range_start >= end:
+            continue
+        if range_start > cursor:
+            missing.append((cursor, range_start))
+        cursor = max(cursor, range_end)
+        if cursor >= end:
+            break
+    if cursor < end:
+        missing.append((cursor, end))
+    return missing
+
+
+def _merge_bars(cached: Optional[pd.DataFrame], fetched: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """Junta as barras novas às do cache; em sobreposição vale a versão mais recente"""
+    if fetched is None or fetched.empty:
+        return cached
+    if cached is None or cached.empty:
+        return fetched.sort_index()
+    merged = pd.concat([cached, fetched])
+    return merged[~merged.index.duplicated(keep='last')].sort_index()
+
+
+def _slice_bars(bars: Optional[pd.DataFrame], start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+    """Barras com data (no fuso do índice) em [start, end)"""
+    if bars is None:
+        return pd.DataFrame()
+    index = bars.index
+    if getattr(index, 'tz', None) is not None:
+        start, end = start.tz_localize(index.tz), end.tz_localize(index.tz)
+    return bars[(index >= start) & (index < end)]
@@ -0,0 +1,79 @@
+"""
+Fixtures compartilhadas dos testes.
+
+Os dados são sintéticos (passeio aleatório com semente fixa, pregões de
+09:00 a 17:59 em dias úteis), no mesmo formato do DataFrame que o
+DataProvider devolve: índice 'datetime' e colunas open/high/low/close/volume.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+ROOT = Path(__file__).resolve().parent.parent
+AUTOMATIONS_DIR = ROOT / 'estrategias' / 'automations'
+
+
+def make_minute_bars(days: int = 12, seed: int = 7, start: str = '2024-03-01', tick: float = 5.0) -> pd.DataFrame:
+    """Barras de 1 minuto de um ativo com tick de 5 pontos (tipo WIN)"""
+    rng = np.random.default_rng(seed)
+    sessions = pd.bdate_range(start, periods=days)
+    index = pd.DatetimeIndex(np.concatenate([
+        pd.date_range(day + pd.Timedelta(hours=9), periods=540, freq='min').to_numpy() for day in sessions
+    ]), name='datetime')
+
+    n = len(index)
+    steps = rng.choice([-2, -1, 0, 1, 2], size=n, p=[0.1, 0.25, 0.3, 0.25, 0.1]) * tick
+    close = 128000.0 + np.cumsum(steps)
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) + rng.integers(0, 3, size=n) * tick
+    low = np.minimum(open_, close) - rng.integers(0, 3, size=n) * tick
+    volume = rng.integers(100, 2000, size=n).astype(np.float64)
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume}, index=index)
+
+
+def resample_bars(bars: pd.DataFrame, minutes: int) -> pd.DataFrame:
+    """Reamostra barras de 1 minuto para o tempo gráfico informado"""
+    return bars.resample(f'{minutes}min').agg(
+        {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}).dropna()
+
+
+def _br_number(values: np.ndarray) -> list:
+    """Formata no padrão do Profit: milhar com ponto e decimal com vírgula"""
+    return [f"{v:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.') for v in values]
+
+
+def write_profit_csv(bars: pd.DataFrame, path: Path, asset: str = 'WINFUT') -> Path:
+    """Grava as barras no formato do CSV exportado pelo Profit (';' e cp1252)"""
+    frame = pd.DataFrame({
+        'Ativo': asset,
+        'Data': bars.index.strftime('%d/%m/%Y'),
+        'Hora': bars.index.strftime('%H:%M:%S'),
+        'Abertura': _br_number(bars['open'].to_numpy()),
+        'Máxima': _br_number(bars['high'].to_numpy()),
+        'Mínima': _br_number(bars['low'].to_numpy()),
+        'Fechamento': _br_number(bars['close'].to_numpy()),
+        'Volume': _br_number(bars['volume'].to_numpy()),
+        'Quantidade': (bars['volume'] // 10).astype(int).to_numpy(),
+    })
+    frame.to_csv(path, sep=';', index=False, encoding='cp1252')
+    return path
+
+
+@pytest.fixture(scope='session')
+def minute_bars() -> pd.DataFrame:
+    return make_minute_bars()
+
+
+@pytest.fixture(scope='session')
+def bars_5min(minute_bars) -> pd.DataFrame:
+    return resample_bars(minute_bars, 5)
+
+
+@pytest.fixture(scope='session')
+def profit_csv(minute_bars, tmp_path_factory) -> Path:
+    """CSV de 1 minuto no formato do Profit com as barras de minute_bars"""
+    return write_profit_csv(minute_bars, tmp_path_factory.mktemp('dados') / 'WIN_1min.csv')
@@ -0,0 +1,22 @@
+"""Backtest em lote do catálogo"""
+
+import pytest
+
+pytest.importorskip('talib')
+
+from backtest.catalog_batch import CatalogBatchRunner
+
+from conftest import AUTOMATIONS_DIR
+
+
+STRATEGIES = sorted(AUTOMATIONS_DIR.glob('*.txt'))
+
+
+def test_default_mode_runs_each_strategy_code(profit_csv):
+    runner = CatalogBatchRunner([(str(profit_csv), '5min')], workers=1, seed=3)
+    leaderboard = runner.run(STRATEGIES)
+
+    assert runner.mode == 'compiled'
+    assert (leaderboard['mode'] == 'compiled').all()
+    assert (leaderboard['status'] == 'ok').all()
+    assert len(leaderboard) == len(STRATEGIES)
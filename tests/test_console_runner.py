@@ -0,0 +1,38 @@
+"""ConsoleRunner em modo batch"""
+
+import json
+
+import pytest
+
+pytest.importorskip('talib')
+
+from backtest.console_runner import ConsoleRunner
+from backtest.events import JsonlEventSink, NullEventSink
+from backtest.spread_model import UniformSpreadModel
+
+from conftest import AUTOMATIONS_DIR
+
+
+STRATEGY = str(sorted(AUTOMATIONS_DIR.glob('*.txt'))[0])
+
+
+def _run(runner, profit_csv, **kwargs):
+    return runner.run_batch(STRATEGY, str(profit_csv), timeframe='5', verbosity=0,
+                            spread_model=UniformSpreadModel(seed=3), **kwargs)
+
+
+def test_event_sink_is_detached_after_batch(profit_csv, tmp_path):
+    runner = ConsoleRunner(use_cache=False)
+    events_path = tmp_path / 'eventos.jsonl'
+    first = _run(runner, profit_csv, event_sink=JsonlEventSink(events_path))
+
+    assert isinstance(runner.engine.events, NullEventSink)
+    lines = events_path.read_text(encoding='utf-8').splitlines()
+    assert lines and all(json.loads(line) for line in lines)
+
+    # A segunda execução no mesmo runner não escreve no destino fechado e repete o resultado
+    second = _run(runner, profit_csv)
+    assert second is not None
+    assert len(events_path.read_text(encoding='utf-8').splitlines()) == len(lines)
+    assert len(second.trades) == len(first.trades)
+    assert second.metrics == first.metrics
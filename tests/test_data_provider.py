@@ -0,0 +1,53 @@
+"""Leitura dos CSVs do Profit pelos motores do DataProvider"""
+
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('talib')
+
+from backtest.csv_index import CsvDayIndex
+from backtest.data_provider import DataProvider, pa
+from backtest.dataset_cache import DatasetCache, source_signature
+
+from conftest import write_profit_csv
+
+
+ENGINES = ['c', 'legacy'] + (['pyarrow'] if pa is not None else [])
+
+
+@pytest.fixture(scope='module')
+def reference(profit_csv) -> pd.DataFrame:
+    return DataProvider(verbose=False, csv_engine='legacy')._parse_local_csv(str(profit_csv))
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_engines_agree(engine, profit_csv, reference, minute_bars):
+    data = DataProvider(verbose=False, csv_engine=engine)._parse_local_csv(str(profit_csv))
+
+    assert data.index.dtype == 'datetime64[ns]'
+    pd.testing.assert_frame_equal(data, reference)
+    assert (data.index == minute_bars.index).all()
+    assert (data['close'].to_numpy() == minute_bars['close'].to_numpy()).all()
+
+
+def test_day_index_is_persisted(profit_csv, tmp_path, minute_bars):
+    cache = DatasetCache(str(tmp_path / 'cache'))
+    start, end = '2024-03-05', '2024-03-07'
+    first = DataProvider(verbose=False, index_cache=cache)
+    expected = first.get_data(str(profit_csv), start, end, source='local_csv', target_interval='5min')
+    assert cache.day_index_path(str(profit_csv)).exists()
+
+    # Outro processo (provider novo) lê o índice do disco em vez de varrer o CSV
+    second = DataProvider(verbose=False, index_cache=cache)
+    with patch.object(CsvDayIndex, 'build', side_effect=AssertionError('índice refeito')):
+        data = second.get_data(str(profit_csv), start, end, source='local_csv', target_interval='5min')
+    pd.testing.assert_frame_equal(data, expected)
+    assert data.index[0].date() == pd.Timestamp(start).date()
+
+    # CSV alterado: a assinatura muda e o índice gravado é descartado
+    changed = write_profit_csv(minute_bars.iloc[:2000], tmp_path / 'WIN_1min.csv')
+    CsvDayIndex.load(cache.day_index_path(str(profit_csv)), source_signature(str(profit_csv))).save(
+        cache.day_index_path(str(changed)), source_signature(str(profit_csv)))
+    assert CsvDayIndex.load(cache.day_index_path(str(changed)), source_signature(str(changed))) is None
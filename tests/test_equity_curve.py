@@ -0,0 +1,45 @@
+"""Curva de equity em dinheiro: resultado aberto convertido por pontosPorTick, como o realizado"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip('talib')
+
+from backtest.backtest_engine import BacktestEngine
+from backtest.ntsl_parser import NTSLParser
+from backtest.spread_model import UniformSpreadModel
+
+from conftest import AUTOMATIONS_DIR
+
+
+STRATEGY = str(sorted(AUTOMATIONS_DIR.glob('*.txt'))[0])
+
+
+def _expected_equity(result, close, index, points_per_tick) -> np.ndarray:
+    """Equity barra a barra calculada trade a trade (referência independente do engine)"""
+    equity = np.zeros(len(close))
+    for trade in result.trades:
+        entry = index.get_loc(trade.entry_time)
+        # END_OF_DATA fecha depois do loop: na curva o trade segue aberto até a última barra
+        exit_ = len(close) if trade.exit_reason == 'END_OF_DATA' else index.get_loc(trade.exit_time)
+        sign = 1.0 if trade.direction == 'LONG' else -1.0
+        equity[entry:exit_] += sign * (close[entry:exit_] - trade.entry_price) * trade.quantity * points_per_tick
+        equity[exit_:] += trade.result
+    return equity
+
+
+@pytest.mark.parametrize('rebuild', [False, True], ids=['tracked', 'rebuilt'])
+@pytest.mark.parametrize('mode', ['standard', 'fast', 'compiled'])
+def test_open_result_is_in_currency(mode, rebuild, bars_5min):
+    strategy = NTSLParser().parse_file(STRATEGY)
+    points_per_tick = float(strategy.inputs['pontosPorTick'])
+    assert points_per_tick != 1.0
+
+    engine = BacktestEngine(verbosity=0, spread_model=UniformSpreadModel(seed=3))
+    result = engine.run_backtest(strategy, bars_5min, 'WIN', '5min', mode=mode, rebuild_equity=rebuild)
+    assert len(result.trades) > 0
+
+    expected = _expected_equity(result, bars_5min['close'].to_numpy(), bars_5min.index, points_per_tick)
+    np.testing.assert_allclose(result.equity_curve.to_numpy(), expected, rtol=1e-9, atol=1e-9)
+    assert result.metrics['max_drawdown'] == pytest.approx(
+        (expected - np.maximum.accumulate(expected)).min(), rel=1e-9, abs=1e-9)
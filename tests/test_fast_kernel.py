@@ -0,0 +1,71 @@
+"""Paridade entre o loop padrão (_execute_bar) e o FastBarKernel"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('talib')
+
+from backtest.backtest_engine import BacktestEngine
+from backtest.ntsl_parser import NTSLParser
+from backtest.spread_model import UniformSpreadModel
+
+from conftest import AUTOMATIONS_DIR
+
+
+STRATEGIES = sorted(path.name for path in AUTOMATIONS_DIR.glob('*.txt'))
+
+# Variações de inputs que exercitam ramos diferentes do loop
+OVERRIDES = {
+    'padrao': {},
+    'sem_be_trailing': {'usarBreakEven': False, 'usarTrailingStop': False},
+    'sem_stop_gain': {'usarStopGain': False},
+    'sem_janela': {'usarJanelaHoraria': False, 'maxTradesPorDia': 999},
+}
+
+
+def _strategy(name: str, overrides: dict):
+    strategy = copy.deepcopy(NTSLParser().parse_file(str(AUTOMATIONS_DIR / name)))
+    strategy.inputs.update(overrides)
+    strategy.risk_params.update({k: v for k, v in overrides.items() if k in strategy.risk_params})
+    return strategy
+
+
+def _run(strategy, data, mode, **kwargs):
+    engine = BacktestEngine(verbosity=0, spread_model=UniformSpreadModel(seed=3))
+    return engine.run_backtest(strategy, data, 'WIN', '5min', mode=mode, **kwargs)
+
+
+def _assert_same(expected, actual):
+    pd.testing.assert_frame_equal(expected.trades.to_frame(), actual.trades.to_frame())
+    np.testing.assert_array_equal(expected.equity_curve.to_numpy(), actual.equity_curve.to_numpy())
+    assert expected.metrics.keys() == actual.metrics.keys()
+    for key, value in expected.metrics.items():
+        np.testing.assert_equal(actual.metrics[key], value, err_msg=key)
+
+
+@pytest.mark.parametrize('overrides', OVERRIDES.values(), ids=OVERRIDES.keys())
+@pytest.mark.parametrize('name', STRATEGIES)
+def test_fast_matches_standard(name, overrides, bars_5min):
+    strategy = _strategy(name, overrides)
+    standard = _run(strategy, bars_5min, 'standard')
+    assert len(standard.trades) > 0
+    _assert_same(standard, _run(strategy, bars_5min, 'fast'))
+
+
+@pytest.mark.parametrize('name', STRATEGIES)
+def test_fast_matches_standard_intrabar(name, minute_bars, bars_5min):
+    strategy = _strategy(name, {})
+    standard = _run(strategy, bars_5min, 'standard', intrabar_data=minute_bars)
+    _assert_same(standard, _run(strategy, bars_5min, 'fast', intrabar_data=minute_bars))
+
+
+@pytest.mark.parametrize('mode', ['standard', 'fast'])
+def test_rebuilt_equity_matches_tracked(mode, bars_5min):
+    strategy = _strategy(STRATEGIES[0], {})
+    tracked = _run(strategy, bars_5min, mode)
+    rebuilt = _run(strategy, bars_5min, mode, rebuild_equity=True)
+    pd.testing.assert_frame_equal(tracked.trades.to_frame(), rebuilt.trades.to_frame())
+    np.testing.assert_allclose(rebuilt.equity_curve.to_numpy(), tracked.equity_curve.to_numpy(), atol=1e-9)
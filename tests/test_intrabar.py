@@ -0,0 +1,73 @@
+"""Execução intrabarra de stop e alvo (IntrabarIndex) no loop padrão e no FastBarKernel"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('talib')
+
+from backtest.backtest_engine import BacktestEngine, Trade
+from backtest.fast_kernel import FastBarKernel
+from backtest.intrabar import IntrabarIndex
+from backtest.ntsl_parser import NTSLParser
+
+from conftest import AUTOMATIONS_DIR
+
+
+STRATEGY = str(sorted(AUTOMATIONS_DIR.glob('*.txt'))[0])
+ATR = 10.0
+
+# Compra em 1000 com stop em 980 e alvo em 1030. Na 1ª barra o mínimo (992) vem
+# antes da alta que dispara o trailing (máxima 1015, fechamento 1012 -> stop 1007);
+# na 2ª barra o preço volta e toca o stop ajustado
+MINUTES = pd.DataFrame({
+    'open':  [1000, 995, 1003, 1009, 1013, 1012, 1010, 1008, 1006, 1009],
+    'high':  [1001, 1004, 1010, 1015, 1014, 1013, 1011, 1009, 1010, 1010],
+    'low':   [992, 994, 1002, 1008, 1011, 1009, 1007, 1005, 1005, 1008],
+    'close': [995, 1003, 1009, 1013, 1012, 1010, 1008, 1006, 1009, 1009],
+}, index=pd.date_range('2024-03-04 10:00', periods=10, freq='min'), dtype=np.float64)
+
+
+def _engine() -> BacktestEngine:
+    strategy = NTSLParser().apply_inputs(NTSLParser().parse_file(STRATEGY), {
+        'usarBreakEven': False, 'usarTrailingStop': True,
+        'gatilhoTrailingAtr': 1.0, 'distanciaTrailingAtr': 0.5})
+    bars = MINUTES.resample('5min').agg({'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last'})
+    bars['atr'] = ATR
+
+    engine = BacktestEngine(verbosity=0)
+    engine.strategy = strategy
+    engine.data = bars
+    engine.intrabar = IntrabarIndex(MINUTES, bars.index, pd.Timedelta('5min'))
+    engine._initialize_strategy_variables()
+    engine.signal_lw = engine.signal_bb = np.zeros(len(bars), dtype=np.int8)
+    engine.spread_ok = np.ones(len(bars), dtype=bool)
+    engine.current_trade = Trade(bars.index[0], None, 'LONG', 1000.0, None, 1, None, 'OPEN',
+                                 stop_loss=980.0, take_profit=1030.0)
+    engine.current_position = 1
+    return engine
+
+
+def _check_standard(engine, i):
+    engine._check_exit_conditions(i, engine.data.iloc[i])
+
+
+@pytest.mark.parametrize('mode', ['standard', 'fast'])
+def test_trailing_stop_applies_from_next_bar(mode):
+    engine = _engine()
+    if mode == 'fast':
+        kernel = FastBarKernel(engine)
+        check, trade = kernel._check_exit_conditions, lambda: kernel.state.trade
+    else:
+        check, trade = (lambda i: _check_standard(engine, i)), lambda: engine.current_trade
+
+    # O mínimo de 992 veio antes do gatilho: não pode executar o stop ajustado em 1007
+    check(0)
+    assert len(engine.trades) == 0
+    assert trade().stop_loss == pytest.approx(1012.0 - ATR * 0.5)
+
+    check(1)
+    assert len(engine.trades) == 1
+    closed = engine.trades[0]
+    assert closed.exit_reason == 'STOP_LOSS'
+    assert closed.exit_time == MINUTES.index[5] and closed.exit_price == pytest.approx(1007.0)
@@ -0,0 +1,51 @@
+"""Resumo de trades compartilhado por engine, portfólio e walk-forward"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('talib')
+
+from backtest.backtest_engine import Trade
+from backtest.metrics import SUMMARY_KEYS, trade_metrics, trade_summary
+from backtest.trade_log import TradeLog
+from backtest.walk_forward import _oos_metrics
+
+
+RESULTS = {
+    'misto': [12.0, -4.0, 0.0, 7.5, -10.0, 3.0],
+    'so_ganhos': [2.0, 5.0],
+    'so_perdas': [-1.0, -3.0],
+    'zerados': [0.0, 0.0],
+}
+
+
+@pytest.mark.parametrize('case', RESULTS)
+def test_summary_is_subset_of_trade_metrics(case):
+    results = np.array(RESULTS[case])
+    metrics = trade_metrics(results)
+    assert trade_summary(results) == {key: metrics[key] for key in SUMMARY_KEYS}
+
+
+def test_summary_without_trades():
+    assert trade_metrics(np.empty(0)) == {}
+    assert trade_summary(np.empty(0)) == {'net_profit': 0.0, 'total_trades': 0, 'win_rate': 0.0,
+                                          'profit_factor': 0.0}
+
+
+def _log(results) -> TradeLog:
+    trades = []
+    for minute, result in enumerate(results):
+        entry = pd.Timestamp('2024-03-04 10:00') + pd.Timedelta(minutes=10 * minute)
+        trades.append(Trade(entry, entry + pd.Timedelta(minutes=5), 'LONG', 128000.0, 128010.0, 1,
+                            result, 'CLOSED', exit_reason='TAKE_PROFIT'))
+    return TradeLog.from_trades(trades)
+
+
+@pytest.mark.parametrize('case', [*RESULTS, 'vazio'])
+def test_oos_metrics_use_trade_metrics(case):
+    results = RESULTS.get(case, [])
+    windows = pd.DataFrame({'oos_net_profit': [1.0, -2.0]})
+    metrics = _oos_metrics(_log(results), windows)
+    assert metrics['windows'] == 2 and metrics['profitable_windows'] == 1
+    assert {key: metrics[key] for key in SUMMARY_KEYS} == trade_summary(np.array(results))
@@ -0,0 +1,41 @@
+"""Compilador NTSL: constantes da execução derivadas do ativo (IsBMF)"""
+
+import pytest
+
+pytest.importorskip('talib')
+
+from backtest.backtest_engine import BacktestEngine
+from backtest.ntsl_parser import NTSLParser
+
+from conftest import ROOT
+
+
+PFR = ROOT / 'estrategias' / 'exemplos' / 'editaveis' / 'automations' / 'price_action' / \
+    'STP0004_Trade_e_Acoes_Setup_PFR_Day_Trade.txt'
+
+
+def _run(strategy, data, asset: str):
+    engine = BacktestEngine(verbosity=0)
+    return engine.run_backtest(strategy, data, asset, '5min', mode='compiled')
+
+
+@pytest.mark.parametrize('expr', ['IsBMF', 'IsBMF()', 'not IsBMF'])
+@pytest.mark.parametrize('asset, is_bmf', [('WIN', True), ('WINZ24', True), ('wdo$n', True),
+                                           ('PETR4', False), ('', False)])
+def test_isbmf_follows_asset(expr, asset, is_bmf, bars_5min):
+    code = f"begin\n  if (BuyPosition = 0) and ({expr}) then BuyAtMarket;\nend;\n"
+    result = _run(NTSLParser().parse_content(code), bars_5min, asset)
+    assert len(result.trades) == int(is_bmf != expr.startswith('not'))
+
+
+def test_user_function_overrides_isbmf(bars_5min):
+    code = ("function IsBMF: boolean;\nbegin\n  Result := false;\nend;\n"
+            "begin\n  if (BuyPosition = 0) and IsBMF then BuyAtMarket;\nend;\n")
+    assert len(_run(NTSLParser().parse_content(code), bars_5min, 'WIN').trades) == 0
+
+
+@pytest.mark.skipif(not PFR.exists(), reason='exemplo fora do repositório')
+@pytest.mark.parametrize('asset', ['WIN', 'PETR4'])
+def test_example_with_isbmf_compiles(asset, bars_5min):
+    result = _run(NTSLParser().parse_file(str(PFR)), bars_5min, asset)
+    assert len(result.trades) > 0
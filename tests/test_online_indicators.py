@@ -0,0 +1,84 @@
+"""Equivalência numérica entre os indicadores incrementais e TechnicalIndicators"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('talib')
+
+from backtest.online_indicators import (
+    OnlineSMA, OnlineEMA, OnlineSMMA, OnlineWMA, OnlineATR, OnlineBollinger, OnlineRSI,
+    OnlineStochastic, OnlineMACD, OnlineHullMA, OnlineTEMA, OnlineDidiIndex, OnlineVWAP)
+from backtest.technical_indicators import TechnicalIndicators as TI
+
+from conftest import resample_bars
+
+
+# Erro relativo aceito (o TA-Lib pode diferir só no arredondamento, ver online_indicators)
+RTOL = 1e-9
+
+CLOSE = lambda bar: (bar.close,)
+HLC = lambda bar: (bar.high, bar.low, bar.close)
+
+# nome: (fábrica do objeto incremental, argumentos de update, cálculo em lote)
+CASES = {
+    'sma': (lambda: OnlineSMA(20), CLOSE, lambda d: TI.sma(d['close'], 20)),
+    'ema': (lambda: OnlineEMA(9), CLOSE, lambda d: TI.ema(d['close'], 9)),
+    'smma': (lambda: OnlineSMMA(14), CLOSE, lambda d: TI.smma(d['close'], 14)),
+    'wma': (lambda: OnlineWMA(10), CLOSE, lambda d: TI.wma(d['close'], 10)),
+    'atr': (lambda: OnlineATR(14), HLC, lambda d: TI.atr(d, 14)),
+    'bollinger_sma': (lambda: OnlineBollinger(20, 2.0, 0), CLOSE, lambda d: TI.bollinger_bands(d['close'], 20, 2.0, 0)),
+    'bollinger_ema': (lambda: OnlineBollinger(20, 2.0, 1), CLOSE, lambda d: TI.bollinger_bands(d['close'], 20, 2.0, 1)),
+    'bollinger_wma': (lambda: OnlineBollinger(20, 1.5, 2), CLOSE, lambda d: TI.bollinger_bands(d['close'], 20, 1.5, 2)),
+    'rsi': (lambda: OnlineRSI(14), CLOSE, lambda d: TI.rsi(d['close'], 14)),
+    'stochastic': (lambda: OnlineStochastic(14, 3), HLC, lambda d: TI.stochastic(d['high'], d['low'], d['close'], 14, 3)),
+    'macd': (lambda: OnlineMACD(12, 26, 9), CLOSE, lambda d: TI.macd(d['close'], 12, 26, 9)),
+    'hull': (lambda: OnlineHullMA(16), CLOSE, lambda d: TI.hull_ma(d['close'], 16)),
+    'tema': (lambda: OnlineTEMA(9), CLOSE, lambda d: TI.tema(d['close'], 9)),
+    'didi': (lambda: OnlineDidiIndex(3, 8, 20), CLOSE, lambda d: TI.didi_index(d['close'], 3, 8, 20)),
+    'vwap': (lambda: OnlineVWAP(), lambda bar: (bar.high, bar.low, bar.close, bar.volume), lambda d: TI.vwap(d)),
+}
+
+
+def _as_columns(values) -> np.ndarray:
+    """Resultado em lote (Series ou tupla de Series) como matriz barras x saídas"""
+    if not isinstance(values, tuple):
+        values = (values,)
+    return np.column_stack([np.asarray(v, dtype=np.float64) for v in values])
+
+
+def _run_online(indicator, update_args, data: pd.DataFrame) -> np.ndarray:
+    rows = [indicator.update(*update_args(bar)) for bar in data.itertuples()]
+    return np.array([row if isinstance(row, tuple) else (row,) for row in rows], dtype=np.float64)
+
+
+def _assert_equivalent(online: np.ndarray, batch: np.ndarray):
+    np.testing.assert_array_equal(np.isnan(online), np.isnan(batch), err_msg='posições de NaN diferentes')
+    scale = np.nanmax(np.abs(batch))
+    np.testing.assert_allclose(online, batch, rtol=RTOL, atol=RTOL * scale, equal_nan=True)
+
+
+@pytest.fixture(scope='module', params=[1, 5], ids=['1min', '5min'])
+def bars(request, minute_bars):
+    return minute_bars.iloc[:3000] if request.param == 1 else resample_bars(minute_bars, request.param)
+
+
+@pytest.mark.parametrize('name', CASES)
+def test_online_matches_batch(name, bars):
+    factory, update_args, batch = CASES[name]
+    _assert_equivalent(_run_online(factory(), update_args, bars), _as_columns(batch(bars)))
+
+
+@pytest.mark.parametrize('name', ['ema', 'wma', 'rsi', 'macd', 'tema', 'bollinger_sma'])
+def test_leading_nan_is_skipped(name, minute_bars):
+    factory, update_args, batch = CASES[name]
+    data = minute_bars.iloc[:600].copy()
+    data.iloc[:5] = np.nan
+    _assert_equivalent(_run_online(factory(), update_args, data), _as_columns(batch(data)))
+
+
+def test_value_tracks_last_update(minute_bars):
+    indicator = OnlineBollinger(20)
+    for bar in minute_bars.iloc[:50].itertuples():
+        returned = indicator.update(bar.close)
+    assert indicator.value == returned
@@ -0,0 +1,30 @@
+"""Varredura de parâmetros (ParameterOptimizer)"""
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('talib')
+
+from backtest.ntsl_parser import NTSLParser
+from backtest.optimizer import ParameterOptimizer
+
+from conftest import AUTOMATIONS_DIR
+
+
+STRATEGY = str(sorted(AUTOMATIONS_DIR.glob('*.txt'))[0])
+# Filtro de spread apertado: o spread sorteado decide parte das entradas
+GRID = {'filtro_spreadMaximoTicks': [1], 'maxTradesPorDia': [2, 999], 'usarBreakEven': [True, False]}
+
+
+def _run(data, workers):
+    optimizer = ParameterOptimizer(NTSLParser().parse_file(STRATEGY), data, 'WIN', '5min',
+                                   workers=workers, cache_bytes=0)
+    return optimizer.run(GRID).drop(columns='elapsed_s')
+
+
+def test_same_grid_gives_same_table(bars_5min):
+    """Sem semente explícita, o spread é o mesmo em todas as execuções (e processos)"""
+    first = _run(bars_5min, workers=1)
+    assert first['error'].isna().all()
+    pd.testing.assert_frame_equal(_run(bars_5min, workers=1), first)
+    pd.testing.assert_frame_equal(_run(bars_5min, workers=2), first)
@@ -0,0 +1,24 @@
+"""DataFrames em memória compartilhada (SharedDataFrame / attach_shared_frame)"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('talib')
+
+from backtest.shared_data import SharedDataFrame, attach_shared_frame
+
+
+@pytest.mark.parametrize('tz', [None, 'America/Sao_Paulo', 'America/New_York'])
+def test_round_trip_keeps_index_and_columns(tz):
+    # 2024-11-03: fim do horário de verão em Nova York (01:00-01:59 acontece duas vezes)
+    index = pd.date_range('2024-11-02 20:00', '2024-11-03 08:00', freq='15min', tz='UTC', name='datetime')
+    index = index.tz_convert(tz) if tz else index.tz_localize(None)
+    data = pd.DataFrame({'close': np.arange(len(index), dtype=np.float64),
+                         'volume': np.arange(len(index), dtype=np.int64)}, index=index)
+    data.attrs['asset'] = 'WIN'
+
+    with SharedDataFrame(data) as shared:
+        attached = attach_shared_frame(shared.descriptor)
+        pd.testing.assert_frame_equal(attached, data, check_freq=False)
+        assert attached.attrs == data.attrs
@@ -0,0 +1,117 @@
+"""Sinais pré-calculados (_precompute_signals) contra a lógica original barra a barra"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('talib')
+
+from backtest.backtest_engine import BacktestEngine
+
+
+LW_COLUMNS = ['media_tendencia', 'media_sinal_low', 'media_sinal_high']
+BB_COLUMNS = ['bb_upper', 'bb_lower']
+
+
+# --- Referência: versão barra a barra original do engine (antes dos arrays) ---
+
+def reference_larry_williams(data: pd.DataFrame, bar_idx: int) -> int:
+    if bar_idx < 20:  # Precisa de dados suficientes
+        return 0
+    try:
+        current_data = data.iloc[bar_idx]
+        tendencia = current_data.get('media_tendencia')
+        media_sinal_low = current_data.get('media_sinal_low')
+        media_sinal_high = current_data.get('media_sinal_high')
+        if pd.isna(tendencia) or pd.isna(media_sinal_low) or pd.isna(media_sinal_high):
+            return 0
+        close = current_data['close']
+        low = current_data['low']
+        high = current_data['high']
+        if close > tendencia and low < media_sinal_low:
+            return 1
+        elif close < tendencia and high > media_sinal_high:
+            return -1
+        else:
+            return 0
+    except (KeyError, IndexError):
+        return 0
+
+
+def reference_bollinger(data: pd.DataFrame, bar_idx: int) -> int:
+    try:
+        current_data = data.iloc[bar_idx]
+        close = current_data['close']
+        bb_upper = current_data.get('bb_upper')
+        bb_lower = current_data.get('bb_lower')
+        if pd.isna(bb_upper) or pd.isna(bb_lower):
+            return 0
+        if close > bb_upper:
+            return 1
+        elif close < bb_lower:
+            return -1
+        else:
+            return 0
+    except (KeyError, IndexError):
+        return 0
+
+
+def synthetic_frame(n: int = 300, seed: int = 11, warmup: int = 30) -> pd.DataFrame:
+    """Preços e indicadores em grade grossa (muitos empates) com aquecimento NaN e NaNs esparsos"""
+    rng = np.random.default_rng(seed)
+    close = 100.0 + rng.integers(-3, 4, size=n)
+    data = pd.DataFrame({
+        'open': close,
+        'high': close + rng.integers(0, 3, size=n),
+        'low': close - rng.integers(0, 3, size=n),
+        'close': close,
+        'volume': 1000.0,
+    }, index=pd.date_range('2024-03-04 09:00', periods=n, freq='5min'))
+    for col in LW_COLUMNS + BB_COLUMNS:
+        values = 100.0 + rng.integers(-3, 4, size=n).astype(np.float64)
+        values[:rng.integers(5, warmup)] = np.nan
+        values[rng.random(n) < 0.05] = np.nan
+        data[col] = values
+    return data
+
+
+def _signals(data: pd.DataFrame):
+    engine = BacktestEngine(verbosity=0)
+    engine.data = data
+    engine._precompute_signals()
+    return engine.signal_lw, engine.signal_bb
+
+
+CASES = {
+    'completo': [],
+    'aquecimento_curto': None,  # sinal em toda barra válida: só a trava de 20 barras zera o início
+    'sem_media_sinal_high': ['media_sinal_high'],
+    'sem_larry_williams': LW_COLUMNS,
+    'sem_bb_lower': ['bb_lower'],
+    'sem_indicadores': LW_COLUMNS + BB_COLUMNS,
+}
+
+
+@pytest.mark.parametrize('case', CASES)
+def test_precomputed_signals_match_per_bar(case):
+    if CASES[case] is None:
+        data = synthetic_frame()
+        for col in LW_COLUMNS + BB_COLUMNS:
+            data[col] = np.r_[np.full(3, np.nan), np.zeros(len(data) - 3)]
+        data['media_tendencia'] += data['close'] - 1
+        data['media_sinal_low'] += data['low'] + 1
+        data['bb_upper'] += data['close'] - 1
+    else:
+        data = synthetic_frame().drop(columns=CASES[case])
+    signal_lw, signal_bb = _signals(data)
+
+    expected_lw = np.array([reference_larry_williams(data, i) for i in range(len(data))], dtype=np.int8)
+    expected_bb = np.array([reference_bollinger(data, i) for i in range(len(data))], dtype=np.int8)
+    np.testing.assert_array_equal(signal_lw, expected_lw)
+    np.testing.assert_array_equal(signal_bb, expected_bb)
+    assert not signal_lw[:20].any()
+    if CASES[case] is None:
+        assert (signal_lw[20:] == 1).all() and (signal_bb[3:] == 1).all()
+    if case == 'completo':
+        # Os dados exercitam os dois lados de cada sinal
+        assert {-1, 1} <= set(signal_lw.tolist()) and {-1, 1} <= set(signal_bb.tolist())
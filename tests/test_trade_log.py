@@ -0,0 +1,59 @@
+"""TradeLog colunar e a reconstrução da curva de equity a partir dele"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('talib')
+
+from backtest.backtest_engine import BacktestEngine, Trade, rebuild_equity_curve
+from backtest.ntsl_parser import NTSLParser
+from backtest.spread_model import UniformSpreadModel
+from backtest.trade_log import TradeLog
+
+from conftest import AUTOMATIONS_DIR
+
+
+STRATEGY = str(sorted(AUTOMATIONS_DIR.glob('*.txt'))[0])
+
+
+def _trade(minute: int, result=None) -> Trade:
+    entry = pd.Timestamp('2024-03-04 10:00') + pd.Timedelta(minutes=minute)
+    closed = result is not None
+    return Trade(entry, entry + pd.Timedelta(minutes=5) if closed else None, 'LONG', 128000.0,
+                 128010.0 if closed else None, 1, result, 'CLOSED' if closed else 'OPEN',
+                 exit_reason='TAKE_PROFIT' if closed else None)
+
+
+@pytest.mark.parametrize('source', [TradeLog(), TradeLog.from_trades([_trade(0, 2.0)])], ids=['vazio', 'um_trade'])
+def test_append_after_empty_select(source):
+    log = source.select(np.zeros(len(source), dtype=bool))
+    assert len(log) == 0
+    for minute in range(3):
+        log.append(_trade(minute, 1.0))
+    log.extend(TradeLog.from_trades([_trade(10, -1.0)]))
+    np.testing.assert_array_equal(log.results, [1.0, 1.0, 1.0, -1.0])
+
+
+def test_rebuild_with_only_an_open_trade():
+    index = pd.date_range('2024-03-04 10:00', periods=4, freq='5min')
+    close = np.array([128000.0, 128005.0, 128015.0, 127990.0])
+    equity = rebuild_equity_curve(TradeLog(), close, index, open_trade=_trade(5), points_per_tick=0.2)
+    np.testing.assert_allclose(equity, [0.0, 1.0, 3.0, -2.0])
+
+
+@pytest.mark.parametrize('mode', ['standard', 'fast', 'compiled'])
+def test_rebuild_right_after_first_entry(mode, bars_5min):
+    """Dados que terminam logo após a primeira entrada: nenhum trade fechado e posição aberta"""
+    strategy = NTSLParser().parse_file(STRATEGY)
+
+    def run(data):
+        engine = BacktestEngine(verbosity=0, spread_model=UniformSpreadModel(seed=3))
+        return engine.run_backtest(strategy, data, 'WIN', '5min', mode=mode, rebuild_equity=True)
+
+    first_entry = run(bars_5min).trades[0].entry_time
+    data = bars_5min.iloc[:bars_5min.index.get_loc(first_entry) + 2]
+    result = run(data)
+
+    assert len(result.trades) == 1 and result.trades[0].exit_reason == 'END_OF_DATA'
+    assert len(result.equity_curve) == len(data)
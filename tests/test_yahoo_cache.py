@@ -0,0 +1,115 @@
+"""YahooCache e a fonte 'yahoo' do ConsoleRunner, com um yfinance falso (sem rede)"""
+
+import sys
+import types
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('talib')
+
+import backtest.dataset_cache as dataset_cache
+import backtest.ntsl_ast as ntsl_ast
+import backtest.yahoo_cache as yahoo_cache
+from backtest.console_runner import ConsoleRunner
+from backtest.data_provider import DataProvider
+from backtest.spread_model import UniformSpreadModel
+from backtest.yahoo_cache import YahooCache
+
+from conftest import AUTOMATIONS_DIR, resample_bars
+
+
+STRATEGY = str(sorted(AUTOMATIONS_DIR.glob('*.txt'))[0])
+
+
+class FakeYFinance(types.ModuleType):
+    """Módulo yfinance servindo barras fixas; registra cada chamada de history/info"""
+
+    def __init__(self, bars_by_interval):
+        super().__init__('yfinance')
+        self.bars_by_interval = bars_by_interval
+        self.calls = []
+        module = self
+
+        class Ticker:
+            def __init__(self, symbol):
+                self.symbol = symbol
+
+            def history(self, start, end, interval, **kwargs):
+                module.calls.append((self.symbol, start, end, interval))
+                bars = module.bars_by_interval[interval]
+                dates = bars.index.tz_localize(None).normalize()
+                return bars[(dates >= pd.Timestamp(start)) & (dates < pd.Timestamp(end))]
+
+            @property
+            def info(self):
+                module.calls.append((self.symbol, 'info'))
+                return {'longName': 'Mini Índice', 'currency': 'BRL', 'regularMarketPrice': 128000.0}
+
+        self.Ticker = Ticker
+
+
+def _yahoo_bars(bars: pd.DataFrame) -> pd.DataFrame:
+    """Barras no formato do yfinance: colunas capitalizadas e índice com fuso"""
+    bars = bars.rename(columns=str.capitalize)
+    bars.index = bars.index.tz_localize('America/Sao_Paulo')
+    return bars
+
+
+@pytest.fixture
+def yfinance(monkeypatch, minute_bars, tmp_path):
+    fake = FakeYFinance({'1m': _yahoo_bars(minute_bars), '5m': _yahoo_bars(resample_bars(minute_bars, 5))})
+    monkeypatch.setitem(sys.modules, 'yfinance', fake)
+    # Caches padrão (inclusive os do ConsoleRunner) fora da árvore do projeto
+    for module in (yahoo_cache, dataset_cache, ntsl_ast):
+        monkeypatch.setattr(module, 'DEFAULT_CACHE_DIR', tmp_path / module.__name__)
+    return fake
+
+
+def test_fetches_only_missing_ranges(yfinance):
+    cache = YahooCache()
+    first = cache.history('WIN', '2024-03-04', '2024-03-07', '5m')
+    second = cache.history('WIN', '2024-03-05', '2024-03-09', '5m')
+
+    assert yfinance.calls == [('WIN', '2024-03-04', '2024-03-07', '5m'), ('WIN', '2024-03-07', '2024-03-09', '5m')]
+    assert first.index[0].date() == pd.Timestamp('2024-03-04').date()
+    assert second.index[-1].date() == pd.Timestamp('2024-03-08').date()
+    pd.testing.assert_frame_equal(cache.history('WIN', '2024-03-04', '2024-03-09', '5m').loc[second.index], second)
+    assert len(yfinance.calls) == 2
+
+
+def test_offline_serves_only_from_cache(yfinance):
+    YahooCache().history('WIN', '2024-03-04', '2024-03-07', '5m')
+    YahooCache().info('WIN')
+    offline = YahooCache(offline=True)
+
+    assert len(offline.history('WIN', '2024-03-05', '2024-03-06', '5m')) == 108
+    assert offline.info('WIN')['currency'] == 'BRL'
+    with pytest.raises(ValueError, match='offline'):
+        offline.history('WIN', '2024-03-05', '2024-03-08', '5m')
+    assert offline.fetch_count == 0 and len(yfinance.calls) == 2
+
+
+def test_data_provider_uses_cache(yfinance):
+    provider = DataProvider(verbose=False, yahoo_cache=YahooCache())
+    data = provider.get_data('WIN', '2024-03-04', '2024-03-06', interval='5m', source='yahoo')
+    assert list(data.columns) == ['open', 'high', 'low', 'close', 'volume']
+    assert provider.get_symbol_info('WIN')['currency'] == 'BRL'
+    provider.get_data('WIN', '2024-03-04', '2024-03-06', interval='5m', source='yahoo')
+    provider.get_symbol_info('WIN')
+    assert len(yfinance.calls) == 2
+
+
+def test_console_runner_offline_repeats_online_run(yfinance):
+    def run(runner):
+        return runner.run_batch(STRATEGY, 'WIN', '2024-03-01', '2024-03-16', timeframe='5', verbosity=0,
+                                spread_model=UniformSpreadModel(seed=3), source='yahoo')
+
+    online = run(ConsoleRunner())
+    assert online is not None and len(online.trades) > 0
+    assert yfinance.calls == [('WIN', '2024-03-01', '2024-03-16', '5m')]
+
+    offline = run(ConsoleRunner(offline=True))
+    assert len(yfinance.calls) == 1
+    assert len(offline.trades) == len(online.trades)
+    assert offline.metrics == online.metrics